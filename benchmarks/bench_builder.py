@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_builder
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compare rebuilding an and_ on every new clause with QueryBuilder.
+
+    Usage::
+
+      $ python benchmarks/bench_builder.py [-n CLAUSES]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import timeit
+
+from csquery.builder import QueryBuilder
+from csquery.structured import and_, or_, term
+
+
+def clauses(n):
+    return [or_(term('brand{}'.format(i), field='brand'),
+                {'category': 'c{}'.format(i)}) for i in range(n)]
+
+
+def rebuild(n):
+    added = []
+    for clause in clauses(n):
+        added.append(clause)
+        query = and_(*added)()
+    return query
+
+
+def incremental(n):
+    builder = QueryBuilder('and')
+    for clause in clauses(n):
+        builder.append(clause)
+        query = builder()
+    return query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--clauses', type=int, default=200)
+    args = parser.parse_args()
+
+    assert rebuild(args.clauses) == incremental(args.clauses)
+    results = []
+    for name, func in (('rebuild', rebuild), ('builder', incremental)):
+        seconds = min(timeit.repeat(lambda: func(args.clauses), number=3,
+                                    repeat=3)) / 3
+        results.append(seconds)
+        print('{:<8} {:>10.2f} msec'.format(name, seconds * 1e3))
+    print('speedup  {:>9.2f}x'.format(results[0] / results[1]))
+
+
+if __name__ == '__main__':
+    main()
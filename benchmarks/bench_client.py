@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_client
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure requests/second of the asyncio client against the local
+    stand-in search endpoint at several concurrency levels.
+
+    Usage::
+
+      $ python benchmarks/bench_client.py [-n REQUESTS] [-c 1,4,16,64]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import asyncio
+import time
+
+from csquery.client import AsyncSearchClient
+from csquery.structured import and_, term
+from csquery.testing import StubSearchServer, hits
+
+
+async def run(endpoint, requests, concurrency):
+    async with AsyncSearchClient(endpoint,
+                                 max_connections=concurrency) as client:
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(and_(term('star', field='title'), year=i))
+
+        async def worker():
+            while not queue.empty():
+                await client.search(queue.get_nowait())
+
+        start = time.time()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--requests', type=int, default=2000)
+    parser.add_argument('-c', '--concurrency', default='1,4,16,64')
+    parser.add_argument('-l', '--latency', type=float, default=0.002,
+                        help='seconds the stub waits before answering')
+    args = parser.parse_args()
+
+    def handler(params):
+        time.sleep(args.latency)
+        return hits(['a', 'b', 'c'])
+
+    with StubSearchServer(handler) as stub:
+        print('{:>11} {:>10}'.format('concurrency', 'req/s'))
+        for concurrency in map(int, args.concurrency.split(',')):
+            elapsed = asyncio.run(run(stub.endpoint, args.requests,
+                                      concurrency))
+            print('{:>11} {:>10.0f}'.format(concurrency,
+                                            args.requests / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_in
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compare ``or_`` over one dict per value with ``in_`` for large id lists.
+
+    Usage::
+
+      $ python benchmarks/bench_in.py [-n VALUES]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import timeit
+
+from csquery.structured import or_, in_
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--values', type=int, default=50000)
+    args = parser.parse_args()
+
+    workloads = [
+        ('text', ['tt{:07d}'.format(i) for i in range(args.values)]),
+        ('int', list(range(args.values))),
+    ]
+    for kind, ids in workloads:
+        assert or_(*[{'id': v} for v in ids])() == in_('id', ids)()
+        results = []
+        for name, func in (
+                ('or_', lambda: or_(*[{'id': v} for v in ids])()),
+                ('in_', lambda: in_('id', ids)())):
+            seconds = min(timeit.repeat(func, number=3, repeat=3)) / 3
+            results.append(seconds)
+            print('{:<5} {:<4} {:>10.2f} msec'.format(
+                kind, name, seconds * 1e3))
+        print('{:<5} speedup {:>7.2f}x'.format(kind, results[0] / results[1]))
+
+
+if __name__ == '__main__':
+    main()
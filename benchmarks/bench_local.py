@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_local
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Evaluate structured queries over columnar documents with LocalIndex.
+
+    Usage::
+
+      $ python benchmarks/bench_local.py [-n DOCUMENTS]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import time
+
+import numpy
+
+from csquery.local import LocalIndex
+from csquery.structured import and_, or_, not_, term, phrase, prefix, in_
+
+WORDS = ('star wars trek game ship trooper night day dark light empire '
+         'return force awakens last jedi rise new hope').split()
+GENRES = ['sf', 'action', 'drama', 'comedy', 'horror', 'animation']
+
+QUERIES = [
+    ('field:value', and_(genres='sf')),
+    ('range', and_(year=(1990, 2000), rating=(7, ''))),
+    ('term', term('star', field='title')),
+    ('phrase', phrase('star wars', field='title')),
+    ('prefix', prefix('tr', field='title')),
+    ('in', in_('year', list(range(1950, 2020, 3)))),
+    ('nested', or_(and_(genres='sf', year=(1977, 1983)),
+                   and_(term('jedi', field='title'),
+                        not_(genres='comedy')))),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--documents', type=int, default=1000000)
+    args = parser.parse_args()
+
+    random = numpy.random.RandomState(0)
+    size = args.documents
+    words = numpy.array(WORDS, dtype=object)
+    lengths = random.randint(2, 6, size)
+    picks = random.randint(0, len(WORDS), lengths.sum())
+    chunks = numpy.split(words[picks], numpy.cumsum(lengths)[:-1])
+    titles = [' '.join(chunk) for chunk in chunks]
+    columns = {
+        'title': titles,
+        'genres': numpy.array(GENRES)[random.randint(0, len(GENRES), size)],
+        'year': random.randint(1950, 2020, size),
+        'rating': random.uniform(1, 10, size).round(1),
+    }
+
+    index = LocalIndex(columns, text_fields=['title'])
+    for name in ('title', 'genres'):
+        start = time.time()
+        index.match(prefix('a', field=name))
+        print('index {:<8} {:>10.2f} msec'.format(
+            name, (time.time() - start) * 1e3))
+
+    for name, expression in QUERIES:
+        seconds = []
+        for _ in range(5):
+            start = time.time()
+            matched = index.match(expression).sum()
+            seconds.append(time.time() - start)
+        best = min(seconds)
+        print('{:<12} {:>9.2f} msec {:>8.1f}M docs/sec {:>9} hits'.format(
+            name, best * 1e3, size / best / 1e6, matched))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_memory
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the memory used by a forest of prebuilt query trees.
+
+    Only the public builders are used, so the script can be run against
+    any revision of the package to compare node representations.
+
+    Usage::
+
+      $ python benchmarks/bench_memory.py [-n NODES]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from csquery.structured import and_, or_, not_, term, range_
+
+
+def build_tree(i):
+    # field names come from a decoded payload, as they do
+    # for saved searches, so every tree gets its own copy of the strings.
+    spec = json.loads(
+        '{"title": "title", "genres": "genres", "year": "year"}')
+    return and_(
+        not_('genre{}'.format(i % 50), field=spec['genres']),
+        or_(
+            term('star{}'.format(i), field=spec['title'], boost=2),
+            term('star{}'.format(i), field='plot'),
+        ),
+        range_((1990, 2000 + i % 20), field=spec['year']),
+    )
+
+
+def count_nodes(tree):
+    """Count the live Expression and FieldValue objects of ``tree``."""
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for f in node.fields:
+            count += 1
+            # older revisions render subtrees eagerly and drop them.
+            if getattr(f, 'expression', None) is not None:
+                stack.append(f.expression)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--nodes', type=int, default=1000000)
+    args = parser.parse_args()
+
+    trees = args.nodes // count_nodes(build_tree(0))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    forest = [build_tree(i) for i in range(trees)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = sum(count_nodes(tree) for tree in forest)
+    print('trees      {:>12,}'.format(len(forest)))
+    print('nodes      {:>12,}'.format(nodes))
+    print('total      {:>12,} bytes'.format(used))
+    print('per tree   {:>12.1f} bytes'.format(used / len(forest)))
+    print('per node   {:>12.1f} bytes'.format(used / nodes))
+
+
+if __name__ == '__main__':
+    main()
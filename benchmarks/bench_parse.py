@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_parse
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the throughput of the structured query parser.
+
+    Usage::
+
+      $ python benchmarks/bench_parse.py [-n QUERIES]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import random
+import time
+
+from csquery.structured import (
+    and_, or_, not_, term, phrase, prefix, near, range_, parse
+)
+
+WORDS = ['star', 'wars', "it's", r'back\slash', 'ジャン=ピエール', 'vampire',
+         'teenage', 'girl', 'Harrison Ford', 'drama']
+
+
+def build_query(rnd):
+    word = rnd.choice
+    return and_(
+        not_(word(WORDS), field='genres'),
+        or_(
+            term(word(WORDS), field='title', boost=2),
+            phrase(word(WORDS) + ' ' + word(WORDS), field='plot'),
+            prefix(word(WORDS)[:3], field='title'),
+            near(word(WORDS) + ' ' + word(WORDS), field='plot', distance=3),
+            *[{'id': 'tt{:07d}'.format(rnd.randint(0, 9999999))}
+              for _ in range(rnd.randint(1, 20))]
+        ),
+        range_((rnd.randint(1900, 2000), None), field='year'),
+        release_date="['2000-01-01T00:00:00Z','2010-01-01T00:00:00Z'}",
+        actors=word(WORDS),
+    )()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--queries', type=int, default=20000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    corpus = [build_query(rnd) for _ in range(args.queries)]
+    size = sum(len(q.encode('utf-8')) for q in corpus)
+
+    start = time.time()
+    for q in corpus:
+        parse(q)
+    elapsed = time.time() - start
+
+    print('queries    {:>12,}'.format(len(corpus)))
+    print('corpus     {:>12.2f} MB'.format(size / 1e6))
+    print('elapsed    {:>12.3f} sec'.format(elapsed))
+    print('throughput {:>12.2f} MB/s'.format(size / 1e6 / elapsed))
+    print('           {:>12,.0f} queries/s'.format(len(corpus) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
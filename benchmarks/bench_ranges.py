@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_ranges
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Build range clauses of time buckets and price bands in bulk.
+
+    Usage::
+
+      $ python benchmarks/bench_ranges.py [-n RANGES]
+
+    Compares csquery.ranges with one range_ per clause, whose date bounds
+    are formatted one at a time.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+from datetime import datetime, timedelta
+import timeit
+
+import numpy
+
+from csquery.ranges import format_ranges, ranges, time_buckets
+from csquery.structured import range_
+
+
+def loop_date_literals(lower, upper):
+    return ["['{}Z','{}Z'}}".format(low.isoformat(), high.isoformat())
+            for low, high in zip(lower, upper)]
+
+
+def loop_dates(lower, upper):
+    return [range_(literal, field='date')
+            for literal in loop_date_literals(lower, upper)]
+
+
+def loop_numbers(lower, upper):
+    return [range_((low, high), field='price')
+            for low, high in zip(lower, upper)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--ranges', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    start = datetime(2020, 1, 1)
+    lower, upper = time_buckets(start, start + timedelta(hours=args.ranges),
+                                timedelta(hours=1))
+    dates = (lower.astype(datetime).tolist(), upper.astype(datetime).tolist())
+    bands = numpy.arange(args.ranges + 1) * 0.5
+
+    assert [e() for e in loop_dates(*dates)] == \
+        [e() for e in ranges(lower, upper, closed='left', field='date')]
+
+    cases = [
+        ('literals, loop', lambda: loop_date_literals(*dates)),
+        ('literals, datetime64', lambda: format_ranges(lower, upper,
+                                                       closed='left')),
+        ('dates, loop', lambda: loop_dates(*dates)),
+        ('dates, datetime64', lambda: ranges(lower, upper, closed='left',
+                                             field='date')),
+        ('dates, datetime', lambda: ranges(*dates, closed='left',
+                                           field='date')),
+        ('numbers, loop', lambda: loop_numbers(bands[:-1].tolist(),
+                                               bands[1:].tolist())),
+        ('numbers, float64', lambda: ranges(bands[:-1], bands[1:],
+                                            field='price')),
+    ]
+    print('{} ranges'.format(args.ranges))
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('{:<22} {:8.2f} ms {:8.0f} ranges/s'.format(
+            name, seconds * 1e3, args.ranges / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_store
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Startup time, memory and lookups of saved searches in a QueryStore.
+
+    Usage::
+
+      $ python benchmarks/bench_store.py [-n QUERIES] [--lookups N]
+
+    Every way of loading runs in its own process, which reports the growth
+    of its RSS and of its private part, after the lookups of random
+    saved searches: the rendered strings read into a dict, the strings
+    parsed into expressions, and the mmap store, which is only opened.
+    Pages of the store are shared by all the processes that map it.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from csquery.cache import fingerprint
+from csquery.store import QueryStore, write_store
+from csquery.structured import and_, or_, not_, term, range_, in_, parse
+
+
+def build_query(i):
+    return and_(
+        not_('genre{}'.format(i % 50), field='genres'),
+        or_(term('star {}'.format(i), field='title', boost=2),
+            term('wars {}'.format(i), field='plot')),
+        range_((1990 + i % 10, 2000 + i % 20), field='year'),
+        in_('id', ['tt{:07d}'.format(i + j) for j in range(i % 5 + 1)]),
+        user='user{}'.format(i // 10),
+    )
+
+
+def _memory():
+    """Return the resident and private resident bytes of the process."""
+    try:
+        with io.open('/proc/self/status') as f:
+            status = dict(line.split(':', 1) for line in f)
+    except IOError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # only the peak, in bytes on macOS.
+        return peak, peak
+    return tuple(int(status[name].split()[0]) * 1024
+                 for name in ('VmRSS', 'RssAnon'))
+
+
+def child(mode, directory, lookups):
+    with io.open(os.path.join(directory, 'keys.json')) as f:
+        keys = random.Random(0).sample(json.load(f), lookups)
+    rss, anon = _memory()
+    started = time.perf_counter()
+    if mode == 'strings':
+        with io.open(os.path.join(directory, 'queries.jsonl')) as f:
+            saved = dict(json.loads(line) for line in f)
+        get = saved.__getitem__
+    elif mode == 'parsed':
+        with io.open(os.path.join(directory, 'queries.jsonl')) as f:
+            saved = dict((key, parse(query))
+                         for key, query in map(json.loads, f))
+        get = saved.__getitem__
+    else:
+        store = QueryStore(os.path.join(directory, 'queries.csqs'))
+        get = store.__getitem__
+    startup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in keys:
+        get(key)
+    lookup = (time.perf_counter() - started) / lookups
+    after = _memory()
+    print(json.dumps({'startup': startup, 'lookup': lookup,
+                      'rss': after[0] - rss, 'anon': after[1] - anon}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--queries', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'DIR'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child[0], args.child[1], args.lookups)
+
+    directory = tempfile.mkdtemp()
+    try:
+        queries = [build_query(i) for i in range(args.queries)]
+        keys = [fingerprint(q) for q in queries]
+        with io.open(os.path.join(directory, 'keys.json'), 'w') as f:
+            f.write(json.dumps(keys))
+        with io.open(os.path.join(directory, 'queries.jsonl'), 'w') as f:
+            for key, query in zip(keys, queries):
+                f.write(json.dumps([key, query()]) + '\n')
+        started = time.perf_counter()
+        write_store(os.path.join(directory, 'queries.csqs'), queries)
+        print('{} queries, store of {:.1f} MB written in {:.2f} sec'.format(
+            args.queries,
+            os.path.getsize(os.path.join(directory, 'queries.csqs')) / 1e6,
+            time.perf_counter() - started))
+        del queries
+
+        print('{:<10} {:>12} {:>12} {:>12} {:>14}'.format(
+            'load', 'startup', 'RSS', 'private', 'lookup'))
+        for mode in ('strings', 'parsed', 'store'):
+            output = subprocess.check_output([
+                sys.executable, __file__, '--child', mode, directory,
+                '--lookups', str(args.lookups)])
+            result = json.loads(output.decode('utf-8'))
+            print('{:<10} {:>10.3f} s {:>9.1f} MB {:>9.1f} MB {:>11.2f} us'
+                  .format(mode, result['startup'], result['rss'] / 1e6,
+                          result['anon'] / 1e6, result['lookup'] * 1e6))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_template
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compare rebuilding a query tree on every request with rendering
+    a compiled template.
+
+    Usage::
+
+      $ python benchmarks/bench_template.py [-n NUMBER]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import timeit
+
+from csquery.structured import and_, or_, not_, term
+from csquery.template import compile_, param
+
+VALUES = [
+    ('drama', 'star', ('', 2000)),
+    ('comedy', "it's", (1990, 2000)),
+    ('ジャンル', r'back\slash', (2000, None)),
+]
+
+
+def build(genre, title, year):
+    return and_(
+        not_(genre, field='genres'),
+        or_(
+            term(title, field='title', boost=2),
+            term(title, field='plot'),
+        ),
+        year=year,
+    )()
+
+
+TEMPLATE = compile_(and_(
+    not_(param('genre'), field='genres'),
+    or_(
+        term(param('title'), field='title', boost=2),
+        term(param('title'), field='plot'),
+    ),
+    year=param('year'),
+))
+
+
+def render(genre, title, year):
+    return TEMPLATE.render(genre=genre, title=title, year=year)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    for values in VALUES:
+        assert build(*values) == render(*values)
+
+    results = []
+    for name, func in (('rebuild', build), ('template', render)):
+        seconds = min(timeit.repeat(
+            lambda: [func(*v) for v in VALUES],
+            number=args.number // len(VALUES), repeat=3))
+        results.append((name, seconds))
+        print('{:<10} {:>8.3f} usec/query'.format(
+            name, seconds / args.number * 1e6))
+    print('speedup    {:>8.2f}x'.format(results[0][1] / results[1][1]))
+
+
+if __name__ == '__main__':
+    main()
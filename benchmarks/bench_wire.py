@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.bench_wire
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compare size and speed of csquery.wire with pickle and JSON specs.
+
+    Usage::
+
+      $ python benchmarks/bench_wire.py [-n NUMBER]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import json
+import pickle
+import timeit
+
+from csquery import wire
+from csquery.specs import build
+from csquery.structured import and_, or_, not_, term, phrase, in_, InExpression
+
+
+def to_spec(expression):
+    """The JSON spec of ``expression``, as read by ``python -m csquery``."""
+    if isinstance(expression, InExpression):
+        return {'op': 'in', 'args': [expression.name, list(expression.values)],
+                'kwargs': dict(expression._options)}
+    args, kwargs = [], dict(expression._options)
+    for f in expression.fields:
+        value = f.raw if f.expression is None else to_spec(f.expression)
+        if f.name is None:
+            args.append(value)
+        else:
+            args.append({f.name: value})
+    return {'op': expression.operator, 'args': args, 'kwargs': kwargs}
+
+
+def workloads():
+    query = and_(
+        or_(term('star', field='title', boost=2),
+            phrase('star wars', field='plot')),
+        not_(genres='horror'),
+        actors='Harrison Ford', year=(1977, 1983), rating=(7.5, ''),
+    )
+    ids = in_('id', ['tt{:07d}'.format(i) for i in range(1000)])
+    wide = or_(*[and_(brand='brand {}'.format(i % 20), price=(i, i + 10),
+                      category='c{}'.format(i % 5)) for i in range(200)])
+    return [('query', query), ('in 1000', and_(ids, year=2000)),
+            ('wide 200', wide)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--number', type=int, default=200)
+    args = parser.parse_args()
+
+    protocol = pickle.HIGHEST_PROTOCOL
+    for name, expression in workloads():
+        spec = to_spec(expression)
+        formats = [
+            ('wire', wire.dumps, wire.loads),
+            ('pickle', lambda e: pickle.dumps(e, protocol), pickle.loads),
+            ('json', lambda e: json.dumps(to_spec(e)).encode('utf-8'),
+             lambda data: build(json.loads(data.decode('utf-8')))),
+        ]
+        assert build(spec) == expression
+        for fmt, dump, load in formats:
+            data = dump(expression)
+            assert load(data) == expression
+            dump_seconds = min(timeit.repeat(
+                lambda: dump(expression), number=args.number,
+                repeat=3)) / args.number
+            load_seconds = min(timeit.repeat(
+                lambda: load(data), number=args.number,
+                repeat=3)) / args.number
+            print('{:<9} {:<7} {:>8} bytes  dumps {:>8.1f} usec  '
+                  'loads {:>8.1f} usec'.format(
+                      name, fmt, len(data), dump_seconds * 1e6,
+                      load_seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+    benchmarks.suite
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Time the hot paths of csquery.structured and compare with a baseline.
+
+    Usage::
+
+      $ python benchmarks/suite.py -o baseline.json
+      $ python benchmarks/suite.py --compare baseline.json [--threshold 0.1]
+      $ python benchmarks/suite.py -k render
+
+    Results are the best time of one call over several repeats. With
+    ``--compare``, the command exits with status 1 when a workload is
+    slower than the baseline by more than the threshold.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import csquery
+from csquery.structured import (
+    and_, or_, not_, term, phrase, in_, escape, format_value, parse,
+    clear_literal_cache
+)
+
+WIDE = 1000
+DEEP = 500
+TEXTS = ["l'été {} \\ «citation» d'{}".format(i, 'ö' * (i % 7))
+         for i in range(1000)]
+IDS = ['tt{:07d}'.format(i) for i in range(5000)]
+MIXED = (TEXTS[0], 1, 2.5, None, True, (1, 2), b'bytes', "it's")
+
+
+def build_wide():
+    return or_(*[{'id': i} for i in IDS[:WIDE]])
+
+
+def build_deep():
+    expression = term('star', field='title')
+    for i in range(DEEP):
+        expression = and_(expression, not_(year=i), boost=2) if i % 2 else \
+            or_(expression, phrase('star wars', field='plot'))
+    return expression
+
+
+def format_values(values, cached=False):
+    # without the literal cache, every call formats every value.
+    if not cached:
+        clear_literal_cache()
+    return [format_value(v) for v in values]
+
+
+def build_typical():
+    return and_(
+        or_(term('star', field='title', boost=2),
+            phrase('star wars', field='plot')),
+        not_(genres='horror'),
+        actors='Harrison Ford', year=(1977, 1983), rating=(7.5, ''),
+    )
+
+
+_TYPICAL = build_typical()
+_TYPICAL()
+_TYPICAL_QUERY = _TYPICAL()
+_WIDE_QUERY = build_wide()()
+_DEEP_QUERY = build_deep()()
+
+#: name -> function timed by the suite.
+WORKLOADS = [
+    ('build_typical', build_typical),
+    ('render_typical', lambda: build_typical()()),
+    ('render_cached', lambda: _TYPICAL()),
+    ('build_wide_or', build_wide),
+    ('render_wide_or', lambda: build_wide()()),
+    ('build_deep', build_deep),
+    ('render_deep', lambda: build_deep()()),
+    ('render_in', lambda: in_('id', IDS)()),
+    ('escape_unicode', lambda: [escape(t) for t in TEXTS]),
+    ('format_value_mixed', lambda: format_values(MIXED)),
+    ('format_value_mixed_cached', lambda: format_values(MIXED, True)),
+    ('format_value_unicode', lambda: format_values(TEXTS)),
+    ('format_value_unicode_cached', lambda: format_values(TEXTS, True)),
+    ('parse_typical', lambda: parse(_TYPICAL_QUERY)),
+    ('parse_wide_or', lambda: parse(_WIDE_QUERY)),
+    ('parse_deep', lambda: parse(_DEEP_QUERY)),
+]
+
+
+def measure(func, repeat, min_time):
+    """Return the best time of one call to ``func`` in seconds."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number, number
+
+
+def run(pattern=None, repeat=5, min_time=0.2):
+    results = {}
+    for name, func in WORKLOADS:
+        if pattern and pattern not in name:
+            continue
+        seconds, number = measure(func, repeat, min_time)
+        results[name] = {'seconds': seconds, 'number': number}
+    return {
+        'csquery': csquery.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Return ``[(name, baseline, current, ratio)]`` and the regressions.
+    """
+    rows, regressions = [], []
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append((name, None, result['seconds'], None))
+            continue
+        ratio = result['seconds'] / base['seconds']
+        rows.append((name, base['seconds'], result['seconds'], ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _usec(seconds):
+    return '-' if seconds is None else '{:.2f}'.format(seconds * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-o', '--output',
+                        help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed slowdown, 0.10 is 10%% (default)')
+    parser.add_argument('-k', dest='pattern',
+                        help='only run workloads whose name contains it')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds spent in each repeat')
+    args = parser.parse_args()
+
+    current = run(args.pattern, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if not args.compare:
+        for name, result in sorted(current['results'].items()):
+            print('{:<28} {:>12} usec'.format(name, _usec(result['seconds'])))
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(baseline, current, args.threshold)
+    print('{:<28} {:>12} {:>12} {:>8}'.format(
+        'workload', 'baseline', 'current', 'ratio'))
+    for name, base, seconds, ratio in rows:
+        print('{:<28} {:>12} {:>12} {:>8} {}'.format(
+            name, _usec(base), _usec(seconds),
+            '-' if ratio is None else '{:.2f}'.format(ratio),
+            'REGRESSION' if name in regressions else ''))
+    if regressions:
+        print('{} workload(s) slower than the baseline by more than '
+              '{:.0%}'.format(len(regressions), args.threshold),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
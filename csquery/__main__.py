@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.__main__
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Entry point of ``python -m csquery``.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+import sys
+
+from csquery.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.builder
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A mutable builder for an expression that grows one clause at a time.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from csquery.structured import Expression, FieldValue, format_options
+
+
+def _field(clause):
+    if isinstance(clause, FieldValue):
+        return clause
+    return FieldValue(clause)
+
+
+class QueryBuilder(object):
+    """Build ``(operator ...)`` by appending and removing clauses.
+
+    A clause is anything an :class:`Expression` takes as a positional
+    argument: an expression, a ``{name: value}`` dict, a
+    :class:`FieldValue` or a value. Every clause is rendered once when it
+    is added, so rendering the builder only joins the cached strings.
+
+    .. code-block:: python
+
+      builder = QueryBuilder('and', boost=2)
+      builder.append({'genres': 'sf'})
+      builder.append(range_((1990, 2000), field='year'))
+      builder() #=> (and boost=2 genres:'sf' (range field=year [1990,2000]))
+      builder.freeze() #=> an Expression
+    """
+
+    def __init__(self, operator='and', clauses=(), **options):
+        self.operator = operator
+        self._options = tuple(options.items())
+        self._head = '({}{}'.format(operator, format_options(self._options))
+        self._fields = []
+        self._parts = []
+        self._query = None
+        self.extend(clauses)
+
+    @classmethod
+    def from_expression(cls, expression):
+        """Start from the operator, options and clauses of ``expression``.
+        """
+        self = cls(expression.operator)
+        self._options = expression._options
+        self._head = '({}{}'.format(self.operator,
+                                    format_options(self._options))
+        self.extend(expression.fields)
+        return self
+
+    def append(self, clause):
+        f = _field(clause)
+        self._fields.append(f)
+        self._parts.append(' ' + f())
+        self._query = None
+
+    def extend(self, clauses):
+        for clause in clauses:
+            self.append(clause)
+
+    def remove(self, clause):
+        """Remove the first clause equal to ``clause``.
+
+        Raises :class:`ValueError` when there is no such clause.
+        """
+        index = self._fields.index(_field(clause))
+        del self._fields[index]
+        del self._parts[index]
+        self._query = None
+
+    def clear(self):
+        del self._fields[:]
+        del self._parts[:]
+        self._query = None
+
+    @property
+    def fields(self):
+        return tuple(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, clause):
+        return _field(clause) in self._fields
+
+    def query(self):
+        if self._query is None:
+            self._query = self._head + (''.join(self._parts) or ' ') + ')'
+        return self._query
+
+    def __call__(self):
+        return self.query()
+
+    def __str__(self):
+        return self.query()
+
+    def __repr__(self):
+        query = '<{}: {}>'.format(self.__class__.__name__, self.query())
+        return query
+
+    def freeze(self):
+        """Return the :class:`Expression` of the current clauses.
+
+        The expression starts with the rendered string of the builder, so
+        rendering it again costs nothing.
+        """
+        return Expression.from_fields(self.operator, self._options,
+                                      self._fields, self.query())
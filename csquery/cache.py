@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.cache
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Canonical fingerprints of expressions and a search response cache.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from collections import OrderedDict, namedtuple
+import hashlib
+import threading
+import time
+
+from six.moves.urllib.parse import urlencode
+
+from csquery.structured import Expression, FieldValue, InExpression
+
+#: operators whose clauses can be reordered without changing the query.
+COMMUTATIVE_OPERATORS = frozenset(['and', 'or'])
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions',
+                                     'expirations', 'maxsize', 'currsize'])
+
+
+def _literal_digest(name, literal):
+    return hashlib.sha1('F{}\x00{}'.format(
+        name or '', literal).encode('utf-8')).digest()
+
+
+def _digests(expression):
+    """Return ``{id(node): (digest, sorted fields)}`` for the whole tree.
+
+    A node's digest covers its operator, its options sorted by name and
+    the digests of its fields, sorted for commutative operators. The tree
+    is walked without recursion and shared subtrees are hashed once.
+    """
+    results = {}
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in results:
+            continue
+        if not visited:
+            stack.append((node, True))
+            if not isinstance(node, InExpression):
+                stack.extend((f.expression, False) for f in node.fields
+                             if f.expression is not None)
+            continue
+
+        if isinstance(node, InExpression):
+            fields = [(_literal_digest(node.name, literal), None)
+                      for literal in node._literals]
+        else:
+            fields = []
+            for f in node.fields:
+                if f.expression is None:
+                    digest = _literal_digest(f.name, f._value)
+                else:
+                    digest = hashlib.sha1(
+                        'N{}\x00'.format(f.name or '').encode('utf-8') +
+                        results[id(f.expression)][0]).digest()
+                fields.append((digest, f))
+        if node.operator in COMMUTATIVE_OPERATORS:
+            fields.sort(key=lambda item: item[0])
+
+        h = hashlib.sha1('E{}\x00{}\x00'.format(
+            node.operator,
+            ' '.join('{}={}'.format(k, v) for k, v in sorted(node._options)),
+        ).encode('utf-8'))
+        for digest, _ in fields:
+            h.update(digest)
+        results[id(node)] = (h.digest(), fields)
+    return results
+
+
+def digest(expression):
+    """Return the 20 bytes of the :func:`fingerprint` of ``expression``."""
+    return _digests(expression)[id(expression)][0]
+
+
+def fingerprint(expression):
+    """Return a stable hex digest of ``expression``.
+
+    Expressions that differ only in the order of ``and``/``or`` clauses or
+    of options get the same fingerprint, in any process.
+    """
+    return digest(expression).hex()
+
+
+def canonicalize(expression):
+    """Return ``expression`` with its clauses in canonical order.
+
+    Clauses of ``and``/``or`` are sorted by their fingerprint and options
+    by name, so equivalent expressions render to the same string.
+    """
+    digests = _digests(expression)
+    results = {}
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in results:
+            continue
+        if not visited:
+            stack.append((node, True))
+            if not isinstance(node, InExpression):
+                stack.extend((f.expression, False) for f in node.fields
+                             if f.expression is not None)
+            continue
+
+        _, fields = digests[id(node)]
+        if isinstance(node, InExpression):
+            order = sorted(
+                range(len(node._literals)),
+                key=lambda i: _literal_digest(node.name, node._literals[i]))
+            results[id(node)] = InExpression._from_literals(
+                node.name, sorted(node._options),
+                [node._literals[i] for i in order],
+                [node.values[i] for i in order])
+            continue
+
+        results[id(node)] = Expression._make(
+            node.operator, sorted(node._options),
+            [f if f.expression is None else
+             FieldValue._make(f.name, results[id(f.expression)], None)
+             for _, f in fields])
+    return results[id(expression)]
+
+
+def cache_key(expression, params=None):
+    """Key of a search for ``expression`` with the other ``params``."""
+    key = fingerprint(expression)
+    if params:
+        key += '?' + urlencode(sorted(params.items()))
+    return key
+
+
+class CacheBackend(object):
+    """Interface of a cache shared between processes, e.g. memcached.
+
+    Values are the decoded responses, a backend serializes them as it
+    needs to.
+    """
+
+    def get(self, key):
+        """Return the value stored under ``key`` or ``None``."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+        raise NotImplementedError
+
+
+class ResponseCache(object):
+    """An in-process LRU cache of search responses with a TTL.
+
+    Responses are keyed by :func:`cache_key`, so equivalent expressions
+    share an entry. When a ``backend`` is given, local misses are looked
+    up there and new responses are stored in both. Cached responses are
+    shared, callers must not modify them.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, backend=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.clock = clock
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, expression, params=None):
+        """Return the cached response or ``None``."""
+        return self.get_key(cache_key(expression, params))
+
+    def set(self, expression, response, params=None):
+        self.set_key(cache_key(expression, params), response)
+
+    def get_key(self, key):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, now)
+        return value
+
+    def set_key(self, key, response):
+        with self._lock:
+            self._store(key, response, self.clock())
+        if self.backend is not None:
+            self.backend.set(key, response, self.ttl)
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_search(self, expression, search, **params):
+        """Return the cached response or ``search(q, **params)``."""
+        key = cache_key(expression, params)
+        response = self.get_key(key)
+        if response is None:
+            response = search(expression(), **params)
+            self.set_key(key, response)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions,
+                             self.expirations, self.maxsize,
+                             len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.cli
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Render query specs read as JSON lines into structured queries.
+
+    Specs are described in :mod:`csquery.specs`.
+
+    Usage::
+
+      $ python -m csquery [INPUT] [-o OUTPUT] [-j JOBS] [--chunk-size N]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+import time
+
+from csquery.specs import build, open_stream
+
+#: default number of records rendered by a worker at once.
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def render_lines(start, lines):
+    """Render the spec of each non blank line, ``start`` is the number of
+    the first line, used in error messages.
+    """
+    queries = []
+    for number, line in enumerate(lines, start):
+        if not line.strip():
+            continue
+        try:
+            queries.append(build(json.loads(line))())
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError('line {}: {}'.format(number, e))
+    return queries
+
+
+def _chunks(lines, size):
+    chunk, start = [], 1
+    for number, line in enumerate(lines, 1):
+        chunk.append(line)
+        if len(chunk) == size:
+            yield start, chunk
+            chunk, start = [], number + 1
+    if chunk:
+        yield start, chunk
+
+
+def render_stream(lines, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  window=None):
+    """Yield the rendered queries of ``lines`` in order.
+
+    Chunks of ``chunk_size`` lines are rendered by ``jobs`` processes,
+    in the current one if ``jobs`` is 1. At most ``window`` chunks,
+    ``2 * jobs`` by default, are read ahead, so memory stays bounded on
+    any input size.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    chunks = _chunks(lines, chunk_size)
+    if jobs == 1:
+        for start, chunk in chunks:
+            for query in render_lines(start, chunk):
+                yield query
+        return
+
+    window = window or 2 * jobs
+    with ProcessPoolExecutor(jobs) as executor:
+        pending = deque()
+        for start, chunk in chunks:
+            pending.append(executor.submit(render_lines, start, chunk))
+            if len(pending) >= window:
+                for query in pending.popleft().result():
+                    yield query
+        while pending:
+            for query in pending.popleft().result():
+                yield query
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m csquery',
+        description='Render JSON query specs into structured queries, '
+                    'one per line.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file of JSON specs, one per line '
+                             '(default: stdin)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='output file (default: stdout)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int,
+                        default=DEFAULT_CHUNK_SIZE,
+                        help='lines rendered by a worker at once')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not report throughput on stderr')
+    args = parser.parse_args(argv)
+
+    count = 0
+    started = time.time()
+    with open_stream(args.input, 'r') as src, \
+            open_stream(args.output, 'w') as dst:
+        try:
+            for query in render_stream(src, args.jobs, args.chunk_size):
+                dst.write(query)
+                dst.write('\n')
+                count += 1
+        except ValueError as e:
+            print('error: {}'.format(e), file=sys.stderr)
+            return 1
+
+    if not args.quiet:
+        seconds = time.time() - started
+        print('{} records in {:.2f} sec, {:.0f} records/sec'.format(
+            count, seconds, count / seconds if seconds else 0),
+            file=sys.stderr)
+    return 0
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.client
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    An asyncio client for the CloudSearch search API.
+
+    Requests are sent over keep-alive HTTP/1.1 connections taken from a
+    bounded pool, and structured queries are sent with
+    ``q.parser=structured``. Requests are not signed, use it with domains
+    whose access policy allows the caller.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import asyncio
+from collections import deque
+import json
+
+from six.moves.urllib.parse import urlsplit, urlencode
+
+API_VERSION = '2013-01-01'
+
+#: default number of connections kept by a client.
+DEFAULT_MAX_CONNECTIONS = 10
+
+#: default timeout of one request in seconds.
+DEFAULT_TIMEOUT = 10.0
+
+
+class SearchError(Exception):
+    """The search endpoint answered with a status other than 2xx."""
+
+    def __init__(self, status, body):
+        super(SearchError, self).__init__(
+            'search failed with status {}: {!r}'.format(status, body[:200]))
+        self.status = status
+        self.body = body
+
+
+class _Connection(object):
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def is_open(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool(object):
+    """At most ``max_connections`` connections to ``host:port``.
+
+    Idle connections are kept and reused, callers wait for a free one
+    when all of them are in use.
+    """
+
+    def __init__(self, host, port, ssl=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.max_connections = max_connections
+        self._idle = deque()
+        self._semaphore = None
+
+    async def acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        await self._semaphore.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                if connection.is_open():
+                    connection.reused = True
+                    return connection
+                connection.close()
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl)
+            return _Connection(reader, writer)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self, connection, reusable=True):
+        if reusable and connection.is_open():
+            self._idle.append(connection)
+        else:
+            connection.close()
+        self._semaphore.release()
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('connection closed by the server')
+    version, status = status_line.split(None, 2)[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get(b'transfer-encoding', b'').lower() == b'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        body = b''.join(chunks)
+    elif b'content-length' in headers:
+        body = await reader.readexactly(int(headers[b'content-length']))
+    else:
+        body = await reader.read()
+        headers[b'connection'] = b'close'
+
+    keep_alive = headers.get(b'connection', b'').lower() != b'close' \
+        and version != b'HTTP/1.0'
+    return int(status), body, keep_alive
+
+
+class AsyncSearchClient(object):
+    """Search a CloudSearch domain from asyncio code.
+
+    ``endpoint`` is the search endpoint of the domain, e.g.
+    ``https://search-movies-xxxx.us-east-1.cloudsearch.amazonaws.com``.
+    """
+
+    def __init__(self, endpoint, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 timeout=DEFAULT_TIMEOUT, api_version=API_VERSION):
+        url = urlsplit(endpoint)
+        https = url.scheme == 'https'
+        self.host = url.netloc.rpartition('@')[2]
+        self.timeout = timeout
+        self.path = '{}/{}/search'.format(url.path.rstrip('/'), api_version)
+        self.pool = ConnectionPool(
+            url.hostname, url.port or (443 if https else 80),
+            ssl=True if https else None, max_connections=max_connections)
+
+    async def search(self, query, timeout=None, **params):
+        """Search with ``query`` and return the decoded response.
+
+        ``query`` is an :class:`~csquery.structured.Expression` or a
+        rendered string. Other search parameters are given as keyword
+        arguments, use ``**{'q.options': ...}`` for dotted names.
+        """
+        params['q'] = query if isinstance(query, str) else query()
+        params.setdefault('q.parser', 'structured')
+        target = '{}?{}'.format(self.path, urlencode(sorted(params.items())))
+        timeout = self.timeout if timeout is None else timeout
+        return await asyncio.wait_for(self._get(target), timeout)
+
+    async def send(self, request, timeout=None):
+        """Send a :class:`~csquery.request.SearchRequest` and return the
+        decoded response.
+        """
+        target = '{}?{}'.format(self.path, request.query_string())
+        timeout = self.timeout if timeout is None else timeout
+        return await asyncio.wait_for(self._get(target), timeout)
+
+    async def _get(self, target):
+        request = (
+            'GET {} HTTP/1.1\r\n'
+            'Host: {}\r\n'
+            'Accept: application/json\r\n'
+            'Connection: keep-alive\r\n'
+            '\r\n'
+        ).format(target, self.host).encode('ascii')
+
+        while True:
+            connection = await self.pool.acquire()
+            reusable = False
+            try:
+                connection.writer.write(request)
+                await connection.writer.drain()
+                status, body, reusable = await _read_response(
+                    connection.reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # the server may close an idle keep-alive connection,
+                # retry on another one.
+                if not connection.reused:
+                    raise
+                continue
+            finally:
+                self.pool.release(connection, reusable)
+            break
+
+        if not 200 <= status < 300:
+            raise SearchError(status, body)
+        return json.loads(body.decode('utf-8'))
+
+    async def close(self):
+        self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
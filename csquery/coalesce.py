@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.coalesce
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Share one in-flight search between concurrent identical searches.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import asyncio
+from collections import namedtuple
+from concurrent.futures import Future
+import threading
+
+from csquery.cache import cache_key
+
+CoalesceInfo = namedtuple('CoalesceInfo',
+                          ['requests', 'executed', 'deduplicated',
+                           'in_flight'])
+
+
+class _BaseCoalescer(object):
+
+    def __init__(self):
+        self.requests = self.executed = self.deduplicated = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def info(self):
+        with self._lock:
+            return CoalesceInfo(self.requests, self.executed,
+                                self.deduplicated, len(self._in_flight))
+
+
+class Coalescer(_BaseCoalescer):
+    """Coalesce identical searches made from several threads.
+
+    Searches are identical when their expressions have the same
+    :func:`~csquery.cache.fingerprint` and the same parameters. The first
+    caller runs the search, the others wait for its response or its
+    exception. Responses are shared, callers must not modify them.
+    """
+
+    def search(self, expression, search, **params):
+        """Return ``search(q, **params)``, shared with identical callers."""
+        key = cache_key(expression, params)
+        with self._lock:
+            self.requests += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            return future.result()
+
+        try:
+            response = search(expression(), **params)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+
+class AsyncCoalescer(_BaseCoalescer):
+    """Coalesce identical searches made from asyncio tasks.
+
+    ``search`` is a coroutine function such as
+    :meth:`AsyncSearchClient.search <csquery.client.AsyncSearchClient.search>`.
+    The shared search runs in its own task, so cancelling one caller
+    does not cancel it for the others.
+    """
+
+    async def search(self, expression, search, **params):
+        """Return ``await search(q, **params)``, shared with identical
+        callers.
+        """
+        key = cache_key(expression, params)
+        with self._lock:
+            self.requests += 1
+            task = self._in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(search(expression(), **params))
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._done(key))
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key):
+        with self._lock:
+            del self._in_flight[key]
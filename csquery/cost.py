@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.cost
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Estimate the cost of an expression before it is sent, and reject or
+    downgrade the expensive ones.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from collections import namedtuple
+
+from csquery.structured import (
+    Expression, FieldValue, InExpression, format_options
+)
+
+Cost = namedtuple('Cost', ['nodes', 'depth', 'bytes', 'prefixes', 'near',
+                           'phrases', 'shortest_prefix', 'widest_or',
+                           'score'])
+
+#: weight of every counter of :class:`Cost` in its score.
+DEFAULT_WEIGHTS = {
+    'nodes': 1.0,
+    'depth': 2.0,
+    'bytes': 0.05,
+    'prefixes': 20.0,
+    'near': 30.0,
+    'phrases': 10.0,
+}
+
+
+def _text_length(literal):
+    if literal.startswith("'"):
+        return len(literal) - 2
+    return len(literal)
+
+
+def _size(text):
+    return len(text.encode('utf-8'))
+
+
+def cost(expression, weights=None):
+    """Return the :class:`Cost` of ``expression`` in one pass.
+
+    Counts the :class:`Expression` and :class:`FieldValue` nodes, the
+    depth, the rendered size in bytes, the ``prefix``, ``near`` and
+    ``phrase`` clauses, the length of the shortest prefix and the number
+    of clauses of the widest ``or``. ``score`` weighs the counters with
+    ``weights``, :data:`DEFAULT_WEIGHTS` by default. Shared subtrees are
+    counted every time they are rendered.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    nodes = depth = size = prefixes = near = phrases = widest = 0
+    shortest = None
+    stack = [(expression, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        head = _size(node.operator) + _size(format_options(node._options))
+        # '(' and ')', and ' )' for an empty node.
+        size += head + 2
+
+        if isinstance(node, InExpression):
+            count = len(node._literals)
+            nodes += 1 + count
+            prefix = _size(node.name) + 2
+            size += sum(prefix + _size(lit) for lit in node._literals) or 1
+            widest = max(widest, count)
+            continue
+
+        fields = node.fields
+        nodes += 1 + len(fields)
+        size += 0 if fields else 1
+        operator = node.operator
+        if operator == 'or':
+            widest = max(widest, len(fields))
+        elif operator == 'prefix':
+            prefixes += 1
+        elif operator == 'near':
+            near += 1
+        elif operator == 'phrase':
+            phrases += 1
+
+        for f in fields:
+            size += 1 + (_size(f.name) + 1 if f.name else 0)
+            if f.expression is not None:
+                stack.append((f.expression, level + 1))
+                continue
+            size += _size(f._value)
+            if operator == 'prefix':
+                length = _text_length(f._value)
+                shortest = length if shortest is None else \
+                    min(shortest, length)
+
+    counters = {'nodes': nodes, 'depth': depth, 'bytes': size,
+                'prefixes': prefixes, 'near': near, 'phrases': phrases}
+    score = sum(weights.get(name, 0) * value
+                for name, value in counters.items())
+    return Cost(nodes, depth, size, prefixes, near, phrases, shortest,
+                widest, score)
+
+
+def downgrade(expression, min_prefix_length=None):
+    """Return a cheaper form of ``expression``.
+
+    ``near`` becomes a ``phrase`` of the same words, and a ``prefix``
+    shorter than ``min_prefix_length`` becomes a ``term``, which matches
+    the whole word only. Other clauses are kept as they are.
+    """
+    results = {}
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in results:
+            continue
+        if isinstance(node, InExpression):
+            results[id(node)] = node
+            continue
+        if not visited:
+            stack.append((node, True))
+            stack.extend((f.expression, False) for f in node.fields
+                         if f.expression is not None)
+            continue
+
+        fields = []
+        changed = False
+        for f in node.fields:
+            child = results.get(id(f.expression))
+            if child is None or child is f.expression:
+                fields.append(f)
+            else:
+                fields.append(FieldValue._make(f.name, child, None))
+                changed = True
+
+        operator, options = node.operator, node._options
+        if operator == 'near':
+            operator = 'phrase'
+            options = [(k, v) for k, v in options if k != 'distance']
+        elif operator == 'prefix' and min_prefix_length is not None and \
+                any(f.expression is None and
+                    _text_length(f._value) < min_prefix_length
+                    for f in fields):
+            operator = 'term'
+
+        if changed or operator != node.operator:
+            results[id(node)] = Expression._make(operator, options, fields)
+        else:
+            results[id(node)] = node
+    return results[id(expression)]
+
+
+def _downgrade(expression, policy):
+    return downgrade(expression, policy.min_prefix_length)
+
+
+class QueryRejected(Exception):
+    """The query exceeds a limit of a :class:`Policy`."""
+
+    def __init__(self, reasons, cost):
+        super(QueryRejected, self).__init__(
+            'query rejected: {}'.format('; '.join(reasons)))
+        self.reasons = reasons
+        self.cost = cost
+
+
+class Policy(object):
+    """Limits on the :class:`Cost` of the queries that may be sent.
+
+    A limit of ``None`` is not checked. ``min_prefix_length`` is the
+    shortest prefix allowed. With ``action='downgrade'``, a query over
+    the limits is first rewritten by ``downgrade(expression, policy)``,
+    :func:`downgrade` by default, and only rejected when the rewritten
+    one is still over them.
+    """
+
+    LIMITS = [
+        ('max_nodes', 'nodes', 'nodes'),
+        ('max_depth', 'depth', 'depth'),
+        ('max_bytes', 'bytes', 'bytes'),
+        ('max_prefixes', 'prefixes', 'prefix clauses'),
+        ('max_near', 'near', 'near clauses'),
+        ('max_phrases', 'phrases', 'phrase clauses'),
+        ('max_or', 'widest_or', 'clauses in one or'),
+        ('max_score', 'score', 'score'),
+    ]
+
+    def __init__(self, max_nodes=None, max_depth=None, max_bytes=None,
+                 max_prefixes=None, max_near=None, max_phrases=None,
+                 max_or=None, max_score=None, min_prefix_length=None,
+                 weights=None, action='reject', downgrade=None):
+        if action not in ('reject', 'downgrade'):
+            raise ValueError('unknown action: {!r}'.format(action))
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.max_prefixes = max_prefixes
+        self.max_near = max_near
+        self.max_phrases = max_phrases
+        self.max_or = max_or
+        self.max_score = max_score
+        self.min_prefix_length = min_prefix_length
+        self.weights = weights
+        self.action = action
+        self.downgrade = downgrade or _downgrade
+
+    def violations(self, cost):
+        """Return the reasons why ``cost`` is over the limits."""
+        reasons = []
+        for limit, name, label in self.LIMITS:
+            maximum = getattr(self, limit)
+            value = getattr(cost, name)
+            if maximum is not None and value > maximum:
+                reasons.append('{} {} > {}'.format(value, label, maximum))
+        shortest = cost.shortest_prefix
+        if self.min_prefix_length is not None and shortest is not None \
+                and shortest < self.min_prefix_length:
+            reasons.append('prefix of {} characters < {}'.format(
+                shortest, self.min_prefix_length))
+        return reasons
+
+    def apply(self, expression):
+        """Return ``expression``, or its downgraded form, if it is allowed.
+
+        Raises :class:`QueryRejected` otherwise.
+        """
+        result = cost(expression, self.weights)
+        reasons = self.violations(result)
+        if not reasons:
+            return expression
+        if self.action == 'downgrade':
+            downgraded = self.downgrade(expression, self)
+            result = cost(downgraded, self.weights)
+            reasons = self.violations(result)
+            if not reasons:
+                return downgraded
+        raise QueryRejected(reasons, result)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.instrument
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Instruments that collect the build and render events of
+    :mod:`csquery.structured` into histograms or write them to a logger.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from collections import Counter
+from contextlib import contextmanager
+import logging
+import math
+import threading
+
+from csquery.structured import Instrument, set_instrument
+
+
+@contextmanager
+def instrumented(instrument):
+    """Send the events to ``instrument`` inside a ``with`` block."""
+    previous = set_instrument(instrument)
+    try:
+        yield instrument
+    finally:
+        set_instrument(previous)
+
+
+class Histogram(object):
+    """Counts of values in buckets that double in size.
+
+    Percentiles are estimated as the upper bound of their bucket, so they
+    are at most twice the exact value. Not thread-safe on its own.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self._buckets = Counter()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        # bucket e holds the values in [2 ** (e - 1), 2 ** e).
+        self._buckets[math.frexp(value)[1] if value > 0 else None] += 1
+
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = self._buckets[None]
+        if seen >= rank:
+            return min(0, self.max)
+        for exponent in sorted(e for e in self._buckets if e is not None):
+            seen += self._buckets[exponent]
+            if seen >= rank:
+                return min(math.ldexp(1, exponent), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class HistogramCollector(Instrument):
+    """Count the built nodes by operator and keep histograms of render
+    seconds, rendered bytes and tree depth. Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operators = Counter()
+        self.render_seconds = Histogram()
+        self.render_bytes = Histogram()
+        self.depth = Histogram()
+
+    def node_built(self, node):
+        with self._lock:
+            self.operators[node.operator] += 1
+
+    def rendered(self, node, seconds, size, depth):
+        with self._lock:
+            self.render_seconds.add(seconds)
+            self.render_bytes.add(size)
+            self.depth.add(depth)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'nodes_built': sum(self.operators.values()),
+                'operators': dict(self.operators),
+                'render_seconds': self.render_seconds.snapshot(),
+                'render_bytes': self.render_bytes.snapshot(),
+                'depth': self.depth.snapshot(),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.operators.clear()
+            self.render_seconds.reset()
+            self.render_bytes.reset()
+            self.depth.reset()
+
+
+class LoggingInstrument(Instrument):
+    """Log every render, and every built node with ``builds=True``, to
+    ``logger`` (``csquery`` by default) at ``level``.
+    """
+
+    def __init__(self, logger=None, level=logging.DEBUG, builds=False):
+        self.logger = logger or logging.getLogger('csquery')
+        self.level = level
+        self.builds = builds
+
+    def node_built(self, node):
+        if self.builds and self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, 'built %s node', node.operator)
+
+    def rendered(self, node, seconds, size, depth):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level,
+                            'rendered %d bytes, depth %d in %.3f ms',
+                            size, depth, seconds * 1e3)
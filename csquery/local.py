@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.local
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Evaluate structured queries against documents stored column-wise,
+    without going to CloudSearch. Requires NumPy.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from bisect import bisect_left
+import re
+
+import numpy
+import six
+
+from csquery.ranges import parse_range
+from csquery.structured import Expression, InExpression, parse
+
+_TOKEN_RE = re.compile(r'\w+', re.U)
+_ESCAPED_RE = re.compile(r'\\(.)', re.S)
+_BOOLEANS = {'true': True, 'false': False}
+
+#: operators with one literal matched against a field.
+LEAF_OPERATORS = frozenset(['term', 'phrase', 'prefix', 'range'])
+
+
+def tokenize(text):
+    """Split ``text`` into the lower case words of a text field."""
+    return _TOKEN_RE.findall(six.text_type(text).lower())
+
+
+def decode_literal(literal):
+    """Return the Python value of a rendered literal that is not a range.
+    """
+    if literal.startswith("'"):
+        return _ESCAPED_RE.sub(r'\1', literal[1:-1])
+    for kind in (int, float):
+        try:
+            return kind(literal)
+        except ValueError:
+            pass
+    return literal
+
+
+def _contains(words, tokens):
+    width = len(tokens)
+    return any(words[i:i + width] == tokens
+               for i in range(len(words) - width + 1))
+
+
+def _is_text(column):
+    return column.dtype.kind in 'USO'
+
+
+class LocalIndex(object):
+    """Documents as a dict of equally long columns, lists or NumPy arrays.
+
+    Columns named in ``text_fields`` are text fields, split by
+    :func:`tokenize` and searched through an inverted index. Other
+    columns are matched on their whole values, strings through their
+    sorted unique values and numbers and dates with vectorized
+    comparisons. Clauses without a field search ``default_fields``, all
+    text fields by default. Indexes are built on first use.
+
+    Only matching is evaluated, ``boost`` and other scoring options are
+    ignored. ``near`` is not supported.
+    """
+
+    def __init__(self, columns, text_fields=(), default_fields=None):
+        self.columns = {}
+        self.size = None
+        for name, column in columns.items():
+            column = numpy.asarray(column)
+            if column.ndim != 1:
+                raise ValueError('column {} is not one dimensional'.format(
+                    name))
+            if self.size is None:
+                self.size = len(column)
+            elif len(column) != self.size:
+                raise ValueError('column {} has {} values, expected {}'.format(
+                    name, len(column), self.size))
+            self.columns[name] = column
+        self.size = self.size or 0
+        self.text_fields = frozenset(text_fields)
+        unknown = self.text_fields - set(self.columns)
+        if unknown:
+            raise ValueError('unknown text fields: {}'.format(
+                ', '.join(sorted(unknown))))
+        if default_fields is None:
+            default_fields = sorted(self.text_fields)
+        self.default_fields = tuple(default_fields)
+        self._postings = {}
+        self._tokens = {}
+        self._uniques = {}
+
+    def __len__(self):
+        return self.size
+
+    def _column(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise ValueError('unknown field: {}'.format(name))
+
+    def _inverted(self, name):
+        """Return ``(postings, sorted tokens)`` of the text field ``name``.
+        """
+        if name not in self._postings:
+            postings = {}
+            for i, text in enumerate(self._column(name).tolist()):
+                for token in set(tokenize(text)):
+                    postings.setdefault(token, []).append(i)
+            self._postings[name] = {
+                token: numpy.array(ids, dtype=numpy.intp)
+                for token, ids in postings.items()}
+            self._tokens[name] = sorted(postings)
+        return self._postings[name], self._tokens[name]
+
+    def _unique(self, name):
+        """Return ``(sorted unique values, inverse)`` of the column."""
+        if name not in self._uniques:
+            self._uniques[name] = numpy.unique(self._column(name),
+                                               return_inverse=True)
+        return self._uniques[name]
+
+    def _from_ids(self, ids):
+        mask = numpy.zeros(self.size, dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def _coerce(self, column, value):
+        if column.dtype.kind == 'M':
+            return numpy.datetime64(six.text_type(value).rstrip('Z'))
+        if column.dtype.kind == 'b' and \
+                six.text_type(value).lower() in _BOOLEANS:
+            # rendered as True and False, or given as 'true' and 'false'.
+            return _BOOLEANS[six.text_type(value).lower()]
+        if column.dtype.kind in 'iufb' and \
+                isinstance(value, six.string_types):
+            return float(value)
+        return value
+
+    def _fields(self, field):
+        if field is not None:
+            return [field]
+        if not self.default_fields:
+            raise ValueError('clause without a field and no default fields')
+        return self.default_fields
+
+    def _postings_of(self, name, tokens):
+        """Ids of the documents that have all ``tokens`` in ``name``."""
+        postings, _ = self._inverted(name)
+        ids = None
+        for token in tokens:
+            found = postings.get(token)
+            if found is None:
+                return numpy.array([], dtype=numpy.intp)
+            ids = found if ids is None else numpy.intersect1d(
+                ids, found, assume_unique=True)
+        return ids
+
+    def _equal(self, name, value):
+        column = self._column(name)
+        if not _is_text(column):
+            return column == self._coerce(column, value)
+        values, inverse = self._unique(name)
+        value = six.text_type(value)
+        i = numpy.searchsorted(values, value)
+        if i == len(values) or values[i] != value:
+            return numpy.zeros(self.size, dtype=bool)
+        return inverse == i
+
+    def _term(self, name, value):
+        if name not in self.text_fields:
+            return self._equal(name, value)
+        tokens = tokenize(value)
+        if not tokens:
+            return numpy.zeros(self.size, dtype=bool)
+        return self._from_ids(self._postings_of(name, tokens))
+
+    def _phrase(self, name, value):
+        if name not in self.text_fields:
+            return self._equal(name, value)
+        tokens = tokenize(value)
+        if len(tokens) < 2:
+            return self._term(name, value)
+        # candidates have all the words, check their positions.
+        column = self._column(name)
+        ids = [i for i in self._postings_of(name, tokens).tolist()
+               if _contains(tokenize(column[i]), tokens)]
+        return self._from_ids(numpy.array(ids, dtype=numpy.intp))
+
+    def _prefix(self, name, value):
+        value = six.text_type(value)
+        if name in self.text_fields:
+            postings, tokens = self._inverted(name)
+            value = value.lower()
+            start = bisect_left(tokens, value)
+            mask = numpy.zeros(self.size, dtype=bool)
+            for i in range(start, len(tokens)):
+                if not tokens[i].startswith(value):
+                    break
+                mask[postings[tokens[i]]] = True
+            return mask
+        column = self._column(name)
+        if not _is_text(column):
+            raise ValueError('prefix on the non text field {}'.format(name))
+        values, inverse = self._unique(name)
+        start = numpy.searchsorted(values, value, 'left')
+        # U+10FFFF sorts after any character that may follow the prefix.
+        end = numpy.searchsorted(values, value + '\U0010ffff', 'left')
+        return (inverse >= start) & (inverse < end)
+
+    def _range(self, name, bounds):
+        lower, lower_closed, upper, upper_closed = bounds
+        column = self._column(name)
+        if _is_text(column):
+            values, inverse = self._unique(name)
+            start, end = 0, len(values)
+            if lower is not None:
+                start = numpy.searchsorted(
+                    values, six.text_type(decode_literal(lower)),
+                    'left' if lower_closed else 'right')
+            if upper is not None:
+                end = numpy.searchsorted(
+                    values, six.text_type(decode_literal(upper)),
+                    'right' if upper_closed else 'left')
+            return (inverse >= start) & (inverse < end)
+
+        mask = numpy.ones(self.size, dtype=bool)
+        if lower is not None:
+            bound = self._coerce(column, decode_literal(lower))
+            mask &= column >= bound if lower_closed else column > bound
+        if upper is not None:
+            bound = self._coerce(column, decode_literal(upper))
+            mask &= column <= bound if upper_closed else column < bound
+        return mask
+
+    def _literal(self, operator, field, literal):
+        """Match one literal on ``field``, or the default fields."""
+        bounds = parse_range(literal)
+        mask = None
+        for name in self._fields(field):
+            if bounds is not None:
+                found = self._range(name, bounds)
+            elif operator == 'range':
+                raise ValueError('invalid range: {}'.format(literal))
+            else:
+                found = getattr(self, '_' + operator)(
+                    name, decode_literal(literal))
+            mask = found if mask is None else mask | found
+        return mask
+
+    def _in(self, node):
+        column = self._column(node.name)
+        if node.name in self.text_fields:
+            mask = numpy.zeros(self.size, dtype=bool)
+            for literal in node._literals:
+                mask |= self._term(node.name, decode_literal(literal))
+            return mask
+        values = [self._coerce(column, decode_literal(literal))
+                  for literal in node._literals]
+        if _is_text(column):
+            values = [six.text_type(v) for v in values]
+        return numpy.isin(column, values)
+
+    def _evaluate(self, node, results):
+        if isinstance(node, InExpression):
+            return self._in(node)
+
+        operator = node.operator
+        field = dict(node._options).get('field')
+        masks = []
+        for f in node.fields:
+            if f.expression is not None:
+                masks.append(results[id(f.expression)])
+            elif operator in LEAF_OPERATORS:
+                masks.append(self._literal(operator, field, f._value))
+            else:
+                # e.g. (not field=genres 'horror')
+                masks.append(self._literal(
+                    'term', field if f.name is None else f.name, f._value))
+
+        if operator in LEAF_OPERATORS:
+            if len(masks) != 1:
+                raise ValueError('{} takes one value'.format(operator))
+            return masks[0]
+        if operator == 'or':
+            return numpy.logical_or.reduce(masks) if masks else \
+                numpy.zeros(self.size, dtype=bool)
+        if operator in ('and', 'not'):
+            mask = numpy.logical_and.reduce(masks) if masks else \
+                numpy.ones(self.size, dtype=bool)
+            return ~mask if operator == 'not' else mask
+        raise ValueError('unsupported operator: {}'.format(operator))
+
+    def match(self, expression):
+        """Return a boolean array, true for the matched documents.
+
+        ``expression`` is an :class:`~csquery.structured.Expression` or a
+        structured query string. Every node is evaluated once with
+        vectorized operations on whole columns.
+        """
+        if not isinstance(expression, Expression):
+            expression = parse(expression)
+        results = {}
+        stack = [(expression, False)]
+        while stack:
+            node, visited = stack.pop()
+            if id(node) in results:
+                continue
+            if not visited:
+                stack.append((node, True))
+                if not isinstance(node, InExpression):
+                    stack.extend((f.expression, False) for f in node.fields
+                                 if f.expression is not None)
+                continue
+            results[id(node)] = self._evaluate(node, results)
+        return results[id(expression)]
+
+    def search(self, expression):
+        """Return the positions of the matched documents."""
+        return numpy.flatnonzero(self.match(expression))
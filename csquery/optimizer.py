@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.optimizer
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Rewrite expression trees into smaller equivalent ones.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from collections import namedtuple
+import re
+
+from csquery.ranges import parse_range
+from csquery.structured import Expression, FieldValue
+
+OptimizeResult = namedtuple('OptimizeResult',
+                            ['expression', 'nodes_removed', 'bytes_removed'])
+
+_DATE_RE = re.compile(r'(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?Z$')
+_LOOKS_LIKE_DATE_RE = re.compile(r'\d{4}-\d\d-\d\dT')
+
+
+def count_nodes(expression):
+    """Count the :class:`Expression` and :class:`FieldValue` nodes."""
+    count = 0
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        count += 1 + len(node.fields)
+        stack.extend(f.expression for f in node.fields
+                     if f.expression is not None)
+    return count
+
+
+def _bound_key(bound):
+    """Return a sort key of ``bound`` or ``None`` if it can not be ordered.
+
+    Dates are ordered by their time, whatever the number of digits of
+    their fraction of seconds.
+    """
+    if bound.startswith("'"):
+        value = bound[1:-1]
+        match = _DATE_RE.match(value)
+        if match is not None:
+            # without trailing zeros, fractions compare as strings.
+            return (2, match.group(1), (match.group(2) or '').rstrip('0'))
+        if _LOOKS_LIKE_DATE_RE.match(value):
+            # e.g. a date with an offset, not compared to one in UTC.
+            return None
+        return (1, value)
+    try:
+        return (0, float(bound))
+    except ValueError:
+        return (1, bound)
+
+
+def _intersect(ranges):
+    """Intersect parsed ranges, ``None`` if they can not be compared."""
+    lower, lower_closed, upper, upper_closed = ranges[0]
+    kinds = set()
+    for bound_lower, bound_lower_closed, bound_upper, bound_upper_closed \
+            in ranges:
+        for bound in (bound_lower, bound_upper):
+            if bound is not None:
+                key = _bound_key(bound)
+                if key is None:
+                    return None
+                kinds.add(key[0])
+        if len(kinds) > 1:
+            return None
+
+        if bound_lower is not None:
+            if lower is None or _bound_key(bound_lower) > _bound_key(lower):
+                lower, lower_closed = bound_lower, bound_lower_closed
+            elif _bound_key(bound_lower) == _bound_key(lower):
+                lower_closed = lower_closed and bound_lower_closed
+        if bound_upper is not None:
+            if upper is None or _bound_key(bound_upper) < _bound_key(upper):
+                upper, upper_closed = bound_upper, bound_upper_closed
+            elif _bound_key(bound_upper) == _bound_key(upper):
+                upper_closed = upper_closed and bound_upper_closed
+
+    if lower is not None and upper is not None:
+        if _bound_key(lower) > _bound_key(upper) or (
+                _bound_key(lower) == _bound_key(upper)
+                and not (lower_closed and upper_closed)):
+            # an empty range is left as it is written.
+            return None
+    return '{}{},{}{}'.format(
+        '[' if lower is not None and lower_closed else '{',
+        lower or '',
+        upper or '',
+        ']' if upper is not None and upper_closed else '}',
+    )
+
+
+def _range_field(f):
+    """Return ``(field name, range literal)`` of a range clause or ``None``.
+    """
+    if f.expression is None:
+        if f.name is None:
+            return None
+        return f.name, f._value
+    if f.name is not None:
+        return None
+    node = f.expression
+    if node.operator != 'range' or len(node._options) != 1 \
+            or node._options[0][0] != 'field' or len(node.fields) != 1:
+        return None
+    child = node.fields[0]
+    if child.name is not None or child.expression is not None:
+        return None
+    return node._options[0][1], child._value
+
+
+def _merge_ranges(fields):
+    groups = {}
+    for i, f in enumerate(fields):
+        found = _range_field(f)
+        if found is None:
+            continue
+        name, literal = found
+        parsed = parse_range(literal)
+        if parsed is not None:
+            groups.setdefault((f.expression is None, name), []).append(
+                (i, parsed))
+
+    replaced = {}
+    for (is_field, name), members in groups.items():
+        if len(members) < 2:
+            continue
+        literal = _intersect([parsed for _, parsed in members])
+        if literal is None:
+            continue
+        first = members[0][0]
+        if is_field:
+            replaced[first] = FieldValue._make(name, None, literal)
+        else:
+            node = Expression._make(
+                'range', fields[first].expression._options,
+                [FieldValue._make(None, None, literal)])
+            replaced[first] = FieldValue._make(None, node, None)
+        for i, _ in members[1:]:
+            replaced[i] = None
+
+    if not replaced:
+        return fields
+    return [replaced.get(i, f) for i, f in enumerate(fields)
+            if replaced.get(i, f) is not None]
+
+
+def _rewrite(node, results):
+    """Rebuild ``node`` from the already optimized children."""
+    fields = []
+    changed = False
+    for f in node.fields:
+        result = results.get(id(f.expression)) \
+            if f.expression is not None else None
+        if result is None or result is f.expression:
+            fields.append(f)
+        elif f.name is None and isinstance(result, FieldValue):
+            fields.append(result)
+            changed = True
+        elif isinstance(result, Expression):
+            fields.append(FieldValue._make(f.name, result, None))
+            changed = True
+        else:
+            fields.append(f)
+
+    operator = node.operator
+    if operator in ('and', 'or'):
+        flat = []
+        for f in fields:
+            child = f.expression
+            if f.name is None and child is not None \
+                    and child.operator == operator and not child._options:
+                flat.extend(child.fields)
+                changed = True
+            else:
+                flat.append(f)
+
+        fields = []
+        seen = set()
+        for f in flat:
+            if f in seen:
+                changed = True
+                continue
+            seen.add(f)
+            fields.append(f)
+
+        if operator == 'and':
+            merged = _merge_ranges(fields)
+            changed = changed or merged is not fields
+            fields = merged
+
+    if not changed:
+        return node
+    return Expression._make(operator, node._options, fields)
+
+
+def _collapse(node):
+    """Return the node or field value that ``node`` can be replaced with.
+    """
+    if node._options or len(node.fields) != 1:
+        return node
+    child = node.fields[0]
+    if node.operator in ('and', 'or'):
+        return child if child.expression is None or child.name is not None \
+            else child.expression
+    if node.operator == 'not' and child.name is None \
+            and child.expression is not None:
+        inner = child.expression
+        if inner.operator == 'not' and not inner._options \
+                and len(inner.fields) == 1:
+            grandchild = inner.fields[0]
+            if grandchild.name is None and grandchild.expression is not None:
+                return grandchild.expression
+            return grandchild
+    return node
+
+
+def optimize(expression):
+    """Flatten, deduplicate and merge clauses of ``expression``.
+
+    - nested ``and``/``or`` without options are merged into their parent,
+      and ones with a single clause are replaced by that clause.
+    - duplicate clauses of ``and``/``or`` are removed.
+    - ``(not (not X))`` without options is replaced by ``X``.
+    - ranges on the same field in one ``and`` are intersected.
+
+    The tree is walked without recursion and every shared subtree is
+    rewritten once. Returns an :class:`OptimizeResult` with the new tree
+    and the number of nodes and rendered bytes that were removed.
+    """
+    results = {}
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in results:
+            continue
+        if not visited:
+            stack.append((node, True))
+            stack.extend((f.expression, False) for f in node.fields
+                         if f.expression is not None)
+            continue
+        rewritten = _rewrite(node, results)
+        if node is expression:
+            results[id(node)] = rewritten
+        else:
+            results[id(node)] = _collapse(rewritten)
+
+    optimized = results[id(expression)]
+    collapsed = _collapse(optimized)
+    if isinstance(collapsed, Expression):
+        optimized = collapsed
+
+    return OptimizeResult(
+        optimized,
+        count_nodes(expression) - count_nodes(optimized),
+        len(expression().encode('utf-8')) - len(optimized().encode('utf-8')),
+    )
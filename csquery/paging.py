@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.paging
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Go through every hit of a query with cursor paging, fetching the next
+    page while the current one is consumed.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import asyncio
+import threading
+import weakref
+
+from six.moves import queue
+
+#: default number of hits of one page.
+DEFAULT_PAGE_SIZE = 1000
+
+_END = object()
+
+
+class _Failure(object):
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _next_cursor(response, fetched):
+    """Return the cursor of the page after ``response`` or ``None``."""
+    hits = response['hits']
+    if not hits.get('hit') or fetched >= hits.get('found', fetched + 1):
+        return None
+    return hits.get('cursor')
+
+
+class _Fetcher(object):
+    """Fetch the pages in a background thread.
+
+    Kept apart from :class:`HitStream` so the thread does not hold the
+    stream, which closes it once dropped.
+    """
+
+    def __init__(self, query, search, size, prefetch, params):
+        self.query = query
+        self.search = search
+        self.size = size
+        self.params = params
+        self.found = None
+        self.pages = queue.Queue(maxsize=max(1, prefetch))
+        self.closed = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._fetch)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _fetch(self):
+        cursor, fetched = 'initial', 0
+        try:
+            while cursor is not None and not self.closed.is_set():
+                response = self.search(self.query, cursor=cursor,
+                                       size=self.size, **self.params)
+                page = response['hits'].get('hit', [])
+                if self.found is None:
+                    self.found = response['hits'].get('found')
+                fetched += len(page)
+                cursor = _next_cursor(response, fetched)
+                if page:
+                    self._put(page)
+        except Exception as e:
+            self._put(_Failure(e))
+        self._put(_END)
+
+    def _put(self, item):
+        while not self.closed.is_set():
+            try:
+                self.pages.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+
+class HitStream(object):
+    """Iterate over the hits of ``expression``, page by page.
+
+    ``search(q, **params)`` is called with ``cursor`` and ``size`` in a
+    background thread, which keeps at most ``prefetch`` pages ahead of
+    the caller, so memory stays bounded on any number of hits. Errors of
+    ``search`` are raised by the iteration. :meth:`close`, leaving a
+    ``with`` block or dropping the stream stops fetching early.
+    """
+
+    def __init__(self, expression, search, size=DEFAULT_PAGE_SIZE,
+                 prefetch=1, **params):
+        self.query = expression if isinstance(expression, str) else \
+            expression()
+        self.search = search
+        self.size = size
+        self.params = params
+        self._fetcher = _Fetcher(self.query, search, size, prefetch, params)
+        weakref.finalize(self, self._fetcher.closed.set)
+        self._page = []
+        self._index = 0
+
+    @property
+    def found(self):
+        """Number of documents matched, known after the first page."""
+        return self._fetcher.found
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        fetcher = self._fetcher
+        if fetcher.closed.is_set():
+            raise StopIteration
+        while self._index >= len(self._page):
+            if fetcher.thread is None:
+                fetcher.start()
+            item = fetcher.pages.get()
+            if item is _END:
+                fetcher.closed.set()
+                raise StopIteration
+            if isinstance(item, _Failure):
+                fetcher.closed.set()
+                raise item.error
+            self._page, self._index = item, 0
+        self._index += 1
+        return self._page[self._index - 1]
+
+    def close(self):
+        """Stop fetching and wait for the background thread."""
+        self._fetcher.closed.set()
+        if self._fetcher.thread is not None:
+            self._fetcher.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_hits(expression, search, size=DEFAULT_PAGE_SIZE, prefetch=1,
+              **params):
+    """Return a :class:`HitStream` of the hits of ``expression``."""
+    return HitStream(expression, search, size, prefetch, **params)
+
+
+async def aiter_hits(expression, search, size=DEFAULT_PAGE_SIZE, prefetch=1,
+                     **params):
+    """Yield the hits of ``expression`` from asyncio code.
+
+    ``search`` is a coroutine function such as
+    :meth:`AsyncSearchClient.search <csquery.client.AsyncSearchClient.search>`.
+    The next pages are fetched by a task, at most ``prefetch`` ahead.
+    Closing the generator, e.g. with ``break`` in ``async for``, cancels
+    it.
+    """
+    query = expression if isinstance(expression, str) else expression()
+    pages = asyncio.Queue(maxsize=max(1, prefetch))
+
+    async def fetch():
+        cursor, fetched = 'initial', 0
+        try:
+            while cursor is not None:
+                response = await search(query, cursor=cursor, size=size,
+                                        **params)
+                page = response['hits'].get('hit', [])
+                fetched += len(page)
+                cursor = _next_cursor(response, fetched)
+                if page:
+                    await pages.put(page)
+        except asyncio.CancelledError:
+            # an Exception before Python 3.8.
+            raise
+        except Exception as e:
+            await pages.put(_Failure(e))
+        await pages.put(_END)
+
+    task = asyncio.ensure_future(fetch())
+    try:
+        while True:
+            item = await pages.get()
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            for hit in item:
+                yield hit
+    finally:
+        task.cancel()
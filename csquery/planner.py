@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.planner
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Move clauses that need no scoring from ``q`` into the filter query
+    ``fq``, which CloudSearch caches and evaluates without scoring.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from collections import namedtuple
+
+from csquery.structured import Expression
+
+#: operators of the clauses that can be used as filters.
+FILTER_OPERATORS = frozenset(['term', 'range', 'prefix'])
+
+#: query that matches every document, used when no clause is left in q.
+MATCH_ALL = 'matchall'
+
+Plan = namedtuple('Plan', ['q', 'fq'])
+
+
+def is_filter(f):
+    """Return whether the clause ``f`` of an ``and`` is a pure filter.
+
+    Filters are ``field:value`` clauses and ``term``, ``range`` or
+    ``prefix`` without other options than ``field``.
+    """
+    if f.expression is None:
+        return f.name is not None
+    if f.name is not None:
+        return False
+    node = f.expression
+    return node.operator in FILTER_OPERATORS and \
+        all(name == 'field' for name, _ in node._options)
+
+
+def _render(operator, options, fields):
+    if not options and len(fields) == 1 and fields[0].name is None and \
+            fields[0].expression is not None:
+        return fields[0].expression()
+    return Expression._make(operator, options, fields)()
+
+
+def plan(expression):
+    """Split a top-level ``and`` into a :class:`Plan` of rendered strings.
+
+    Filter clauses (see :func:`is_filter`) go to ``fq`` and the others
+    stay in ``q``, which becomes ``matchall`` when none is left. The
+    documents matched by ``q`` and ``fq`` together are the ones matched
+    by ``expression``. ``fq`` is ``None`` when there is nothing to move.
+    """
+    if expression.operator != 'and':
+        return Plan(expression(), None)
+
+    scoring, filters = [], []
+    for f in expression.fields:
+        (filters if is_filter(f) else scoring).append(f)
+    if not filters:
+        return Plan(expression(), None)
+
+    if scoring:
+        q = _render(expression.operator, expression._options, scoring)
+    else:
+        q = MATCH_ALL
+    return Plan(q, _render('and', (), filters))
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.ranges
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Build many range literals at once from arrays of bounds, e.g. time
+    buckets or price bands. NumPy arrays are formatted without a loop over
+    their values, Python sequences work without NumPy.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import datetime
+import re
+
+from csquery.structured import (
+    EMPTY_OPTIONS, Expression, FieldValue, format_value
+)
+
+#: values of ``closed``, with the brackets of the lower and upper bounds.
+BRACKETS = {
+    'both': ('[', ']'),
+    'left': ('[', '}'),
+    'right': ('{', ']'),
+    'neither': ('{', '}'),
+}
+
+
+_BOUND = r"\s*('(?:[^'\\]|\\.)*'|[^,'\[\]{}]*?)\s*"
+_RANGE_RE = re.compile(r'([\[{])' + _BOUND + ',' + _BOUND + r'([\]}])$')
+
+
+def parse_range(literal):
+    """Parse a range literal into ``[lower, lower closed, upper, upper
+    closed]``, with ``None`` for an open bound, or return ``None``.
+
+    Bounds are kept as written, strings with their quotes.
+
+    .. code-block:: python
+
+      parse_range("{,'2000-01-01T00:00:00Z']")
+      #=> [None, False, "'2000-01-01T00:00:00Z'", True]
+    """
+    match = _RANGE_RE.match(literal)
+    if match is None:
+        return None
+    opening, lower, upper, closing = match.groups()
+    return [lower or None, opening == '[',
+            upper or None, closing == ']']
+
+
+def _is_open(value):
+    # None, '' and NaN.
+    return value is None or value == '' or value != value
+
+
+def _format_array(values):
+    import numpy
+
+    kind = values.dtype.kind
+    if kind == 'M':
+        values = values.astype('datetime64[ms]')
+        missing = numpy.isnat(values)
+        whole = not (values.view('i8')[~missing] % 1000).any()
+        texts = numpy.datetime_as_string(
+            values, unit='s' if whole else 'ms', timezone='UTC').tolist()
+        if not missing.any():
+            return ("'" + "'\x00'".join(texts) + "'").split('\x00')
+        return ['' if m else "'" + t + "'"
+                for t, m in zip(texts, missing.tolist())]
+    texts = values.astype('U').tolist()
+    if kind == 'f':
+        return ['' if m else t
+                for t, m in zip(texts, numpy.isnan(values).tolist())]
+    return texts
+
+
+def format_bounds(values):
+    """Format the bounds of many ranges, ``''`` for the open ones.
+
+    ``values`` is a NumPy array of numbers or ``datetime64``, or a
+    sequence of numbers, strings, ``datetime`` and ``date``. ``None``,
+    ``''``, ``NaN`` and ``NaT`` are open bounds. Dates are quoted UTC
+    ISO-8601 strings, see :func:`~csquery.structured.format_date`; the
+    ``datetime64`` of an array all get milliseconds when one has some.
+    """
+    if getattr(values, 'dtype', None) is not None and \
+            values.dtype.kind in 'iufM':
+        return _format_array(values)
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    return ['' if _is_open(v) else format_value(v) for v in values]
+
+
+def format_ranges(lower, upper=None, closed='both'):
+    """Return the range literals from the ``lower`` and ``upper`` bounds.
+
+    ``closed`` is ``'both'``, ``'left'``, ``'right'`` or ``'neither'``,
+    the ends that include their bound. An open bound always gets an
+    exclusive bracket. ``lower`` or ``upper`` may be ``None`` for ranges
+    that are all open on that side.
+
+    .. code-block:: python
+
+      format_ranges([0, 100, None], [100, 200, 50], closed='left')
+      #=> ['[0,100}', '[100,200}', '{,50}']
+    """
+    opening, closing = BRACKETS[closed]
+    if lower is None and upper is None:
+        raise ValueError('lower or upper is required')
+    lower = None if lower is None else format_bounds(lower)
+    upper = None if upper is None else format_bounds(upper)
+    if lower is None:
+        lower = [''] * len(upper)
+    if upper is None:
+        upper = [''] * len(lower)
+    if len(lower) != len(upper):
+        raise ValueError('{} lower and {} upper bounds'.format(
+            len(lower), len(upper)))
+    if all(lower) and all(upper):
+        # every bound is given, join them all in one pass.
+        between = closing + '\x00' + opening
+        literals = (opening + between.join(map(','.join, zip(lower, upper)))
+                    + closing).split('\x00')
+        if len(literals) == len(lower):
+            return literals
+    return [(opening + low if low else '{') + ',' +
+            (high + closing if high else '}')
+            for low, high in zip(lower, upper)]
+
+
+def ranges(lower, upper=None, closed='both', **options):
+    """Return ``range`` expressions of the bounds, see
+    :func:`format_ranges`. ``options`` are ``field`` and ``boost``.
+    """
+    unexpected = set(options).difference(('field', 'boost'))
+    if unexpected:
+        raise TypeError(
+            'ranges() got an unexpected keyword argument {!r}'.format(
+                sorted(unexpected)[0]))
+    options = tuple((key, options[key]) for key in ('field', 'boost')
+                    if key in options) or EMPTY_OPTIONS
+    return [Expression._make('range', options,
+                             [FieldValue._make(None, None, literal)])
+            for literal in format_ranges(lower, upper, closed)]
+
+
+def range_fields(name, lower, upper=None, closed='both'):
+    """Return ``name:RANGE`` clauses of the bounds, to be given to
+    ``and_`` or ``or_``.
+
+    .. code-block:: python
+
+      or_(*range_fields('price', [0, 10], [10, 50], closed='left'))
+      #=> (or price:[0,10} price:[10,50})
+    """
+    return [FieldValue._make(name, None, literal)
+            for literal in format_ranges(lower, upper, closed)]
+
+
+def _datetime64(value):
+    import numpy
+
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return numpy.datetime64(value, 'ms')
+
+
+def time_buckets(start, stop, step):
+    """Return the ``(lower, upper)`` ``datetime64`` arrays of the buckets
+    of ``step`` from ``start`` to ``stop``. Requires NumPy.
+
+    The last bucket ends at ``stop``. Give them to :func:`ranges` with
+    ``closed='left'`` for buckets that do not overlap.
+
+    .. code-block:: python
+
+      lower, upper = time_buckets(datetime(2020, 1, 1), datetime(2020, 2, 1),
+                                  timedelta(days=1))
+      ranges(lower, upper, closed='left', field='date')
+    """
+    import numpy
+
+    start, stop = _datetime64(start), _datetime64(stop)
+    step = numpy.timedelta64(step).astype('timedelta64[ms]')
+    lower = numpy.arange(start, stop, step)
+    upper = numpy.minimum(lower + step, stop)
+    return lower, upper
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.request
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A whole search request: the query with its filter, projection,
+    sorting and paging parameters, URL-encoded once.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import json
+
+import six
+from six.moves.urllib.parse import urlencode
+
+#: number of hits CloudSearch returns when ``size`` is not given.
+DEFAULT_SIZE = 10
+
+
+def _render(query):
+    if query is None or isinstance(query, six.string_types):
+        return query
+    return query()
+
+
+def _join(value, format_item):
+    if value is None or isinstance(value, six.string_types):
+        return value
+    return ','.join(format_item(v) for v in value)
+
+
+def _sort_item(item):
+    if isinstance(item, six.string_types):
+        return item
+    return '{} {}'.format(*item)
+
+
+def _field_size(name, value):
+    # '"name":value,' in the fields of a hit.
+    return len(json.dumps({name: value}, separators=(',', ':'))) - 1
+
+
+class SearchRequest(object):
+    """Parameters of one structured search.
+
+    ``q`` and ``fq`` are expressions or rendered strings. ``return_`` is
+    a list of field names, ``sort`` a list of ``'field desc'`` strings or
+    ``(field, 'desc')`` pairs, and ``options`` the ``q.options`` as a
+    dict or a JSON string. Other parameters are given as keyword
+    arguments, use ``**{'facet.year': ...}`` for dotted names.
+
+    Everything but the paging parameters is encoded when the request is
+    made. :meth:`page` returns a request of another page that reuses it.
+
+    .. code-block:: python
+
+      request = SearchRequest(and_(title='star'), fq=and_(genres='sf'),
+                              return_=['title', 'year'],
+                              sort=[('year', 'desc')], size=20)
+      request.query_string()
+      #=> fq=%28and+genres%3A%27sf%27%29&q=%28and+title%3A%27star%27%29&...
+      request.page(start=20).query_string()  # only the paging is encoded
+    """
+
+    def __init__(self, q, fq=None, return_=None, sort=None, size=None,
+                 start=None, cursor=None, options=None, **params):
+        if options is not None and \
+                not isinstance(options, six.string_types):
+            options = json.dumps(options, separators=(',', ':'),
+                                 sort_keys=True)
+        parts = [('q', _render(q)), ('fq', _render(fq)),
+                 ('return', _join(return_, six.text_type)),
+                 ('sort', _join(sort, _sort_item)), ('q.options', options)]
+        params.update((k, v) for k, v in parts if v is not None)
+        params.setdefault('q.parser', 'structured')
+        self.params = dict((k, v) for k, v in params.items()
+                           if v is not None)
+        self._encoded = urlencode(sorted(self.params.items()))
+        self.size = size
+        self.start = start
+        self.cursor = cursor
+
+    @property
+    def fields(self):
+        """Field names of the projection, ``None`` for the default."""
+        value = self.params.get('return')
+        return None if value is None else value.split(',')
+
+    def page(self, start=None, size=None, cursor=None):
+        """Return the same request for another page.
+
+        ``size`` is kept when not given.
+        """
+        other = self.__class__.__new__(self.__class__)
+        other.params = self.params
+        other._encoded = self._encoded
+        other.size = self.size if size is None else size
+        other.start = start
+        other.cursor = cursor
+        return other
+
+    def _paging(self):
+        return [(k, v) for k, v in (('cursor', self.cursor),
+                                    ('size', self.size),
+                                    ('start', self.start))
+                if v is not None]
+
+    def to_params(self):
+        """Return the parameters, paging included, as a dict."""
+        params = dict(self.params)
+        params.update(self._paging())
+        return params
+
+    def query_string(self):
+        paging = self._paging()
+        if not paging:
+            return self._encoded
+        return self._encoded + '&' + urlencode(paging)
+
+    def __str__(self):
+        return self.query_string()
+
+    def __repr__(self):
+        query = '<{}: {}>'.format(self.__class__.__name__,
+                                  self.query_string())
+        return query
+
+    def projection_savings(self, sample):
+        """Estimate the bytes of a response page saved by the projection.
+
+        ``sample`` is the ``fields`` of a hit fetched with every field,
+        e.g. ``return=_all_fields``. The fields left out of ``return``
+        are counted once per hit of the page, ``size`` hits or 10 by
+        default.
+        """
+        fields = self.fields
+        if fields is None or '_all_fields' in fields:
+            return 0
+        kept = set(fields)
+        per_hit = sum(_field_size(name, value)
+                      for name, value in sample.items() if name not in kept)
+        return per_hit * (DEFAULT_SIZE if self.size is None else self.size)
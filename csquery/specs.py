@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.specs
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Build expressions from query specs, the JSON form of a builder call::
+
+      {"op": "and", "args": [{"op": "term", "args": ["star"],
+                              "kwargs": {"field": "title"}}],
+       "kwargs": {"year": [1990, 2000]}}
+
+    and read them from files of the command line tools.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import io
+import json
+import sys
+
+from csquery import structured
+
+#: builders that can be called from a spec, by ``op``.
+BUILDERS = {
+    'and': structured.and_,
+    'or': structured.or_,
+    'not': structured.not_,
+    'term': structured.term,
+    'near': structured.near,
+    'phrase': structured.phrase,
+    'prefix': structured.prefix,
+    'range': structured.range_,
+    'in': structured.in_,
+}
+
+
+def _value(value):
+    if isinstance(value, dict) and 'op' in value:
+        return build(value)
+    return value
+
+
+def build(spec):
+    """Build the :class:`~csquery.structured.Expression` of ``spec``."""
+    try:
+        builder = BUILDERS[spec['op']]
+    except KeyError:
+        raise ValueError('unknown op: {!r}'.format(spec.get('op')))
+    args = [_value(arg) for arg in spec.get('args', ())]
+    kwargs = dict((str(k), _value(v))
+                  for k, v in spec.get('kwargs', {}).items())
+    return builder(*args, **kwargs)
+
+
+def read_expressions(lines, specs=False):
+    """Yield the expressions of the non blank ``lines``, rendered queries
+    or JSON specs if ``specs`` is true.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield build(json.loads(line)) if specs else \
+                structured.parse(line)
+        except ValueError as e:
+            raise ValueError('line {}: {}'.format(number, e))
+
+
+def open_stream(path, mode):
+    """Open ``path`` as UTF-8 text, ``-`` is stdin or stdout by ``mode``.
+
+    The standard streams are not closed with the returned file.
+    """
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return io.open(stream.fileno(), mode, encoding='utf-8',
+                       closefd=False)
+    return io.open(path, mode, encoding='utf-8')
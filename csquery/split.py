@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.split
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Split oversized queries into smaller ones and run them concurrently.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from concurrent.futures import ThreadPoolExecutor
+
+from csquery.structured import (
+    Expression, FieldValue, InExpression, format_options
+)
+
+#: default limit of the rendered query size in bytes.
+DEFAULT_MAX_BYTES = 8192
+
+#: default upper bound of concurrent searches.
+DEFAULT_MAX_WORKERS = 16
+
+
+def byte_size(expression):
+    """Return the size of the rendered ``expression`` in UTF-8 bytes."""
+    return len(expression().encode('utf-8'))
+
+
+def _pack(head_size, sizes, max_bytes):
+    """Group consecutive ``sizes`` greedily into as few groups as possible.
+
+    Every group costs ``head_size`` plus the sizes of its items. Filling
+    each group before starting the next is optimal for ordered groups.
+    """
+    groups = []
+    start, total = 0, head_size
+    for i, size in enumerate(sizes):
+        if head_size + size > max_bytes:
+            raise ValueError(
+                'clause of {} bytes does not fit in {} bytes'.format(
+                    size, max_bytes))
+        if total + size > max_bytes:
+            groups.append((start, i))
+            start, total = i, head_size
+        total += size
+    groups.append((start, len(sizes)))
+    return groups
+
+
+def _split_or(node, max_bytes, extra):
+    """Split the disjunction ``node``, every piece may grow by ``extra``."""
+    head = '({}{}'.format(node.operator, format_options(node._options))
+    head_size = len(head.encode('utf-8')) + len(')') + extra
+
+    if isinstance(node, InExpression):
+        prefix = len(' {}:'.format(node.name).encode('utf-8'))
+        literals = node._literals
+        sizes = [prefix + len(lit.encode('utf-8')) for lit in literals]
+        return [InExpression._from_literals(node.name, node._options,
+                                            literals[start:end],
+                                            node.values[start:end])
+                for start, end in _pack(head_size, sizes, max_bytes)]
+
+    fields = node.fields
+    sizes = [1 + len(f().encode('utf-8')) for f in fields]
+    return [Expression._make(node.operator, node._options,
+                             fields[start:end])
+            for start, end in _pack(head_size, sizes, max_bytes)]
+
+
+def split(expression, max_bytes=DEFAULT_MAX_BYTES):
+    """Split ``expression`` into the fewest queries under ``max_bytes``.
+
+    A top-level ``or`` is split into several ``or`` queries. For a
+    top-level ``and``, its largest direct ``or`` clause is split and every
+    piece repeats the other clauses. Any document matched by
+    ``expression`` is matched by at least one of the returned queries and
+    by no other documents.
+    """
+    size = byte_size(expression)
+    if size <= max_bytes:
+        return [expression]
+
+    if expression.operator == 'or':
+        return _split_or(expression, max_bytes, 0)
+
+    if expression.operator == 'and':
+        fields = expression.fields
+        candidates = [
+            (len(f().encode('utf-8')), i) for i, f in enumerate(fields)
+            if f.name is None and f.expression is not None
+            and f.expression.operator == 'or'
+        ]
+        if candidates:
+            child_size, index = max(candidates)
+            node = fields[index].expression
+            pieces = _split_or(node, max_bytes, size - child_size)
+            return [
+                Expression._make(
+                    expression.operator, expression._options,
+                    fields[:index] + (FieldValue._make(None, piece, None),)
+                    + fields[index + 1:])
+                for piece in pieces
+            ]
+
+    raise ValueError('query of {} bytes has no disjunction to split '
+                     'into {} bytes'.format(size, max_bytes))
+
+
+def merge_hits(responses, id_key='id'):
+    """Concatenate the hits of ``responses``, keeping the first of each id.
+    """
+    seen = set()
+    hits = []
+    for response in responses:
+        for hit in response['hits']['hit']:
+            if hit[id_key] in seen:
+                continue
+            seen.add(hit[id_key])
+            hits.append(hit)
+    return hits
+
+
+def fan_out(expression, search, max_bytes=DEFAULT_MAX_BYTES,
+            max_workers=None, id_key='id'):
+    """Split ``expression``, search every piece concurrently, merge hits.
+
+    ``search`` is called with each rendered query and must return the
+    decoded CloudSearch response, e.g. ``{'hits': {'hit': [...]}}``.
+    Returns the merged list of hits in the order of the pieces.
+    """
+    queries = [piece() for piece in split(expression, max_bytes)]
+    if len(queries) == 1:
+        return merge_hits([search(queries[0])], id_key)
+    max_workers = min(max_workers or DEFAULT_MAX_WORKERS, len(queries))
+    with ThreadPoolExecutor(max_workers) as executor:
+        return merge_hits(executor.map(search, queries), id_key)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.stats
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Query shapes, the expressions without their literals, and workload
+    statistics aggregated by shape.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from collections import Counter
+from contextlib import contextmanager
+from functools import cmp_to_key
+import hashlib
+from itertools import chain, zip_longest
+import json
+import threading
+import time
+
+import six
+
+from csquery.cache import COMMUTATIVE_OPERATORS
+from csquery.instrument import Histogram
+from csquery.ranges import parse_range
+from csquery.structured import InExpression, format_options, parse
+
+#: placeholder of a literal in a shape.
+PLACEHOLDER = '?'
+
+#: default number of shapes kept by :class:`WorkloadStats`.
+DEFAULT_MAXSIZE = 5000
+
+
+def _placeholder(literal):
+    parsed = parse_range(literal)
+    if parsed is None:
+        return PLACEHOLDER
+    lower, lower_closed, upper, upper_closed = parsed
+    return '{}{},{}{}'.format('[' if lower_closed else '{',
+                              '' if lower is None else PLACEHOLDER,
+                              '' if upper is None else PLACEHOLDER,
+                              ']' if upper_closed else '}')
+
+
+def _field(name, value):
+    return value if name is None else '{}:{}'.format(name, value)
+
+
+def _pieces(nodes, entries):
+    """Yield the text of the clauses of a node after its head."""
+    stack = [entries]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, six.text_type):
+            yield item
+            continue
+        stack.append(')')
+        for text, child, suffix in reversed(item):
+            stack.append(suffix)
+            if child is not None:
+                stack.append(nodes[id(child)][2])
+            stack.append(text)
+            stack.append(' ')
+        if not item:
+            stack.append(' ')
+
+
+def _compare_text(a, b):
+    """Compare two texts given as iterables of strings, reading them only
+    up to their first difference."""
+    for x, y in zip_longest(chain.from_iterable(a), chain.from_iterable(b)):
+        if x != y:
+            if x is None or y is None:
+                return -1 if x is None else 1
+            return -1 if x < y else 1
+    return 0
+
+
+def _entries(head, operator, children, text):
+    """Return the digest of a node and its ``(text, child, suffix)`` clauses.
+
+    ``children`` are ``(text, digest, child)`` with the text of a literal,
+    or the head and the digest of a ``child`` node. The clauses of ``and``
+    and ``or`` are sorted as their rendered text, which ``text(text,
+    child)`` yields piece by piece, when a head is not enough to tell two
+    clauses apart.
+    """
+    if operator in COMMUTATIVE_OPERATORS:
+        counts = Counter((text_, digest) for text_, digest, _ in children)
+        nodes = dict(((text_, digest), child)
+                     for text_, digest, child in children)
+
+        def compare(a, b):
+            (text_a, digest_a), (text_b, digest_b) = a, b
+            if digest_a != digest_b and (
+                    digest_a and text_b.startswith(text_a) or
+                    digest_b and text_a.startswith(text_b)):
+                return _compare_text(text(text_a, nodes[a]),
+                                     text(text_b, nodes[b]))
+            return (text_a > text_b) - (text_a < text_b)
+
+        entries = [(text_, digest, nodes[text_, digest],
+                    '...' if counts[text_, digest] > 1 else '')
+                   for text_, digest in sorted(counts,
+                                               key=cmp_to_key(compare))]
+    else:
+        entries = [(text_, digest, child, '')
+                   for text_, digest, child in children]
+    h = hashlib.sha1(head.encode('utf-8'))
+    for text_, digest, _, suffix in entries:
+        h.update(b'\0' + text_.encode('utf-8') + b'\0' + digest +
+                 suffix.encode('ascii'))
+    return h.digest(), [(text_, child, suffix)
+                        for text_, _, child, suffix in entries]
+
+
+def shape(expression):
+    """Return ``expression`` rendered with its literals replaced by ``?``.
+
+    Operators, field names and options are kept and range bounds keep
+    their brackets. The clauses of ``and`` and ``or`` are sorted and the
+    repeated ones are written once followed by ``...``, so queries that
+    differ only in their values, or in the number of values of an
+    ``in_``, share a shape.
+
+    .. code-block:: python
+
+      shape(and_(title='star', year=('', 2000)))
+      #=> (and title:? year:{,?])
+      shape(in_('id', ['tt0076759', 'tt0080684']))
+      #=> (or id:?...)
+    """
+    # id(node) -> (head, digest, clauses). Subtrees are told apart by
+    # their digest, sorted by reading their text only up to the first
+    # difference and written once into a single buffer.
+    nodes = {}
+
+    def text(head, child):
+        yield head
+        if child is not None:
+            for piece in _pieces(nodes, nodes[id(child)][2]):
+                yield piece
+
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in nodes:
+            continue
+        head = '({}{}'.format(node.operator, format_options(node._options))
+        if isinstance(node, InExpression):
+            field = _field(node.name, PLACEHOLDER)
+            children = [(field, b'', None)] * len(node._literals)
+        elif not visited:
+            stack.append((node, True))
+            stack.extend((f.expression, False) for f in node.fields
+                         if f.expression is not None)
+            continue
+        else:
+            children = []
+            for f in node.fields:
+                if f.expression is None:
+                    children.append((_field(f.name, _placeholder(f._value)),
+                                     b'', None))
+                else:
+                    child_head, digest, _ = nodes[id(f.expression)]
+                    children.append((_field(f.name, child_head), digest,
+                                     f.expression))
+        nodes[id(node)] = (head,) + _entries(head, node.operator, children,
+                                             text)
+
+    head, _, entries = nodes[id(expression)]
+    return head + ''.join(_pieces(nodes, entries))
+
+
+def shape_fingerprint(text):
+    """Return a short hex digest of a shape string."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class _Entry(object):
+
+    def __init__(self, key):
+        self.shape = key
+        self.count = 0
+        self.total_seconds = 0.0
+        self.seconds = Histogram()
+        self.bytes = Histogram()
+
+    def snapshot(self):
+        return {
+            'shape': self.shape,
+            'fingerprint': shape_fingerprint(self.shape),
+            'count': self.count,
+            'total_seconds': self.total_seconds,
+            'seconds': self.seconds.snapshot(),
+            'bytes': self.bytes.snapshot(),
+        }
+
+
+class WorkloadStats(object):
+    """Count, latency and rendered size of the queries, by shape.
+
+    At most ``maxsize`` shapes are kept. When a new shape comes and there
+    is no room, the 5% least executed shapes are dropped, like
+    ``pg_stat_statements`` does. Thread-safe.
+
+    .. code-block:: python
+
+      stats = WorkloadStats()
+      with stats.timed(q):
+          search(q)
+      stats.to_json()
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, expression, seconds, size=None):
+        """Add one execution of ``expression``, an expression or a rendered
+        query, that took ``seconds``. ``size`` is the rendered size in
+        bytes, computed when not given.
+        """
+        if isinstance(expression, six.string_types):
+            query, expression = expression, parse(expression)
+        else:
+            query = expression() if size is None else None
+        if size is None:
+            size = len(query.encode('utf-8'))
+        key = shape(expression)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.maxsize:
+                    self._evict()
+                entry = self._entries[key] = _Entry(key)
+            entry.count += 1
+            entry.total_seconds += seconds
+            entry.seconds.add(seconds)
+            entry.bytes.add(size)
+
+    @contextmanager
+    def timed(self, expression):
+        """Record the time spent in a ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(expression, time.perf_counter() - start)
+
+    def _evict(self):
+        entries = sorted(self._entries.values(), key=lambda e: e.count)
+        for entry in entries[:max(1, len(entries) // 20)]:
+            del self._entries[entry.shape]
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snapshot(self, sort='total_seconds', limit=None):
+        """Return the statistics of the shapes, the largest ``sort`` first.
+        """
+        with self._lock:
+            entries = [entry.snapshot() for entry in self._entries.values()]
+            evictions = self.evictions
+        entries.sort(key=lambda e: (-e[sort], e['shape']))
+        return {
+            'maxsize': self.maxsize,
+            'evictions': evictions,
+            'shapes': entries[:limit],
+        }
+
+    def to_json(self, sort='total_seconds', limit=None, **kwargs):
+        kwargs.setdefault('sort_keys', True)
+        return json.dumps(self.snapshot(sort, limit), **kwargs)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.evictions = 0
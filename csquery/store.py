@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.store
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A read-only file of expressions, looked up by their canonical
+    fingerprint and opened with ``mmap``, so that worker processes share
+    one copy in the page cache and decode only the trees they look up.
+
+    A file is a header, the expressions in the format of
+    :mod:`csquery.wire`, and an index of ``(digest, offset, length)``
+    entries sorted by digest, searched in place.
+
+    Usage::
+
+      $ python -m csquery.store INPUT OUTPUT [--specs]
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import argparse
+from bisect import bisect_left
+from functools import lru_cache
+import mmap
+import os
+import struct
+import sys
+import time
+
+import six
+
+from csquery import cache, wire
+from csquery.specs import open_stream, read_expressions
+
+MAGIC = b'CSQS'
+VERSION = 1
+
+_HEADER = struct.Struct(str('<4sBxxxQQ'))
+_ENTRY = struct.Struct(str('<20sQI'))
+_DIGEST_SIZE = 20
+
+#: default number of decoded expressions kept by a :class:`QueryStore`.
+DEFAULT_CACHE_SIZE = 1024
+
+
+def write_store(path, expressions):
+    """Write ``expressions`` to a store file at ``path``.
+
+    Equivalent expressions, those of the same fingerprint, are written
+    once. The file is written next to ``path`` and renamed, so processes
+    that have the previous file open keep reading it. Returns the number
+    of expressions written.
+    """
+    entries = {}
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0, 0))
+            offset = _HEADER.size
+            for expression in expressions:
+                digest = cache.digest(expression)
+                if digest in entries:
+                    continue
+                data = wire.dumps(expression)
+                f.write(data)
+                entries[digest] = (offset, len(data))
+                offset += len(data)
+            for digest in sorted(entries):
+                f.write(_ENTRY.pack(digest, *entries[digest]))
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, VERSION, len(entries), offset))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return len(entries)
+
+
+class _Digests(object):
+    """The digests of the index, as a sorted sequence for ``bisect``."""
+
+    def __init__(self, data, offset, count):
+        self.data = data
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        start = self.offset + index * _ENTRY.size
+        return self.data[start:start + _DIGEST_SIZE]
+
+
+class QueryStore(object):
+    """Read the expressions of a file written by :func:`write_store`.
+
+    Keys are expressions, whose fingerprint is computed, or fingerprints
+    of :func:`csquery.cache.fingerprint`. Opening reads only the header,
+    and a lookup reads the index entries of a binary search and the
+    bytes of one expression. The last ``cache_size`` decoded expressions
+    are kept, ``0`` disables it.
+
+    .. code-block:: python
+
+      with QueryStore('saved.csqs') as store:
+          store[fingerprint]  #=> Expression
+          expression in store
+    """
+
+    def __init__(self, path, cache_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count, offset = _HEADER.unpack_from(self._data)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self._data.close()
+            raise ValueError('not a csquery store of version {}: {}'.format(
+                VERSION, path))
+        self._count = count
+        self._index = offset
+        self._digests = _Digests(self._data, offset, count)
+        self._decode = lru_cache(maxsize=cache_size)(self._decode)
+
+    def __len__(self):
+        return self._count
+
+    def _find(self, key):
+        if isinstance(key, six.string_types):
+            try:
+                digest = bytes.fromhex(key)
+            except ValueError:
+                return None
+        else:
+            digest = cache.digest(key)
+        index = bisect_left(self._digests, digest)
+        if index == self._count or self._digests[index] != digest:
+            return None
+        return _ENTRY.unpack_from(self._data,
+                                  self._index + index * _ENTRY.size)
+
+    def get(self, key, default=None):
+        entry = self._find(key)
+        if entry is None:
+            return default
+        return self._decode(entry[1], entry[2])
+
+    def _decode(self, offset, length):
+        return wire.loads(self._data[offset:offset + length])
+
+    def __getitem__(self, key):
+        expression = self.get(key)
+        if expression is None:
+            raise KeyError(key)
+        return expression
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __iter__(self):
+        """Iterate over the fingerprints, in the order of the index."""
+        for index in range(self._count):
+            yield self._digests[index].hex()
+
+    def items(self):
+        """Iterate over ``(fingerprint, expression)``, decoding one
+        expression at a time, without the cache."""
+        for index in range(self._count):
+            digest, offset, length = _ENTRY.unpack_from(
+                self._data, self._index + index * _ENTRY.size)
+            yield digest.hex(), wire.loads(self._data[offset:offset + length])
+
+    def close(self):
+        self._decode.cache_clear()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m csquery.store',
+        description='Write structured queries, one per line, to a store '
+                    'file.')
+    parser.add_argument('input',
+                        help='file of rendered queries, one per line, '
+                             'or - for stdin')
+    parser.add_argument('output', help='store file to write')
+    parser.add_argument('--specs', action='store_true',
+                        help='lines are JSON specs of python -m csquery')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not report the result on stderr')
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    with open_stream(args.input, 'r') as src:
+        try:
+            count = write_store(args.output,
+                                read_expressions(src, args.specs))
+        except ValueError as e:
+            print('error: {}'.format(e), file=sys.stderr)
+            return 1
+
+    if not args.quiet:
+        print('{} expressions, {} bytes in {:.2f} sec'.format(
+            count, os.path.getsize(args.output), time.time() - started),
+            file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
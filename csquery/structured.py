@@ -9,11 +9,81 @@
 from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
 
 from collections import OrderedDict
+import datetime
+from functools import lru_cache
+import re
+from sys import intern as _intern
+import time
+
 import six
 
+#: options of nodes built without any, shared by all of them.
+EMPTY_OPTIONS = ()
+
+_set = object.__setattr__
+
+# the default of ``raw`` for nodes built from already formatted literals.
+_LITERAL = object()
+
+_timer = time.perf_counter
+
+# the active Instrument, None while instrumentation is off.
+_instrument = None
+
+
+class Instrument(object):
+    """Receives the events of this module, see :func:`set_instrument`.
+
+    Methods are called in the thread that builds or renders, and should
+    return quickly.
+    """
+
+    def node_built(self, node):
+        """An :class:`Expression` ``node`` was built."""
+
+    def rendered(self, node, seconds, size, depth):
+        """``node`` was rendered into ``size`` UTF-8 bytes in ``seconds``,
+        ``depth`` is the depth of its tree. Only renders that were not
+        cached are reported.
+        """
+
+
+def set_instrument(instrument):
+    """Send events to ``instrument``, or to nothing with ``None``.
+
+    Returns the previous instrument. While none is set, building and
+    rendering only pay for one test of a global name.
+    """
+    global _instrument
+    previous, _instrument = _instrument, instrument
+    return previous
+
+
+def tree_depth(node):
+    """Return the number of nested expressions in ``node``."""
+    depth = 0
+    stack = [(node, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        if not isinstance(node, InExpression):
+            stack.extend((f.expression, level + 1) for f in node.fields
+                         if f.expression is not None)
+    return depth
+
+
+#: number of formatted literals kept by :func:`format_value`.
+LITERAL_CACHE_SIZE = 4096
+
 
 def escape(string):
-    return string.replace('\\', '\\\\').replace("'", "\\'")
+    # the membership tests scan without allocating, most literals need no
+    # escaping at all and are returned as they are.
+    if '\\' in string:
+        string = string.replace('\\', '\\\\')
+    if "'" in string:
+        string = string.replace("'", "\\'")
+    return string
 
 
 def text_(s, encoding='utf-8', errors='strict'):
@@ -22,10 +92,93 @@ def text_(s, encoding='utf-8', errors='strict'):
     return s  # pragma: no cover
 
 
+def _format_text(value):
+    first, last = value[:1], value[-1:]
+    if (first == '(' and last == ')') or (
+            first in ('[', '{') and last in (']', '}') and
+            not (first == '{' and last == '}')):
+        return value
+    return "'" + escape(value) + "'"
+
+
+def _format_binary(value):
+    return _format_text(text_(value))
+
+
+def format_date(value):
+    """Format a ``datetime`` or ``date`` as a quoted UTC ISO-8601 literal.
+
+    Naive datetimes are taken as UTC, aware ones are converted to UTC and
+    dates are at midnight. Milliseconds are kept when not zero.
+    """
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    text = value.isoformat()
+    if value.microsecond:
+        milliseconds = value.microsecond // 1000
+        text = text[:19] + ('.{:03d}'.format(milliseconds)
+                            if milliseconds else '')
+    return "'" + text + "Z'"
+
+
+_FORMATTERS = {
+    datetime.datetime: format_date,
+    datetime.date: format_date,
+    six.text_type: _format_text,
+    six.binary_type: _format_binary,
+    bool: six.text_type,
+    float: six.text_type,
+    type(None): six.text_type,
+}
+_FORMATTERS.update((t, six.text_type) for t in six.integer_types)
+
+
+def _format_literal(value):
+    return _FORMATTERS[type(value)](value)
+
+
+def _cache_literals(maxsize):
+    global _format_cached
+    # typed, so that 1, 1.0 and True are kept apart.
+    _format_cached = lru_cache(maxsize=maxsize, typed=True)(_format_literal)
+
+
+_cache_literals(LITERAL_CACHE_SIZE)
+
+
+def set_literal_cache_size(maxsize):
+    """Resize the literal cache, ``0`` disables and ``None`` unbounds it."""
+    _cache_literals(maxsize)
+
+
+def literal_cache_info():
+    """Return ``(hits, misses, maxsize, currsize)`` of the literal cache."""
+    return _format_cached.cache_info()
+
+
+def clear_literal_cache():
+    _format_cached.cache_clear()
+
+
 def format_value(value):
-    if type(value) in (list, tuple):
+    """Format ``value`` as a literal of a structured query.
+
+    Strings, bytes, numbers, bools and ``None`` are dispatched on their
+    exact type and kept in a per-process LRU cache of
+    :data:`LITERAL_CACHE_SIZE` entries, so repeated values are escaped and
+    quoted only once.
+    """
+    kind = type(value)
+    if kind is float:
+        # not cached, -0.0 and 0.0 are equal keys but format differently.
+        return six.text_type(value)
+    if kind in _FORMATTERS:
+        return _format_cached(value)
+    if kind in (list, tuple):
         return format_range_values(*value)
-    if type(value) == Expression:
+    if isinstance(value, Expression):
         return value()
     try:
         # if format_value's input only text_type, this sentence is unnecessary.
@@ -43,7 +196,50 @@ def format_value(value):
     return "'{}'".format(escape(value))
 
 
+def format_values(values):
+    """Format many values at once, same as ``[format_value(v) ...]``.
+
+    ``values`` may be any iterable, including NumPy arrays and
+    ``array.array``. Lists of only strings or only numbers are escaped and
+    quoted in one batched pass over a joined string instead of dispatching
+    on the type of every value.
+    """
+    if hasattr(values, 'tolist'):
+        values = values.tolist()
+    values = list(values)
+    if not values:
+        return []
+    types = set(map(type, values))
+
+    if types == set([six.binary_type]):
+        values = [text_(v) for v in values]
+        types = set([six.text_type])
+
+    if types == set([six.text_type]):
+        joined = '\x00'.join(values)
+        if joined.count('\x00') == len(values) - 1 \
+                and joined[:1] not in ('(', '[', '{') \
+                and '\x00(' not in joined and '\x00[' not in joined \
+                and '\x00{' not in joined:
+            if '\\' in joined or "'" in joined:
+                joined = escape(joined)
+            return ("'" + joined.replace('\x00', "'\x00'") + "'").split('\x00')
+
+    elif types.issubset(set(six.integer_types + (float,))):
+        return list(map(six.text_type, values))
+
+    return [format_value(v) for v in values]
+
+
 def format_range_values(start, end=None):
+    """Format the bounds of a range, ``None`` or ``''`` for an open end.
+
+    ``datetime`` and ``date`` bounds are formatted by :func:`format_date`.
+    """
+    if isinstance(start, datetime.date):
+        start = format_date(start)
+    if isinstance(end, datetime.date):
+        end = format_date(end)
     return '{}{},{}{}'.format(
         '[' if start not in (None, '') else '{',
         start if start not in (None, '') else '',
@@ -55,18 +251,163 @@ def format_range_values(start, end=None):
 def format_options(options={}):
     if not options:
         return ''
-    return ' ' + ' '.join(['{}={}'.format(k, v)
-                           for k, v in options.items()])
+    if hasattr(options, 'items'):
+        options = options.items()
+    return ' ' + ' '.join(['{}={}'.format(k, v) for k, v in options])
+
+
+def render(node):
+    """Render ``node`` into one output buffer without recursion.
+
+    Nested expressions are expanded with an explicit stack, so the cost is
+    linear in the size of the output and the depth of the tree is not
+    limited by the interpreter's recursion limit. Already rendered
+    subtrees are copied from their cache, and subtrees shared by several
+    parents keep their string once rendered.
+    """
+    if node._query is not None:
+        return node._query
+    if _instrument is None:
+        return _render(node)
+    start = _timer()
+    query = _render(node)
+    _instrument.rendered(node, _timer() - start, len(query.encode('utf-8')),
+                         tree_depth(node))
+    return query
+
+
+def _render(node):
+    buf = []
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Expression):
+            if item._query is not None:
+                buf.append(item._query)
+                continue
+            if item._parents > 1:
+                stack.append((item, len(buf)))
+            item._expand(buf, stack)
+        elif isinstance(item, tuple):
+            shared, start = item
+            _set(shared, '_query', ''.join(buf[start:]))
+        else:
+            buf.append(item)
+    query = ''.join(buf)
+    _set(node, '_query', query)
+    return query
+
+
+def _equal(left, right):
+    pairs = [(left, right)]
+    while pairs:
+        a, b = pairs.pop()
+        if a is b:
+            continue
+        if isinstance(a, FieldValue) is not isinstance(b, FieldValue) \
+                or hash(a) != hash(b):
+            return False
+        if isinstance(a, FieldValue):
+            if a.name != b.name or a._value != b._value:
+                return False
+            if a.expression is not None:
+                pairs.append((a.expression, b.expression))
+            continue
+        if a.operator != b.operator or len(a.fields) != len(b.fields) or (
+                a._options is not b._options and
+                _options_key(a._options) != _options_key(b._options)):
+            return False
+        pairs.extend(zip(a.fields, b.fields))
+    return True
+
+
+def _options_key(options):
+    # as rendered, boost=2 and boost=2.0 are different options.
+    return tuple((k, '{}'.format(v)) for k, v in options)
+
+
+def _intern_name(name):
+    if type(name) is six.text_type:
+        return _intern(name)
+    return name
+
+
+def _intern_options(options):
+    if not options:
+        return EMPTY_OPTIONS
+    if hasattr(options, 'items'):
+        options = options.items()
+    return tuple((_intern_name(k), v) for k, v in options)
+
+
+class _Frozen(object):
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            '{} object is immutable'.format(self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            '{} object is immutable'.format(self.__class__.__name__))
+
+    def __eq__(self, other):
+        if not isinstance(other, _Frozen):
+            return NotImplemented
+        return _equal(self, other)
 
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
 
-@six.python_2_unicode_compatible
-class FieldValue(object):
+    def __hash__(self):
+        return self._hash
+
+
+class FieldValue(_Frozen):
+    """A value of an expression, optionally with a field name.
+
+    :attr:`raw` is the value as it was given, the formatted literal for
+    nodes built from literals, e.g. by :func:`parse`.
+    """
+    __slots__ = ('name', 'expression', 'raw', '_value', '_hash')
 
     def __init__(self, value, name=None):
         if type(value) == dict:
-            name, value = value.popitem()
-        self.name = name
-        self.value = format_value(value)
+            name, value = list(value.items())[-1]
+        if isinstance(value, Expression):
+            # keep the subtree, it is rendered together with its parent.
+            self._setup(name, value, None, value)
+        else:
+            self._setup(name, None, format_value(value), value)
+
+    def _setup(self, name, expression, literal, raw):
+        name = _intern_name(name)
+        _set(self, 'name', name)
+        _set(self, 'expression', expression)
+        _set(self, 'raw', raw)
+        _set(self, '_value', literal)
+        _set(self, '_hash', hash((name, literal, expression)))
+
+    @classmethod
+    def _make(cls, name, expression, literal, raw=_LITERAL):
+        """Build a node from an already formatted ``literal``."""
+        if raw is _LITERAL:
+            raw = literal if expression is None else expression
+        self = cls.__new__(cls)
+        self._setup(name, expression, literal, raw)
+        return self
+
+    def __reduce__(self):
+        return (_make_field,
+                (self.__class__, self.name, self.expression, self._value,
+                 self.raw))
+
+    @property
+    def value(self):
+        if self.expression is not None:
+            return self.expression.query()
+        return self._value
 
     def to_value(self):
         if self.name:
@@ -81,25 +422,78 @@ class FieldValue(object):
 
     def __repr__(self):
         value = '<{}: {}>'.format(self.__class__.__name__, self.to_value())
-        return value.encode('utf-8') if six.PY2 else value
+        return value
 
 
-@six.python_2_unicode_compatible
-class Expression(object):
+class Expression(_Frozen):
+    __slots__ = ('operator', '_options', 'fields', '_hash', '_query',
+                 '_parents')
 
     def __init__(self, operator, options={}, *args, **kwargs):
-        self.operator = operator
-        self.options = options
-        self.fields = [FieldValue(value=a) for a in args]
-        self.fields += [FieldValue(name=k, value=kwargs[k])
-                        for k in sorted(kwargs.keys())]
+        fields = [a if isinstance(a, FieldValue) else FieldValue(value=a)
+                  for a in args]
+        fields += [FieldValue(name=k, value=kwargs[k])
+                   for k in sorted(kwargs.keys())]
+        self._setup(operator, _intern_options(options), tuple(fields))
+
+    def _setup(self, operator, options, fields):
+        for f in fields:
+            if f.expression is not None:
+                f.expression._add_parent()
+        operator = _intern_name(operator)
+        _set(self, 'operator', operator)
+        _set(self, '_options', options)
+        _set(self, 'fields', fields)
+        _set(self, '_hash', hash((operator, _options_key(options), fields)))
+        _set(self, '_query', None)
+        _set(self, '_parents', 0)
+        if _instrument is not None:
+            _instrument.node_built(self)
+
+    @classmethod
+    def _make(cls, operator, options, fields):
+        """Build a node from option pairs and :class:`FieldValue` nodes."""
+        self = cls.__new__(cls)
+        self._setup(operator, _intern_options(options), tuple(fields))
+        return self
+
+    @classmethod
+    def from_fields(cls, operator, options, fields, query=None):
+        """Build a node from ``options``, a dict or pairs, and
+        :class:`FieldValue` nodes. ``query`` is the rendered string of the
+        node when it is already known, so rendering it costs nothing.
+        """
+        self = cls._make(operator, options, fields)
+        if query is not None:
+            _set(self, '_query', query)
+        return self
+
+    def __reduce__(self):
+        return (_make_expression,
+                (self.__class__, self.operator, self._options, self.fields))
+
+    @property
+    def options(self):
+        return OrderedDict(self._options)
+
+    def _add_parent(self):
+        # only a hint for caching, losing a concurrent update is harmless.
+        if self._parents < 2:
+            _set(self, '_parents', self._parents + 1)
+
+    def _expand(self, buf, stack):
+        buf.append('({}{}'.format(self.operator,
+                                  format_options(self._options)))
+        stack.append(')' if self.fields else ' )')
+        for f in reversed(self.fields):
+            if f.expression is None:
+                stack.append(' ' + f.to_value())
+                continue
+            stack.append(f.expression)
+            stack.append(' {}:'.format(f.name) if f.name else ' ')
 
     def query(self):
-        return '({}{}{})'.format(
-            self.operator,
-            format_options(self.options),
-            ' {}'.format(' '.join([f() for f in self.fields]))
-        )
+        return render(self)
 
     def __call__(self):
         return self.query()
@@ -109,13 +503,89 @@ class Expression(object):
 
     def __repr__(self):
         query = '<{}: {}>'.format(self.__class__.__name__, self.query())
-        return query.encode('utf-8') if six.PY2 else query
+        return query
+
+
+class InExpression(Expression):
+    """``(or name:value1 name:value2 ...)`` over a list of literals.
+
+    The values are kept as one tuple of formatted literals and rendered in
+    one join, :class:`FieldValue` nodes are only built when :attr:`fields`
+    is read. :attr:`values` keeps the values as they were given.
+    """
+    __slots__ = ('name', 'values', '_literals')
+
+    def __init__(self, name, values, options={}):
+        if hasattr(values, 'tolist'):
+            values = values.tolist()
+        values = tuple(values)
+        self._setup(_intern_name(name), _intern_options(options),
+                    tuple(format_values(values)), values)
+
+    def _setup(self, name, options, literals, values):
+        _set(self, 'operator', 'or')
+        _set(self, 'name', name)
+        _set(self, 'values', values)
+        _set(self, '_options', options)
+        _set(self, '_literals', literals)
+        _set(self, '_hash', None)
+        _set(self, '_query', None)
+        _set(self, '_parents', 0)
+        if _instrument is not None:
+            _instrument.node_built(self)
+
+    @classmethod
+    def _from_literals(cls, name, options, literals, values=None):
+        """Build a node from already formatted ``literals``."""
+        literals = tuple(literals)
+        self = cls.__new__(cls)
+        self._setup(_intern_name(name), _intern_options(options), literals,
+                    literals if values is None else tuple(values))
+        return self
+
+    @property
+    def fields(self):
+        return tuple(FieldValue._make(self.name, None, literal, value)
+                     for literal, value in zip(self._literals, self.values))
+
+    def __hash__(self):
+        if self._hash is None:
+            # same as Expression('or', ...) built from the same fields.
+            fields = tuple((self.name, literal, None)
+                           for literal in self._literals)
+            _set(self, '_hash', hash((self.operator,
+                                      _options_key(self._options), fields)))
+        return self._hash
+
+    def __reduce__(self):
+        return (_make_in,
+                (self.__class__, self.name, self._options, self._literals,
+                 self.values))
+
+    def _expand(self, buf, stack):
+        head = '({}{}'.format(self.operator, format_options(self._options))
+        if not self._literals:
+            buf.append(head + ' )')
+            return
+        prefix = ' {}:'.format(self.name)
+        buf.append(head + prefix + prefix.join(self._literals) + ')')
+
+
+def _make_field(cls, name, expression, literal, raw=_LITERAL):
+    return cls._make(name, expression, literal, raw)
+
+
+def _make_expression(cls, operator, options, fields):
+    return cls._make(operator, options, fields)
+
+
+def _make_in(cls, name, options, literals, values=None):
+    return cls._from_literals(name, options, literals, values)
 
 
 def _get_option(keys, options):
-    opts = OrderedDict()
-    opts.update(((key, options.pop(key)) for key in keys if key in options))
-    return opts
+    return tuple((key, options.pop(key)) for key in keys if key in options) \
+        or EMPTY_OPTIONS
 
 
 def field(value, name=None):
@@ -135,6 +605,14 @@ def or_(*args, **kwargs):
     return Expression('or', _get_option(['boost'], kwargs), *args, **kwargs)
 
 
+def in_(name, values, **kwargs):
+    options = _get_option(['boost'], kwargs)
+    if kwargs:
+        raise TypeError('in_() got an unexpected keyword argument {!r}'.format(
+            sorted(kwargs)[0]))
+    return InExpression(name, values, options)
+
+
 def term(*args, **kwargs):
     return Expression('term', _get_option(['field', 'boost'], kwargs),
                       *args, **kwargs)
@@ -159,3 +637,103 @@ def prefix(*args, **kwargs):
 def range_(*args, **kwargs):
     return Expression('range', _get_option(['field', 'boost'], kwargs),
                       *args, **kwargs)
+
+
+_OPERATOR_RE = re.compile(r'\(\s*([^\W\d]\w*)', re.U)
+_OPTION_RE = re.compile(r'\s+([^\W\d]\w*)=([^\s()]+)', re.U)
+_NAME_RE = re.compile(r'([^\W\d]\w*):', re.U)
+_SPACE_RE = re.compile(r'\s*', re.U)
+_NUMBER_RE = re.compile(r'-?\d+(\.\d+)?$')
+_QUOTED_RE = re.compile(r"'(?:[^'\\]|\\.)*'", re.S)
+# quoted bounds may contain brackets, unbalanced quotes are taken as is.
+_RANGE_RE = re.compile(
+    r"[\[{](?:[^\]}'\\]|'(?:[^'\\]|\\.)*')*[\]}](?=[\s)]|$)"
+    r"|[\[{][^\]}]*[\]}]", re.S | re.U)
+_BARE_RE = re.compile(r'[^\s()]+', re.U)
+
+
+def _parse_error(text, pos, expected):
+    return ValueError('{} expected at position {}: {!r}'.format(
+        expected, pos, text[pos:pos + 20]))
+
+
+def _option_value(token):
+    match = _NUMBER_RE.match(token)
+    if match:
+        value = float(token) if match.group(1) else int(token)
+        if six.text_type(value) == token:
+            return value
+    return token
+
+
+def parse(text):
+    """Parse a structured query string back into an :class:`Expression`.
+
+    The tokenizer is a single left to right scan and nesting is tracked
+    with an explicit stack, so parsing is linear in the length of
+    ``text``. Literals keep their text as written, so ``parse(q).query()``
+    returns ``q`` for any string rendered by this module.
+    """
+    text = text_(text)
+    end = len(text)
+    frames = []
+    name = None
+    pos = _SPACE_RE.match(text, 0).end()
+    if not text.startswith('(', pos):
+        raise _parse_error(text, pos, '"("')
+
+    while True:
+        pos = _SPACE_RE.match(text, pos).end()
+        if pos >= end:
+            raise _parse_error(text, pos, '")"')
+        char = text[pos]
+
+        if char == '(':
+            match = _OPERATOR_RE.match(text, pos)
+            if match is None:
+                raise _parse_error(text, pos + 1, 'operator')
+            operator, pos = match.group(1), match.end()
+            options = []
+            match = _OPTION_RE.match(text, pos)
+            while match is not None:
+                options.append((match.group(1),
+                                _option_value(match.group(2))))
+                pos = match.end()
+                match = _OPTION_RE.match(text, pos)
+            frames.append((operator, options, [], name))
+            name = None
+            continue
+
+        if char == ')':
+            if name is not None:
+                raise _parse_error(text, pos, 'value')
+            operator, options, fields, parent_name = frames.pop()
+            node = Expression._make(operator, options, fields)
+            pos += 1
+            if not frames:
+                break
+            frames[-1][2].append(FieldValue._make(parent_name, node, None))
+            continue
+
+        if name is None:
+            match = _NAME_RE.match(text, pos)
+            if match is not None:
+                name, pos = match.group(1), match.end()
+                continue
+
+        if char == "'":
+            match = _QUOTED_RE.match(text, pos)
+        elif char in '[{':
+            match = _RANGE_RE.match(text, pos)
+        else:
+            match = _BARE_RE.match(text, pos)
+        if match is None:
+            raise _parse_error(text, pos, 'value')
+        frames[-1][2].append(FieldValue._make(name, None, match.group(0)))
+        name = None
+        pos = match.end()
+
+    pos = _SPACE_RE.match(text, pos).end()
+    if pos != end:
+        raise _parse_error(text, pos, 'end of query')
+    return node
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.template
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compiled query templates with named placeholders.
+
+    A tree is built once with :func:`param` placeholders, compiled into
+    a :class:`Template`, and then rendered with new values. Only the new
+    values are formatted on each render.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import re
+
+from csquery.structured import format_value
+
+_SENTINEL = '\x00csquery:{}\x00'
+_SENTINEL_RE = re.compile('\x00csquery:([^\x00]*)\x00')
+
+
+def format_option_value(value):
+    return '{}'.format(value)
+
+
+class Placeholder(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return _SENTINEL.format(self.name)
+
+    def __repr__(self):
+        value = '<{}: {}>'.format(self.__class__.__name__, self.name)
+        return value
+
+
+class Template(object):
+
+    def __init__(self, expression):
+        source = expression()
+        chunks = _SENTINEL_RE.split(source)
+
+        self.parts = []
+        self.slots = []
+        for i, chunk in enumerate(chunks):
+            if i % 2 == 0:
+                self.parts.append(chunk)
+                continue
+            preceding = chunks[i - 1][-1:]
+            if preceding in ('[', '{', ','):
+                raise ValueError(
+                    'placeholder {!r} can not be used as a range bound, '
+                    'use it for the whole range value'.format(chunk))
+            formatter = format_option_value if preceding == '=' \
+                else format_value
+            self.slots.append((len(self.parts), chunk, formatter))
+            self.parts.append(None)
+        self.params = frozenset(name for _, name, _ in self.slots)
+
+    def render(self, **values):
+        if len(values) != len(self.params) or \
+                not self.params.issuperset(values):
+            self._check_params(values)
+
+        parts = list(self.parts)
+        for index, name, formatter in self.slots:
+            parts[index] = formatter(values[name])
+        return ''.join(parts)
+
+    def _check_params(self, values):
+        missing = self.params.difference(values)
+        if missing:
+            raise TypeError('missing template parameter(s): {}'.format(
+                ', '.join(sorted(missing))))
+        unknown = set(values).difference(self.params)
+        if unknown:
+            raise TypeError('unknown template parameter(s): {}'.format(
+                ', '.join(sorted(unknown))))
+
+    def __call__(self, **values):
+        return self.render(**values)
+
+    def __str__(self):
+        return ''.join(
+            '{' + self.slots[i // 2][1] + '}' if part is None else part
+            for i, part in enumerate(self.parts)
+        )
+
+    def __repr__(self):
+        value = '<{}: {}>'.format(self.__class__.__name__, self)
+        return value
+
+
+def param(name):
+    return Placeholder(name)
+
+
+def compile_(expression):
+    return Template(expression)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.testing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A local stand-in for a CloudSearch search endpoint, for tests and
+    benchmarks.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import json
+import threading
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import urlsplit, parse_qsl, urlencode
+from six.moves.urllib.request import urlopen
+
+SEARCH_PATH = '/2013-01-01/search'
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        stub = self.server.stub
+        with stub.lock:
+            stub.requests.append(params)
+            stub.connections.add(self.client_address)
+        if url.path != SEARCH_PATH:
+            status, body = 404, {'message': 'not found'}
+        else:
+            status, body = 200, stub.handler(params)
+            if isinstance(body, tuple):
+                status, body = body
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class StubSearchServer(object):
+    """Serve ``handler(params)`` as JSON on ``127.0.0.1``.
+
+    ``params`` is the dict of query string parameters of each search
+    request. The handler returns the response body, or a ``(status,
+    body)`` tuple. All requests are kept in :attr:`requests` and the
+    client addresses of the connections in :attr:`connections`.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.stub = self
+        self.host, self.port = self.server.server_address[:2]
+        self.endpoint = 'http://{}:{}'.format(self.host, self.port)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def search(self, q, **params):
+        params.setdefault('q.parser', 'structured')
+        params['q'] = q
+        url = '{}{}?{}'.format(self.endpoint, SEARCH_PATH, urlencode(params))
+        response = urlopen(url)
+        try:
+            return json.loads(response.read().decode('utf-8'))
+        finally:
+            response.close()
+
+
+def hits(ids):
+    """Build a search response with one hit for each of ``ids``."""
+    return {'hits': {'found': len(ids), 'start': 0,
+                     'hit': [{'id': i, 'fields': {}} for i in ids]}}
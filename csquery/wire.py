@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+    csquery.wire
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    A compact binary format of expression trees, for caches and queues
+    shared between processes.
+
+    A message is a header, an array of unsigned integers as narrow as its
+    largest item and a UTF-8 string table. Every name, operator, literal
+    and string value is stored once in the table and referenced by index.
+    Nodes are stored in post-order, so a shared subtree is stored once
+    and a parent refers to its children by their position.
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from array import array
+import datetime
+from operator import itemgetter
+import struct
+import sys
+
+import six
+
+from csquery.structured import Expression, FieldValue, InExpression
+
+MAGIC = b'CSQ'
+VERSION = 2
+
+_HEADER = struct.Struct(str('<3sBcII'))
+
+# kinds of nodes and fields.
+_EXPRESSION, _IN = 0, 1
+_LITERAL_FIELD, _NODE_FIELD = 0, 1
+
+# tags of values. _SAME is a string equal to its formatted literal and
+# _QUOTED one that only had to be quoted.
+(_SAME, _QUOTED, _STR, _INT, _FLOAT, _NONE, _TRUE, _FALSE, _BYTES, _TUPLE,
+ _LIST, _DATETIME, _DATE) = range(13)
+
+# values of an ``in_`` node, taken from the literals or stored one by one.
+_IN_QUOTED, _IN_INT, _IN_VALUES = range(3)
+
+_CONSTANTS = {_NONE: None, _TRUE: True, _FALSE: False}
+_UNQUOTE = itemgetter(slice(1, -1))
+_TYPECODES = [(0xff, 'B'), (0xffff, 'H'), (0xffffffff, 'I'),
+              (0xffffffffffffffff, 'Q')]
+_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+_DATE_FORMAT = '%Y-%m-%d'
+
+
+def _format_datetime(value):
+    # not strftime, which does not pad years before 1000 everywhere.
+    return '{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}.{:06d}'.format(
+        value.year, value.month, value.day, value.hour, value.minute,
+        value.second, value.microsecond)
+
+
+class _Encoder(object):
+
+    def __init__(self):
+        self.ints = []
+        # string -> index, in the order of the table.
+        self.strings = {}
+
+    def string(self, string):
+        return self.strings.setdefault(string, len(self.strings))
+
+    def value(self, value, literal=None):
+        """Encode ``value``, or its ``literal`` when it has no code of its
+        own, e.g. a ``Decimal``, a NumPy scalar or a placeholder. Options
+        have no literal and are stored as they are rendered.
+        """
+        mark = len(self.ints)
+        try:
+            self._value(value, literal)
+        except TypeError:
+            del self.ints[mark:]
+            if literal is None:
+                self.ints.extend((_STR, self.string('{}'.format(value))))
+            else:
+                self.ints.append(_SAME)
+
+    def _value(self, value, literal=None):
+        kind = type(value)
+        ints = self.ints
+        if kind is six.text_type:
+            if value == literal:
+                ints.append(_SAME)
+            elif literal is not None and literal[1:-1] == value:
+                ints.append(_QUOTED)
+            else:
+                ints.extend((_STR, self.string(value)))
+        elif kind is bool:
+            ints.append(_TRUE if value else _FALSE)
+        elif kind in six.integer_types:
+            ints.extend((_INT, self.string(six.text_type(value))))
+        elif kind is float:
+            ints.extend((_FLOAT, self.string(repr(value))))
+        elif value is None:
+            ints.append(_NONE)
+        elif kind is six.binary_type:
+            ints.extend((_BYTES, self.string(value.decode('latin-1'))))
+        elif kind in (tuple, list):
+            ints.extend((_TUPLE if kind is tuple else _LIST, len(value)))
+            for item in value:
+                self._value(item)
+        elif kind is datetime.datetime:
+            offset = value.utcoffset()
+            ints.extend((_DATETIME, self.string(_format_datetime(value)),
+                         self.string('' if offset is None else
+                                     repr(offset.total_seconds()))))
+        elif kind is datetime.date:
+            ints.extend((_DATE, self.string('{:04d}-{:02d}-{:02d}'.format(
+                value.year, value.month, value.day))))
+        else:
+            raise TypeError('no code for a value of type {}'.format(
+                kind.__name__))
+
+    def options(self, options):
+        self.ints.append(len(options))
+        for name, value in options:
+            self.ints.append(self.string(name))
+            self.value(value)
+
+    def node(self, node, indexes):
+        ints = self.ints
+        if isinstance(node, InExpression):
+            ints.extend((_IN, self.string(node.name)))
+            self.options(node._options)
+            literals, values = node._literals, node.values
+            types = set(map(type, values))
+            if types == set([six.text_type]) and \
+                    tuple(map(_UNQUOTE, literals)) == values:
+                mode = _IN_QUOTED
+            elif types.issubset(six.integer_types) and \
+                    tuple(map(six.text_type, values)) == literals:
+                mode = _IN_INT
+            else:
+                mode = _IN_VALUES
+            ints.extend((mode, len(literals)))
+            strings = self.strings
+            ints.extend([strings.setdefault(lit, len(strings))
+                         for lit in literals])
+            if mode == _IN_VALUES:
+                for literal, value in zip(literals, values):
+                    self.value(value, literal)
+            return
+
+        ints.extend((_EXPRESSION, self.string(node.operator)))
+        self.options(node._options)
+        ints.append(len(node.fields))
+        for f in node.fields:
+            name = 0 if f.name is None else self.string(f.name) + 1
+            if f.expression is None:
+                ints.extend((_LITERAL_FIELD, name, self.string(f._value)))
+                self.value(f.raw, f._value)
+            else:
+                ints.extend((_NODE_FIELD, name, indexes[id(f.expression)]))
+
+
+def dumps(expression):
+    """Return ``expression`` as bytes, see :func:`loads`.
+
+    Values are kept when they are strings, bytes, numbers, ``None``,
+    ``datetime``, ``date``, tuples or lists of them. Other values are
+    stored as their literal, which they are loaded as, and option values
+    as they are rendered.
+    """
+    encoder = _Encoder()
+    indexes = {}
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in indexes:
+            continue
+        if not visited:
+            stack.append((node, True))
+            if not isinstance(node, InExpression):
+                stack.extend((f.expression, False) for f in node.fields
+                             if f.expression is not None)
+            continue
+        encoder.node(node, indexes)
+        indexes[id(node)] = len(indexes)
+
+    table = list(encoder.strings)
+    ints = [len(table)] + [len(s) for s in table] + [len(indexes)]
+    ints += encoder.ints
+    largest = max(ints)
+    typecode = next(code for limit, code in _TYPECODES if largest <= limit)
+    data = array(str(typecode), ints)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    blob = ''.join(table).encode('utf-8')
+    return _HEADER.pack(MAGIC, VERSION, typecode.encode('ascii'), len(ints),
+                        len(blob)) + data.tobytes() + blob
+
+
+def loads(data):
+    """Rebuild the expression of :func:`dumps` from ``data``.
+
+    Literals are read from the string table and not formatted again, and
+    values keep the types they were built with. Aware datetimes keep
+    their UTC offset, but not the name of their time zone.
+    """
+    try:
+        magic, version, typecode, count, size = _HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError('not a csquery message')
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a csquery message of version {}'.format(
+            VERSION))
+    ints = array(str(typecode.decode('ascii')))
+    start = _HEADER.size
+    end = start + count * ints.itemsize
+    ints.frombytes(data[start:end])
+    if sys.byteorder == 'big':
+        ints.byteswap()
+    ints = ints.tolist()
+    text = data[end:end + size].decode('utf-8')
+
+    table = []
+    offset = 0
+    for length in ints[1:ints[0] + 1]:
+        table.append(text[offset:offset + length])
+        offset += length
+    pos = ints[0] + 1
+
+    def value(pos, literal=None):
+        tag = ints[pos]
+        if tag == _SAME:
+            return literal, pos + 1
+        if tag == _QUOTED:
+            return literal[1:-1], pos + 1
+        if tag in _CONSTANTS:
+            return _CONSTANTS[tag], pos + 1
+        if tag in (_TUPLE, _LIST):
+            items = []
+            pos += 2
+            for _ in range(ints[pos - 1]):
+                item, pos = value(pos)
+                items.append(item)
+            return (tuple(items) if tag == _TUPLE else items), pos
+        string = table[ints[pos + 1]]
+        if tag == _STR:
+            return string, pos + 2
+        if tag == _INT:
+            return int(string), pos + 2
+        if tag == _FLOAT:
+            return float(string), pos + 2
+        if tag == _BYTES:
+            return string.encode('latin-1'), pos + 2
+        if tag == _DATETIME:
+            stamp = datetime.datetime.strptime(string, _DATETIME_FORMAT)
+            offset = table[ints[pos + 2]]
+            if offset:
+                stamp = stamp.replace(tzinfo=datetime.timezone(
+                    datetime.timedelta(seconds=float(offset))))
+            return stamp, pos + 3
+        if tag == _DATE:
+            return datetime.datetime.strptime(
+                string, _DATE_FORMAT).date(), pos + 2
+        raise ValueError('unknown value tag {}'.format(tag))
+
+    nodes = []
+    count = ints[pos]
+    pos += 1
+    for _ in range(count):
+        kind, name = ints[pos], table[ints[pos + 1]]
+        options = []
+        pos += 3
+        for _ in range(ints[pos - 1]):
+            key = table[ints[pos]]
+            option, pos = value(pos + 1)
+            options.append((key, option))
+        if kind == _IN:
+            mode, length = ints[pos], ints[pos + 1]
+            pos += 2
+            literals = [table[i] for i in ints[pos:pos + length]]
+            pos += length
+            if mode == _IN_QUOTED:
+                values = list(map(_UNQUOTE, literals))
+            elif mode == _IN_INT:
+                values = list(map(int, literals))
+            else:
+                values = []
+                for literal in literals:
+                    item, pos = value(pos, literal)
+                    values.append(item)
+            nodes.append(InExpression._from_literals(name, options, literals,
+                                                     values))
+            continue
+
+        length = ints[pos]
+        pos += 1
+        fields = []
+        for _ in range(length):
+            field_name = ints[pos + 1]
+            field_name = table[field_name - 1] if field_name else None
+            if ints[pos] == _NODE_FIELD:
+                child = nodes[ints[pos + 2]]
+                fields.append(FieldValue._make(field_name, child, None))
+                pos += 3
+            else:
+                literal = table[ints[pos + 2]]
+                raw, pos = value(pos + 3, literal)
+                fields.append(FieldValue._make(field_name, None, literal, raw))
+        nodes.append(Expression._make(name, options, fields))
+    return nodes[-1]
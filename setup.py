@@ -50,11 +50,13 @@ classifiers = [
     'Environment :: Console',
     'Intended Audience :: Developers',
     'License :: OSI Approved :: MIT License',
-    'Programming Language :: Python :: 2',
-    'Programming Language :: Python :: 2.7',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.3',
-    'Programming Language :: Python :: 3.4',
+    'Programming Language :: Python :: 3 :: Only',
+    'Programming Language :: Python :: 3.7',
+    'Programming Language :: Python :: 3.8',
+    'Programming Language :: Python :: 3.9',
+    'Programming Language :: Python :: 3.10',
+    'Programming Language :: Python :: 3.11',
     'Programming Language :: Python :: Implementation :: CPython',
     'Programming Language :: Python :: Implementation :: PyPy',
     'Topic :: Internet :: WWW/HTTP',
@@ -72,8 +74,10 @@ setup(
     author='tell-k',
     author_email='ffk2005 at gmail.com',
     classifiers=classifiers,
+    python_requires='>=3.7',
     install_requires=requires,
     tests_require=tests_require,
+    extras_require={'numpy': ['numpy']},
     cmdclass={'test': PyTest},
     packages=find_packages(exclude=['tests']),
     license='MIT',
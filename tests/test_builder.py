@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_builder
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.builder
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+
+class TestQueryBuilder(object):
+
+    def _get_target_class(self):
+        from csquery.builder import QueryBuilder
+        return QueryBuilder
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_append(self):
+        from csquery.structured import and_, term, field
+
+        target = self._make_one('and', boost=2)
+        assert '(and boost=2 )' == target()
+        target.append({'genres': 'sf'})
+        target.append(term('star', field='title'))
+        target.extend(['free', field(2000, 'year')])
+
+        assert and_({'genres': 'sf'}, term('star', field='title'), 'free',
+                    year=2000, boost=2)() == target()
+        assert 4 == len(target)
+        assert {'genres': 'sf'} in target
+        assert {'genres': 'drama'} not in target
+
+    def test_rendered_once(self, monkeypatch):
+        from csquery import structured
+        from csquery.structured import or_
+
+        rendered = []
+        render = structured.render
+
+        def counting(node):
+            rendered.append(node)
+            return render(node)
+
+        monkeypatch.setattr(structured, 'render', counting)
+        target = self._make_one('and')
+        for i in range(10):
+            target.append(or_(title='star', year=i))
+            target()
+        assert 10 == len(rendered)
+        assert 10 == target().count('(or ')
+
+    def test_remove(self):
+        from csquery.structured import term
+
+        target = self._make_one('or', [{'genres': 'sf'},
+                                       term('star', field='title'),
+                                       {'genres': 'sf'}])
+        target.remove({'genres': 'sf'})
+        assert "(or (term field=title 'star') genres:'sf')" == target()
+        target.remove(term('star', field='title'))
+        assert "(or genres:'sf')" == target()
+        with pytest.raises(ValueError):
+            target.remove({'genres': 'drama'})
+        target.clear()
+        assert '(or )' == target()
+
+    def test_freeze(self):
+        from csquery.structured import and_, term, Expression
+
+        target = self._make_one('and', [term('star', field='title')],
+                                boost=2)
+        target.append({'year': 2000})
+        actual = target.freeze()
+        assert isinstance(actual, Expression)
+        assert and_(term('star', field='title'), year=2000, boost=2) == actual
+        assert actual() is target()
+
+        # later changes do not affect the frozen expression.
+        target.append({'genres': 'sf'})
+        assert "(and boost=2 (term field=title 'star') year:2000)" == actual()
+        assert 3 == len(target)
+
+    def test_from_expression(self):
+        from csquery.structured import or_
+
+        target = self._make_one().from_expression(
+            or_(title='star', boost=2))
+        target.append({'actor': 'ford'})
+        assert "(or boost=2 title:'star' actor:'ford')" == target()
+        assert "<QueryBuilder: (or boost=2 title:'star' actor:'ford')>" == \
+            repr(target)
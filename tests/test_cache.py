@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_cache
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.cache
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+
+class TestDigest(object):
+
+    def _get_target(self):
+        from csquery.cache import digest
+        return digest
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.cache import fingerprint
+        from csquery.structured import and_, or_
+
+        a = and_(or_(a=1, b=2), title='star')
+        b = and_({'title': 'star'}, or_(b=2, a=1))
+        assert isinstance(self._call_fut(a), bytes)
+        assert 20 == len(self._call_fut(a))
+        assert self._call_fut(a) == self._call_fut(b)
+        assert fingerprint(a) == self._call_fut(a).hex()
+
+
+class TestFingerprint(object):
+
+    def _get_target(self):
+        from csquery.cache import fingerprint
+        return fingerprint
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_commutative(self):
+        from csquery.structured import and_, or_, not_, term, in_
+
+        a = and_({'title': 'star'}, {'actors': 'Harrison Ford'},
+                 or_(term('x', field='plot'), in_('id', ['1', '2'])),
+                 boost=2)
+        b = and_(or_(or_({'id': '2'}, {'id': '1'}), term('x', field='plot')),
+                 {'actors': 'Harrison Ford'}, title='star', boost=2)
+        assert a() != b()
+        assert self._call_fut(a) == self._call_fut(b)
+        assert 40 == len(self._call_fut(a))
+
+        # but not for the other operators.
+        assert self._call_fut(not_(a)) == self._call_fut(not_(b))
+        assert self._call_fut(term('a', 'b')) != self._call_fut(
+            term('b', 'a'))
+
+    def test_options(self):
+        from csquery.structured import Expression, and_, near
+
+        assert self._call_fut(
+            Expression('near', [('field', 'plot'), ('distance', 2)], 'a')
+        ) == self._call_fut(near('a', field='plot', distance=2))
+        assert self._call_fut(and_(a=1, boost=2)) != self._call_fut(
+            and_(a=1))
+        assert self._call_fut(and_(a=1)) != self._call_fut(and_(b=1))
+        assert self._call_fut(and_(a=1)) != self._call_fut(and_(a='1'))
+        assert self._call_fut(and_(and_(a=1))) != self._call_fut(
+            and_(a=1))
+
+    def test_stable(self):
+        import subprocess
+        import sys
+        from csquery.structured import and_
+
+        code = ('from csquery.structured import and_;'
+                'from csquery.cache import fingerprint;'
+                'print(fingerprint(and_(title="star", year=(1990, 2000))))')
+        actual = subprocess.check_output([sys.executable, '-c', code])
+        assert self._call_fut(and_(title='star', year=(1990, 2000))) == \
+            actual.decode('ascii').strip()
+
+
+class TestCanonicalize(object):
+
+    def _get_target(self):
+        from csquery.cache import canonicalize
+        return canonicalize
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_, or_, term, in_, Expression
+
+        a = and_({'title': 'star'}, {'actors': 'Harrison Ford'},
+                 or_(term('x', field='plot'), in_('id', ['1', '2'])),
+                 Expression('near', [('field', 'plot'), ('distance', 2)],
+                            'a'))
+        b = and_(or_(in_('id', ['2', '1']), term('x', field='plot')),
+                 Expression('near', [('distance', 2), ('field', 'plot')],
+                            'a'),
+                 {'actors': 'Harrison Ford'}, title='star')
+        assert self._call_fut(a)() == self._call_fut(b)()
+        assert sorted(a()) == sorted(self._call_fut(a)())
+
+    def test_deep(self):
+        from csquery.structured import and_
+
+        q = and_(title='star')
+        for i in range(20000):
+            q = and_(q, year=i)
+        assert sorted(q()) == sorted(self._call_fut(q)())
+
+
+class TestCacheKey(object):
+
+    def _get_target(self):
+        from csquery.cache import cache_key
+        return cache_key
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_
+        from csquery.cache import fingerprint
+
+        q = and_(title='star')
+        assert fingerprint(q) == self._call_fut(q)
+        assert self._call_fut(q, {'size': 10, 'return': 'title'}) == \
+            self._call_fut(q, {'return': 'title', 'size': 10})
+        assert self._call_fut(q, {'size': 10}) != self._call_fut(
+            q, {'size': 20})
+
+
+class TestResponseCache(object):
+
+    def _get_target_class(self):
+        from csquery.cache import ResponseCache
+        return ResponseCache
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_get_or_search(self):
+        from csquery.structured import and_
+
+        calls = []
+
+        def search(q, **params):
+            calls.append((q, params))
+            return {'hits': {'hit': [q]}}
+
+        target = self._make_one()
+        first = target.get_or_search(and_(title='star', actor='a'), search,
+                                     size=10)
+        second = target.get_or_search(and_({'title': 'star'}, actor='a'),
+                                      search, size=10)
+        target.get_or_search(and_(title='star', actor='a'), search, size=20)
+
+        assert first is second
+        assert [("(and actor:'a' title:'star')", {'size': 10}),
+                ("(and actor:'a' title:'star')", {'size': 20})] == calls
+        info = target.info()
+        assert (1, 2, 2) == (info.hits, info.misses, info.currsize)
+
+    def test_ttl(self):
+        from csquery.structured import and_
+
+        now = [0.0]
+        target = self._make_one(ttl=10, clock=lambda: now[0])
+        target.set(and_(a=1), 'response')
+        now[0] = 9.9
+        assert 'response' == target.get(and_(a=1))
+        now[0] = 10.0
+        assert target.get(and_(a=1)) is None
+        info = target.info()
+        assert (1, 1, 1, 0) == (info.hits, info.misses, info.expirations,
+                                info.currsize)
+
+    def test_lru(self):
+        from csquery.structured import and_
+
+        target = self._make_one(maxsize=2)
+        target.set(and_(a=1), 1)
+        target.set(and_(a=2), 2)
+        assert 1 == target.get(and_(a=1))
+        target.set(and_(a=3), 3)
+
+        assert target.get(and_(a=2)) is None
+        assert 1 == target.get(and_(a=1))
+        assert 3 == target.get(and_(a=3))
+        assert 1 == target.info().evictions
+        assert 2 == len(target)
+        target.clear()
+        assert 0 == len(target)
+
+    def test_backend(self):
+        from csquery.structured import and_
+        from csquery.cache import CacheBackend
+
+        class Backend(CacheBackend):
+
+            def __init__(self):
+                self.data = {}
+
+            def get(self, key):
+                return self.data.get(key)
+
+            def set(self, key, value, ttl):
+                self.data[key] = value
+
+        backend = Backend()
+        self._make_one(backend=backend).set(and_(a=1), 'shared')
+        target = self._make_one(backend=backend)
+        assert 'shared' == target.get(and_(a=1))
+        assert 1 == len(target)
+        assert target.get(and_(a=2)) is None
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_cli
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.cli
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import io
+import json
+
+import pytest
+
+
+def _spec(i):
+    return {
+        'op': 'and',
+        'args': [{'op': 'term', 'args': ['star {}'.format(i)],
+                  'kwargs': {'field': 'title', 'boost': 2}},
+                 {'genres': 'sf'}],
+        'kwargs': {'year': [1990, 2000 + i]},
+    }
+
+
+class TestRenderStream(object):
+
+    def _get_target(self):
+        from csquery.cli import render_stream
+        return render_stream
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_ordered(self):
+        from csquery.specs import build
+
+        lines = [json.dumps(_spec(i)) for i in range(50)]
+        expected = [build(_spec(i))() for i in range(50)]
+        assert expected == list(self._call_fut(lines, jobs=1, chunk_size=7))
+        assert expected == list(self._call_fut(lines, jobs=2, chunk_size=7,
+                                               window=2))
+
+    def test_error(self):
+        lines = [json.dumps(_spec(1)), '', '{"op": "xor"}']
+        with pytest.raises(ValueError) as e:
+            list(self._call_fut(lines, jobs=2, chunk_size=2))
+        assert 'line 3: ' in str(e.value)
+
+
+class TestMain(object):
+
+    def _get_target(self):
+        from csquery.cli import main
+        return main
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self, tmpdir, capsys):
+        src = tmpdir.join('specs.jsonl')
+        dst = tmpdir.join('queries.txt')
+        src.write('\n'.join(json.dumps(_spec(i)) for i in range(3)) + '\n')
+
+        assert 0 == self._call_fut([str(src), '-o', str(dst), '-j', '1'])
+        with io.open(str(dst), encoding='utf-8') as f:
+            assert [
+                "(and (term field=title boost=2 'star 0') genres:'sf' "
+                "year:[1990,2000])",
+                "(and (term field=title boost=2 'star 1') genres:'sf' "
+                "year:[1990,2001])",
+                "(and (term field=title boost=2 'star 2') genres:'sf' "
+                "year:[1990,2002])",
+            ] == f.read().splitlines()
+        assert '3 records in ' in capsys.readouterr().err
+
+    def test_error(self, tmpdir, capsys):
+        src = tmpdir.join('specs.jsonl')
+        src.write('{"op": "and", "args": [{"a": 1}]}\nnot json\n')
+
+        assert 1 == self._call_fut([str(src), '-o', str(tmpdir.join('out')),
+                                    '-j', '1', '-q'])
+        assert capsys.readouterr().err.startswith('error: line 2: ')
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_client
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.client
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import asyncio
+import time
+
+import pytest
+
+
+class TestAsyncSearchClient(object):
+
+    def _get_target_class(self):
+        from csquery.client import AsyncSearchClient
+        return AsyncSearchClient
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_search(self):
+        from csquery.structured import and_
+        from csquery.testing import StubSearchServer, hits
+
+        async def run(endpoint):
+            async with self._make_one(endpoint) as client:
+                return await client.search(
+                    and_(title='star', year=('', 2000)), size=5,
+                    **{'return': 'title'})
+
+        with StubSearchServer(lambda params: hits(['a', 'b'])) as stub:
+            actual = asyncio.run(run(stub.endpoint))
+            params = stub.requests[0]
+
+        assert hits(['a', 'b']) == actual
+        assert {
+            'q': "(and title:'star' year:{,2000])",
+            'q.parser': 'structured',
+            'size': '5',
+            'return': 'title',
+        } == params
+
+    def test_send(self):
+        from csquery.request import SearchRequest
+        from csquery.structured import and_
+        from csquery.testing import StubSearchServer, hits
+
+        request = SearchRequest(and_(title='star'), return_=['title'],
+                                size=5)
+
+        async def run(endpoint):
+            async with self._make_one(endpoint) as client:
+                await client.send(request)
+                return await client.send(request.page(start=5))
+
+        with StubSearchServer(lambda params: hits(['a'])) as stub:
+            assert hits(['a']) == asyncio.run(run(stub.endpoint))
+            assert [None, '5'] == [r.get('start') for r in stub.requests]
+            assert {
+                'q': "(and title:'star')",
+                'q.parser': 'structured',
+                'return': 'title',
+                'size': '5',
+                'start': '5',
+            } == stub.requests[1]
+
+    def test_search__text_query(self):
+        from csquery.testing import StubSearchServer, hits
+
+        async def run(endpoint):
+            async with self._make_one(endpoint) as client:
+                return await client.search('matchall',
+                                           **{'q.parser': 'lucene'})
+
+        with StubSearchServer(lambda params: hits([])) as stub:
+            asyncio.run(run(stub.endpoint))
+            assert {'q': 'matchall', 'q.parser': 'lucene'} == stub.requests[0]
+
+    def test_keep_alive_pool(self):
+        from csquery.structured import term
+        from csquery.testing import StubSearchServer, hits
+
+        def handler(params):
+            time.sleep(0.01)
+            return hits([params['q']])
+
+        async def run(endpoint):
+            async with self._make_one(endpoint, max_connections=3) as client:
+                return await asyncio.gather(*[
+                    client.search(term(i)) for i in range(30)])
+
+        with StubSearchServer(handler) as stub:
+            actual = asyncio.run(run(stub.endpoint))
+            assert 30 == len(stub.requests)
+            assert 3 >= len(stub.connections)
+
+        assert ['(term {})'.format(i) for i in range(30)] == [
+            r['hits']['hit'][0]['id'] for r in actual]
+
+    def test_timeout(self):
+        from csquery.testing import StubSearchServer, hits
+
+        def handler(params):
+            if params['q'] == 'slow':
+                time.sleep(0.5)
+            return hits([])
+
+        async def run(endpoint):
+            async with self._make_one(endpoint, timeout=5) as client:
+                with pytest.raises(asyncio.TimeoutError):
+                    await client.search('slow', timeout=0.05)
+                return await client.search('fast')
+
+        with StubSearchServer(handler) as stub:
+            assert hits([]) == asyncio.run(run(stub.endpoint))
+
+    def test_error(self):
+        from csquery.client import SearchError
+        from csquery.testing import StubSearchServer
+
+        async def run(endpoint):
+            async with self._make_one(endpoint) as client:
+                await client.search('matchall')
+
+        handler = lambda params: (400, {'message': 'bad query'})  # NOQA
+        with StubSearchServer(handler) as stub:
+            with pytest.raises(SearchError) as e:
+                asyncio.run(run(stub.endpoint))
+        assert 400 == e.value.status
+
+    def test_stale_connection(self):
+        from csquery.testing import StubSearchServer, hits
+
+        async def run(endpoint):
+            async with self._make_one(endpoint) as client:
+                await client.search('first')
+                # the server dropped the idle connection.
+                connection = client.pool._idle[0]
+                connection.writer.transport.abort()
+                await asyncio.sleep(0)
+                connection.is_open = lambda: True
+                return await client.search('second')
+
+        with StubSearchServer(lambda params: hits(['a'])) as stub:
+            assert hits(['a']) == asyncio.run(run(stub.endpoint))
+            assert ['first', 'second'] == [r['q'] for r in stub.requests]
+            assert 2 == len(stub.connections)
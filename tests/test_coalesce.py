@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_coalesce
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.coalesce
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+class TestCoalescer(object):
+
+    def _get_target_class(self):
+        from csquery.coalesce import Coalescer
+        return Coalescer
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_search(self):
+        from csquery.structured import and_
+        from csquery.testing import StubSearchServer, hits
+
+        release = threading.Event()
+
+        def handler(params):
+            release.wait(5)
+            return hits([params['q']])
+
+        target = self._make_one()
+        results = []
+
+        def worker(i):
+            # the same query, written in different orders.
+            q = and_(title='star', actors='a') if i % 2 else \
+                and_({'title': 'star'}, {'actors': 'a'})
+            results.append(target.search(q, stub.search, size=10))
+
+        with StubSearchServer(handler) as stub:
+            threads = [threading.Thread(target=worker, args=(i,))
+                       for i in range(8)]
+            for t in threads:
+                t.start()
+            _wait_for(lambda: target.info().deduplicated == 7)
+            release.set()
+            for t in threads:
+                t.join()
+
+            assert 1 == len(stub.requests)
+            assert '10' == stub.requests[0]['size']
+
+        assert 8 == len(results)
+        assert all(r is results[0] for r in results)
+        assert (8, 1, 7, 0) == target.info()
+
+        # finished searches are not shared with later ones.
+        with StubSearchServer(handler) as stub:
+            target.search(and_(title='star', actors='a'), stub.search,
+                          size=10)
+            target.search(and_(title='star', actors='a'), stub.search,
+                          size=20)
+            assert 2 == len(stub.requests)
+        assert (10, 3, 7, 0) == target.info()
+
+    def test_error(self):
+        from csquery.structured import term
+
+        release = threading.Event()
+        errors = []
+
+        def search(q):
+            release.wait(5)
+            raise ValueError(q)
+
+        target = self._make_one()
+
+        def worker():
+            try:
+                target.search(term('a'), search)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for i in range(3)]
+        for t in threads:
+            t.start()
+        _wait_for(lambda: target.info().deduplicated == 2)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert 3 == len(errors)
+        assert "(term 'a')" == str(errors[0])
+        assert 0 == target.info().in_flight
+
+
+class TestAsyncCoalescer(object):
+
+    def _get_target_class(self):
+        from csquery.coalesce import AsyncCoalescer
+        return AsyncCoalescer
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_search(self):
+        from csquery.client import AsyncSearchClient
+        from csquery.structured import and_, term
+        from csquery.testing import StubSearchServer, hits
+
+        def handler(params):
+            time.sleep(0.05)
+            return hits([params['q']])
+
+        target = self._make_one()
+
+        async def run(endpoint):
+            async with AsyncSearchClient(endpoint) as client:
+                return await asyncio.gather(*[
+                    target.search(and_(term('a'), term('b')) if i % 2 else
+                                  and_(term('b'), term('a')), client.search)
+                    for i in range(20)
+                ] + [target.search(term('c'), client.search)])
+
+        with StubSearchServer(handler) as stub:
+            actual = asyncio.run(run(stub.endpoint))
+            assert 2 == len(stub.requests)
+
+        assert all(r is actual[0] for r in actual[:20])
+        assert hits(["(term 'c')"]) == actual[20]
+        assert (21, 2, 19, 0) == target.info()
+
+    def test_cancel(self):
+        from csquery.structured import term
+
+        calls = []
+
+        async def search(q):
+            calls.append(q)
+            await asyncio.sleep(0.05)
+            return q
+
+        target = self._make_one()
+
+        async def run():
+            first = asyncio.ensure_future(target.search(term('a'), search))
+            second = asyncio.ensure_future(target.search(term('a'), search))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert "(term 'a')" == asyncio.run(run())
+        assert ["(term 'a')"] == calls
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_cost
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.cost
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+
+def _expression():
+    from csquery.structured import and_, or_, not_, term, near, phrase, \
+        prefix, in_
+
+    return and_(
+        or_(term('star', field='title', boost=2),
+            near('star wars', field='plot', distance=3),
+            prefix('st', field='title'), prefix('wars')),
+        not_(phrase('ひとつ', field='plot')),
+        in_('id', ['tt1', 'tt2', 'tt3']),
+        and_(),
+        year=(1977, 2000),
+    )
+
+
+class TestCost(object):
+
+    def _get_target(self):
+        from csquery.cost import cost
+        return cost
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.optimizer import count_nodes
+
+        expression = _expression()
+        actual = self._call_fut(expression)
+        assert count_nodes(expression) == actual.nodes
+        assert 3 == actual.depth
+        assert len(expression().encode('utf-8')) == actual.bytes
+        assert (2, 1, 1, 2, 4) == (actual.prefixes, actual.near,
+                                   actual.phrases, actual.shortest_prefix,
+                                   actual.widest_or)
+        assert actual.nodes + 2 * 3 + 0.05 * actual.bytes + 40 + 30 + 10 \
+            == pytest.approx(actual.score)
+
+        assert 1 == self._call_fut(expression, {'near': 1}).score
+
+    def test_shared_and_deep(self):
+        from csquery.structured import and_, or_
+
+        shared = or_(title='star', actor='ford')
+        expression = and_(shared, and_(shared))
+        assert len(expression()) == self._call_fut(expression).bytes
+
+        expression = and_(title='star')
+        for i in range(20000):
+            expression = and_(expression, year=i)
+        actual = self._call_fut(expression)
+        assert 20001 == actual.depth
+        assert len(expression()) == actual.bytes
+
+
+class TestDowngrade(object):
+
+    def _get_target(self):
+        from csquery.cost import downgrade
+        return downgrade
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        expression = _expression()
+        assert ("(and (or (term field=title boost=2 'star') "
+                "(phrase field=plot 'star wars') (term field=title 'st') "
+                "(prefix 'wars')) (not (phrase field=plot 'ひとつ')) "
+                "(or id:'tt1' id:'tt2' id:'tt3') (and ) year:[1977,2000])"
+                ) == self._call_fut(expression, 3)()
+
+    def test_unchanged(self):
+        from csquery.structured import and_, prefix
+
+        expression = and_(prefix('star'), title='star')
+        assert expression is self._call_fut(expression, 3)
+
+
+class TestPolicy(object):
+
+    def _get_target_class(self):
+        from csquery.cost import Policy
+        return Policy
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_allowed(self):
+        expression = _expression()
+        assert expression is self._make_one().apply(expression)
+        assert expression is self._make_one(
+            max_nodes=100, max_or=10).apply(expression)
+
+    def test_reject(self):
+        from csquery.cost import QueryRejected
+
+        target = self._make_one(max_or=3, max_near=0, min_prefix_length=3)
+        with pytest.raises(QueryRejected) as e:
+            target.apply(_expression())
+        assert ['1 near clauses > 0', '4 clauses in one or > 3',
+                'prefix of 2 characters < 3'] == e.value.reasons
+        assert 1 == e.value.cost.near
+
+    def test_downgrade(self):
+        from csquery.cost import QueryRejected
+
+        target = self._make_one(max_near=0, min_prefix_length=3,
+                                action='downgrade')
+        actual = target.apply(_expression())
+        assert 0 == actual().count('(near')
+        assert "(term field=title 'st')" in actual()
+
+        target = self._make_one(max_near=0, max_or=3, action='downgrade')
+        with pytest.raises(QueryRejected) as e:
+            target.apply(_expression())
+        assert ['4 clauses in one or > 3'] == e.value.reasons
+
+        target = self._make_one(max_prefixes=0, action='downgrade',
+                                downgrade=lambda e, policy: e.fields[1]
+                                .expression)
+        assert '(not ' in target.apply(_expression())()
+
+    def test_invalid_action(self):
+        with pytest.raises(ValueError):
+            self._make_one(action='drop')
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_instrument
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.instrument
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import logging
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.events = []
+
+    def node_built(self, node):
+        self.events.append(('built', node.operator))
+
+    def rendered(self, node, seconds, size, depth):
+        assert seconds >= 0
+        self.events.append(('rendered', size, depth))
+
+
+class TestInstrumented(object):
+
+    def _get_target(self):
+        from csquery.instrument import instrumented
+        return instrumented
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_events(self):
+        from csquery import structured
+        from csquery.structured import and_, or_, in_
+
+        recorder = Recorder()
+        with self._call_fut(recorder):
+            q = and_(or_(title='star', actor='ford'), in_('id', [1, 2]),
+                     title='é')
+            q()
+            q()
+        and_(a=1)()
+
+        assert structured._instrument is None
+        assert [
+            ('built', 'or'), ('built', 'or'), ('built', 'and'),
+            ('rendered', len(q().encode('utf-8')), 2),
+        ] == recorder.events
+
+    def test_restore(self):
+        from csquery.structured import set_instrument
+
+        first, second = Recorder(), Recorder()
+        assert set_instrument(first) is None
+        try:
+            with self._call_fut(second):
+                pass
+            assert set_instrument(first) is first
+        finally:
+            set_instrument(None)
+
+
+class TestTreeDepth(object):
+
+    def _get_target(self):
+        from csquery.structured import tree_depth
+        return tree_depth
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_, or_, not_, in_
+
+        assert 1 == self._call_fut(and_(a=1))
+        assert 3 == self._call_fut(and_(or_(not_(a=1)), in_('id', [1])))
+
+
+class TestHistogram(object):
+
+    def _get_target_class(self):
+        from csquery.instrument import Histogram
+        return Histogram
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_it(self):
+        target = self._make_one()
+        assert None is target.percentile(50)
+        for value in range(1, 101):
+            target.add(value)
+        target.add(0)
+
+        snapshot = target.snapshot()
+        assert (101, 0, 100) == (snapshot['count'], snapshot['min'],
+                                 snapshot['max'])
+        assert 50 == snapshot['mean']
+        # bounds of the buckets, at most twice the exact percentile.
+        assert 64 == snapshot['p50']
+        assert 100 == snapshot['p99']
+        assert 0 == target.percentile(0)
+
+
+class TestHistogramCollector(object):
+
+    def _get_target_class(self):
+        from csquery.instrument import HistogramCollector
+        return HistogramCollector
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.instrument import instrumented
+        from csquery.structured import and_, or_
+
+        target = self._make_one()
+        with instrumented(target):
+            for i in range(10):
+                and_(or_(year=i), title='star')()
+
+        snapshot = target.snapshot()
+        assert 20 == snapshot['nodes_built']
+        assert {'and': 10, 'or': 10} == snapshot['operators']
+        assert 10 == snapshot['render_bytes']['count']
+        assert len("(and (or year:0) title:'star')") == \
+            snapshot['render_bytes']['max']
+        assert 2 == snapshot['depth']['p99']
+        assert snapshot['render_seconds']['mean'] > 0
+
+        target.reset()
+        assert 0 == target.snapshot()['nodes_built']
+
+
+class TestLoggingInstrument(object):
+
+    def _get_target_class(self):
+        from csquery.instrument import LoggingInstrument
+        return LoggingInstrument
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_it(self, caplog):
+        from csquery.instrument import instrumented
+        from csquery.structured import and_
+
+        caplog.set_level(logging.DEBUG, logger='csquery')
+        with instrumented(self._make_one(builds=True)):
+            and_(title='star')()
+
+        assert ['built and node', 'rendered 18 bytes, depth 1 in '] == [
+            r.getMessage()[:30] for r in caplog.records]
+        assert all('csquery' == r.name for r in caplog.records)
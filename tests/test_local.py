@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_local
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.local
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+DOCUMENTS = {
+    'title': ['Star Wars', 'Star Trek', 'The Wars of the Stars',
+              "Ender's Game", 'Starship Troopers'],
+    'genres': ['sf', 'sf', 'drama', 'sf', 'action'],
+    'year': [1977, 1979, 1990, 2013, 1997],
+    'rating': numpy.array([8.6, 6.4, 5.0, 6.6, 7.3]),
+    'released': numpy.array(['1977-05-25', '1979-12-07', '1990-01-01',
+                             '2013-11-01', '1997-11-07'],
+                            dtype='datetime64[D]'),
+}
+
+
+class TestLocalIndex(object):
+
+    def _get_target_class(self):
+        from csquery.local import LocalIndex
+        return LocalIndex
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def _search(self, expression):
+        target = self._make_one(DOCUMENTS, text_fields=['title'])
+        return target.search(expression).tolist()
+
+    def test_field_value(self):
+        from csquery.structured import and_, or_, not_
+
+        assert [0, 1, 3] == self._search(and_(genres='sf'))
+        assert [0, 2] == self._search(and_(title='wars'))
+        assert [0] == self._search(and_(title='star wars', genres='sf'))
+        assert [0, 1, 4] == self._search(or_(year=(1970, 1980),
+                                             genres='action'))
+        assert [2, 4] == self._search(not_(genres='sf'))
+        assert [1] == self._search(and_(year=1979))
+        assert [] == self._search(and_(genres='horror'))
+
+    def test_term_phrase_prefix(self):
+        from csquery.structured import and_, term, phrase, prefix
+
+        assert [0, 2] == self._search(term('Wars', field='title'))
+        assert [0] == self._search(phrase('star wars', field='title'))
+        assert [2] == self._search(phrase('of the stars', field='title'))
+        assert [0, 1, 2, 4] == self._search(prefix('sta', field='title'))
+        assert [0, 1, 3] == self._search(prefix('s', field='genres'))
+        # without a field, the default fields are searched.
+        assert [3] == self._search(and_(term('game'), phrase("ender's")))
+        assert [3] == self._search(term(2013, field='year'))
+
+    def test_range(self):
+        from csquery.structured import range_, and_
+
+        assert [1, 2, 4] == self._search(range_((1978, 1997),
+                                                field='year'))
+        assert [2, 4] == self._search(range_('{1979,1997]', field='year'))
+        assert [0, 4] == self._search(and_(rating=(7, '')))
+        assert [2, 4] == self._search(range_(('a', 'e'), field='genres'))
+        assert [1, 2, 4] == self._search(range_(
+            ('1978-01-01T00:00:00Z', '2000-01-01T00:00:00Z'),
+            field='released'))
+
+    def test_in(self):
+        from csquery.structured import in_
+
+        assert [0, 3] == self._search(in_('year', [1977, 2013, 1]))
+        assert [2, 4] == self._search(in_('genres', ['drama', 'action']))
+        assert [0, 1, 4] == self._search(
+            in_('title', ['trek', 'star wars', 'troopers']))
+
+    def test_field_option(self):
+        from csquery.structured import not_
+
+        assert [0, 1, 2, 3] == self._search(not_('action', field='genres'))
+        assert [2, 4] == self._search(not_('sf', field='genres'))
+        assert [2, 4] == self._search("(or field=genres 'drama' 'action')")
+        assert [0, 1, 3] == self._search("(and field=genres 'sf')")
+
+    def test_bool(self):
+        from csquery.structured import and_, not_
+
+        target = self._make_one({'active': numpy.array([True, False, True]),
+                                 'flag': [False, False, True]})
+        assert [0, 2] == target.search(and_(active=True)).tolist()
+        assert [0, 2] == target.search(not_(active=False)).tolist()
+        assert [1] == target.search("(and active:'false')").tolist()
+        assert [2] == target.search(and_(active=True, flag='true')).tolist()
+        assert [0, 1] == target.search(and_(flag=0)).tolist()
+
+    def test_text_query(self):
+        q = "(and (or genres:'sf' genres:'action') (not title:'trek'))"
+        assert [0, 3, 4] == self._search(q)
+
+    def test_same_as_documents(self):
+        import random
+        from csquery.structured import and_, or_, not_
+
+        random.seed(0)
+        size = 2000
+        columns = {
+            'genres': [random.choice('abcde') for _ in range(size)],
+            'year': numpy.random.RandomState(0).randint(1950, 2020, size),
+        }
+        target = self._make_one(columns)
+        expression = or_(and_(genres='a', year=(1990, 2000)),
+                         not_(or_(genres='b', year=('', 2010))))
+        expected = [
+            i for i in range(size)
+            if (columns['genres'][i] == 'a' and
+                1990 <= columns['year'][i] <= 2000) or
+            not (columns['genres'][i] == 'b' or columns['year'][i] <= 2010)]
+        assert expected == target.search(expression).tolist()
+
+    def test_errors(self):
+        from csquery.structured import and_, near, prefix
+
+        target = self._make_one(DOCUMENTS)
+        with pytest.raises(ValueError):
+            target.match(and_(director='lucas'))
+        with pytest.raises(ValueError):
+            target.match(near('star wars', field='title'))
+        with pytest.raises(ValueError):
+            target.match(prefix('19', field='year'))
+        with pytest.raises(ValueError):
+            self._make_one({'a': [1, 2], 'b': [1]})
+        with pytest.raises(ValueError):
+            self._make_one({'a': [1]}, text_fields=['b'])
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_optimizer
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.optimizer
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+
+class TestOptimize(object):
+
+    def _get_target(self):
+        from csquery.optimizer import optimize
+        return optimize
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_flatten(self):
+        from csquery.structured import and_, or_
+
+        q = and_(and_(title='a', actor='b'), and_(year=1), or_(a=1, b=2))
+        actual = self._call_fut(q)
+        assert "(and actor:'b' title:'a' year:1 (or a:1 b:2))" == \
+            actual.expression()
+        assert 4 == actual.nodes_removed
+        assert len(q()) - len(actual.expression()) == actual.bytes_removed
+
+    def test_flatten__with_boost(self):
+        from csquery.structured import and_, or_
+
+        q = or_(or_(a=1, boost=2), or_(b=2), boost=3)
+        actual = self._call_fut(q)
+        assert '(or boost=3 (or boost=2 a:1) b:2)' == actual.expression()
+
+        q = and_(and_(and_(a=1), boost=2), b=2)
+        actual = self._call_fut(q)
+        assert '(and (and boost=2 a:1) b:2)' == actual.expression()
+
+    def test_single_clause(self):
+        from csquery.structured import and_, or_, not_
+
+        assert "(or a:1 b:2)" == self._call_fut(
+            and_(or_(a=1, b=2))).expression()
+        assert "(not a:1)" == self._call_fut(
+            not_(or_(a=1))).expression()
+        assert "(and a:1)" == self._call_fut(and_(a=1)).expression()
+
+    def test_deduplicate(self):
+        from csquery.structured import or_, and_, term
+
+        q = or_(term('x', field='t'), term('x', field='t'),
+                or_(term('x', field='t'), a=1), a=1)
+        actual = self._call_fut(q)
+        assert "(or (term field=t 'x') a:1)" == actual.expression()
+
+        q = and_({'a': 1}, {'a': '1'}, {'a': 1})
+        actual = self._call_fut(q)
+        assert "(and a:1 a:'1')" == actual.expression()
+
+    def test_double_not(self):
+        from csquery.structured import and_, not_
+
+        q = and_(not_(not_(and_(a=1, b=2))), not_(not_('x')), c=3)
+        actual = self._call_fut(q)
+        assert "(and a:1 b:2 'x' c:3)" == actual.expression()
+
+        q = not_(not_(and_(a=1, b=2)))
+        assert '(and a:1 b:2)' == self._call_fut(q).expression()
+
+        q = not_(not_('x', field='title'))
+        assert q() == self._call_fut(q).expression()
+        q = not_(not_('x'), boost=2)
+        assert q() == self._call_fut(q).expression()
+
+    def test_ranges(self):
+        from csquery.structured import and_, range_
+
+        q = and_(range_((1990, 2010), field='year'),
+                 range_((2000, None), field='year'),
+                 range_((1995, 2000), field='date'),
+                 title='x')
+        actual = self._call_fut(q)
+        expected = "(and (range field=year [2000,2010]) "
+        expected += "(range field=date [1995,2000]) title:'x')"
+        assert expected == actual.expression()
+
+        q = and_({'year': (1990, 2010)}, {'year': '{2000,2020]'},
+                 {'year': ('', 2005)})
+        assert '(and year:{2000,2005])' == self._call_fut(q).expression()
+
+        q = and_({'d': "['2000-01-01T00:00:00Z','2010-01-01T00:00:00Z'}"},
+                 {'d': "['2005-01-01T00:00:00Z',}"})
+        expected = "(and d:['2005-01-01T00:00:00Z','2010-01-01T00:00:00Z'})"
+        assert expected == self._call_fut(q).expression()
+
+    def test_ranges__dates(self):
+        import datetime
+        from csquery.structured import and_, range_
+
+        # '.' sorts before 'Z', fractions of seconds are compared as time.
+        q = and_(range_((datetime.datetime(2000, 1, 1), None), field='d'),
+                 range_((datetime.datetime(2000, 1, 1, 0, 0, 0, 500000),
+                         None), field='d'))
+        assert "(range field=d ['2000-01-01T00:00:00.500Z',})" == \
+            self._call_fut(q).expression()
+
+        q = and_({'d': "['2000-01-01T00:00:00.05Z','2000-01-01T00:00:01Z']"},
+                 {'d': "{'2000-01-01T00:00:00.5Z','2000-01-01T00:00:00.6Z']"},
+                 {'d': "['2000-01-01T00:00:00.500Z',}"})
+        expected = "(and d:{'2000-01-01T00:00:00.5Z'," \
+            "'2000-01-01T00:00:00.6Z'])"
+        assert expected == self._call_fut(q).expression()
+
+    def test_ranges__unchanged(self):
+        from csquery.structured import and_, or_, range_
+
+        for q in [
+            # disjoint
+            and_({'year': (1990, 2000)}, {'year': (2001, 2010)}),
+            and_({'year': '[1990,2000}'}, {'year': (2000, 2010)}),
+            # not comparable
+            and_({'year': (1990, 2000)}, {'year': ('a', 'b')}),
+            and_({'d': "['2000-01-01T00:00:00+09:00',}"},
+                 {'d': "['2000-01-01T00:00:00Z',}"}),
+            # boosted
+            and_(range_((1990, 2010), field='year', boost=2),
+                 range_((2000, None), field='year')),
+            # disjunction
+            or_({'year': (1990, 2000)}, {'year': (1995, 2010)}),
+        ]:
+            actual = self._call_fut(q)
+            assert q() == actual.expression()
+            assert 0 == actual.nodes_removed
+            assert 0 == actual.bytes_removed
+
+    def test_shared_and_deep(self):
+        from csquery.structured import and_
+
+        shared = and_(and_(a=1), b=2)
+        q = and_(shared, shared)
+        for i in range(20000):
+            q = and_(q, c=i % 3)
+        actual = self._call_fut(q)
+        assert '(and a:1 b:2 c:0 c:1 c:2)' == actual.expression()
+
+
+class TestCountNodes(object):
+
+    def _get_target(self):
+        from csquery.optimizer import count_nodes
+        return count_nodes
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_, or_
+
+        assert 2 == self._call_fut(and_(a=1))
+        assert 5 == self._call_fut(and_(or_(a=1, b=2)))
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_paging
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.paging
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import asyncio
+import time
+
+import pytest
+
+IDS = ['doc{}'.format(i) for i in range(95)]
+
+
+def _paged(params):
+    """Answer like CloudSearch, the cursor is the offset of the next page.
+    """
+    start = 0 if params['cursor'] == 'initial' else int(params['cursor'])
+    size = int(params['size'])
+    return {'hits': {
+        'found': len(IDS), 'cursor': str(start + size),
+        'hit': [{'id': i} for i in IDS[start:start + size]],
+    }}
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+class TestIterHits(object):
+
+    def _get_target(self):
+        from csquery.paging import iter_hits
+        return iter_hits
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_
+        from csquery.testing import StubSearchServer
+
+        with StubSearchServer(_paged) as stub:
+            stream = self._call_fut(and_(title='star'), stub.search,
+                                    size=10, **{'return': '_no_fields'})
+            assert IDS == [hit['id'] for hit in stream]
+            assert 95 == stream.found
+            assert 10 == len(stub.requests)
+            assert ['initial'] + [str(i) for i in range(10, 100, 10)] == [
+                r['cursor'] for r in stub.requests]
+            assert {"(and title:'star')"} == set(
+                r['q'] for r in stub.requests)
+            assert '_no_fields' == stub.requests[0]['return']
+
+    def test_prefetch_is_bounded(self):
+        from csquery.testing import StubSearchServer
+
+        with StubSearchServer(_paged) as stub:
+            with self._call_fut('matchall', stub.search, size=10,
+                                prefetch=2) as stream:
+                assert 'doc0' == next(stream)['id']
+                # the current page, two pages in the queue and one more
+                # waiting for room.
+                _wait_for(lambda: len(stub.requests) == 4)
+                time.sleep(0.05)
+                assert 4 == len(stub.requests)
+                assert ['doc1', 'doc2'] == [
+                    next(stream)['id'] for _ in range(2)]
+            count = len(stub.requests)
+            time.sleep(0.05)
+            assert count == len(stub.requests)
+            assert not stream._fetcher.thread.is_alive()
+            with pytest.raises(StopIteration):
+                next(stream)
+
+    def test_dropped(self):
+        import gc
+        from csquery.testing import StubSearchServer
+
+        with StubSearchServer(_paged) as stub:
+            stream = self._call_fut('matchall', stub.search, size=10)
+            for hit in stream:
+                break
+            thread = stream._fetcher.thread
+            del stream, hit
+            gc.collect()
+            thread.join(5)
+            assert not thread.is_alive()
+            assert len(stub.requests) < 10
+
+    def test_empty(self):
+        from csquery.testing import StubSearchServer, hits
+
+        with StubSearchServer(lambda params: hits([])) as stub:
+            assert [] == list(self._call_fut('matchall', stub.search))
+            assert 1 == len(stub.requests)
+
+    def test_error(self):
+        from six.moves.urllib.error import HTTPError
+        from csquery.testing import StubSearchServer
+
+        def handler(params):
+            if params['cursor'] == '10':
+                return 500, {'message': 'internal error'}
+            return _paged(params)
+
+        with StubSearchServer(handler) as stub:
+            stream = self._call_fut('matchall', stub.search, size=10)
+            with pytest.raises(HTTPError):
+                for i, hit in enumerate(stream):
+                    assert IDS[i] == hit['id']
+            assert 9 == i
+
+
+class TestAiterHits(object):
+
+    def _get_target(self):
+        from csquery.paging import aiter_hits
+        return aiter_hits
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.client import AsyncSearchClient
+        from csquery.structured import and_
+        from csquery.testing import StubSearchServer
+
+        async def run(endpoint):
+            async with AsyncSearchClient(endpoint) as client:
+                return [hit['id'] async for hit in self._call_fut(
+                    and_(title='star'), client.search, size=30)]
+
+        with StubSearchServer(_paged) as stub:
+            assert IDS == asyncio.run(run(stub.endpoint))
+            assert 4 == len(stub.requests)
+
+    def test_cancel(self):
+        calls = []
+
+        async def search(q, **params):
+            calls.append(params['cursor'])
+            await asyncio.sleep(0)
+            return _paged(params)
+
+        async def run():
+            hits = []
+            stream = self._call_fut('matchall', search, size=10)
+            async for hit in stream:
+                hits.append(hit['id'])
+                if len(hits) == 15:
+                    break
+            await stream.aclose()
+            await asyncio.sleep(0.01)
+            return hits
+
+        assert IDS[:15] == asyncio.run(run())
+        assert 4 >= len(calls)
+
+    def test_cancel_full_queue(self):
+        calls = []
+
+        async def search(q, **params):
+            calls.append(params['cursor'])
+            await asyncio.sleep(0)
+            return _paged(params)
+
+        async def run():
+            stream = self._call_fut('matchall', search, size=10, prefetch=1)
+            assert 'doc0' == (await stream.__anext__())['id']
+            # a page in the queue and the fetch task waiting for room.
+            while len(calls) < 3:
+                await asyncio.sleep(0)
+            for _ in range(5):
+                await asyncio.sleep(0)
+            await stream.aclose()
+            others = asyncio.all_tasks() - {asyncio.current_task()}
+            if others:
+                await asyncio.wait(others, timeout=1)
+            return [t for t in others if not t.done()]
+
+        assert [] == asyncio.run(run())
+        assert 3 == len(calls)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_planner
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.planner
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+
+class TestPlan(object):
+
+    def _get_target(self):
+        from csquery.planner import plan
+        return plan
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def _assert_same(self, expression, actual):
+        """``q`` and ``fq`` together have the clauses of ``expression``."""
+        from csquery.structured import and_, parse
+        from csquery.optimizer import optimize
+        from csquery.cache import fingerprint
+
+        clauses = [parse(actual.fq)]
+        if actual.q != 'matchall':
+            clauses.append(parse(actual.q))
+        combined = optimize(and_(*clauses)).expression
+        assert fingerprint(optimize(expression).expression) == \
+            fingerprint(combined)
+
+    def test_it(self):
+        from csquery.structured import and_, or_, not_, term, range_, prefix
+
+        expression = and_(
+            term('star', field='title', boost=2),
+            term('star', field='plot'),
+            range_((1990, 2000), field='year'),
+            prefix('har', field='actors'),
+            or_(genres='action', year=2000),
+            not_(genres='horror'),
+            phrase='star wars',
+            rating=(8, ''),
+        )
+        actual = self._call_fut(expression)
+
+        assert ("(and (term field=title boost=2 'star') "
+                "(or genres:'action' year:2000) "
+                "(not genres:'horror'))") == actual.q
+        assert ("(and (term field=plot 'star') "
+                "(range field=year [1990,2000]) "
+                "(prefix field=actors 'har') "
+                "phrase:'star wars' rating:[8,})") == actual.fq
+        self._assert_same(expression, actual)
+
+    def test_single(self):
+        from csquery.structured import and_, term, phrase
+
+        expression = and_(phrase('star wars', field='title'),
+                          term('action', field='genres'))
+        actual = self._call_fut(expression)
+        assert "(phrase field=title 'star wars')" == actual.q
+        assert "(term field=genres 'action')" == actual.fq
+        self._assert_same(expression, actual)
+
+        expression = and_(phrase('star wars', field='title'),
+                          genres='action')
+        actual = self._call_fut(expression)
+        assert "(and genres:'action')" == actual.fq
+        self._assert_same(expression, actual)
+
+    def test_single_literal(self):
+        from csquery.structured import and_, term
+
+        expression = and_(term('x', field='t'), 'star')
+        actual = self._call_fut(expression)
+        assert "(and 'star')" == actual.q
+        assert "(term field=t 'x')" == actual.fq
+        self._assert_same(expression, actual)
+
+    def test_options(self):
+        from csquery.structured import and_, term
+
+        actual = self._call_fut(and_(term('star', boost=2), genres='action',
+                                     boost=3))
+        assert "(and boost=3 (term boost=2 'star'))" == actual.q
+        assert "(and genres:'action')" == actual.fq
+
+    def test_matchall(self):
+        from csquery.structured import and_, term
+
+        expression = and_(term('star', field='title'), year=(1990, 2000))
+        actual = self._call_fut(expression)
+        assert 'matchall' == actual.q
+        assert "(and (term field=title 'star') year:[1990,2000])" == \
+            actual.fq
+        self._assert_same(expression, actual)
+
+    def test_nothing_to_move(self):
+        from csquery.structured import and_, or_, term
+
+        expression = and_(term('star', boost=2), or_(a=1, b=2))
+        assert (expression(), None) == self._call_fut(expression)
+        expression = or_(term('star'), a=1)
+        assert (expression(), None) == self._call_fut(expression)
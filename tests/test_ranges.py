@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_ranges
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.ranges
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from datetime import date, datetime, timedelta, tzinfo
+
+import pytest
+
+
+class _JST(tzinfo):
+
+    def utcoffset(self, dt):
+        return timedelta(hours=9)
+
+    def dst(self, dt):
+        return timedelta(0)
+
+
+class TestParseRange(object):
+
+    def _get_target(self):
+        from csquery.ranges import parse_range
+        return parse_range
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        assert ['1990', True, '2000', False] == self._call_fut('[1990,2000}')
+        assert [None, False, "'a,]'", True] == self._call_fut("{, 'a,]']")
+        assert [None, False, None, False] == self._call_fut('{,}')
+        assert self._call_fut("'star'") is None
+        assert self._call_fut('[1,2') is None
+
+
+class TestFormatBounds(object):
+
+    def _get_target(self):
+        from csquery.ranges import format_bounds
+        return format_bounds
+
+    def _call_fut(self, values):
+        return self._get_target()(values)
+
+    def test_sequence(self):
+        assert ['1', '', '2.5', '', "'a'", ''] == \
+            self._call_fut([1, None, 2.5, float('nan'), 'a', ''])
+
+    def test_dates(self):
+        assert [
+            "'2020-01-02T03:04:05Z'",
+            "'2020-01-02T00:00:00Z'",
+            "'2020-01-01T18:00:00Z'",
+            "'2020-01-02T03:04:05.678Z'",
+        ] == self._call_fut([
+            datetime(2020, 1, 2, 3, 4, 5),
+            date(2020, 1, 2),
+            datetime(2020, 1, 2, 3, tzinfo=_JST()),
+            datetime(2020, 1, 2, 3, 4, 5, 678901),
+        ])
+
+    def test_numpy(self):
+        numpy = pytest.importorskip('numpy')
+        assert ['1', '2', '3'] == self._call_fut(numpy.array([1, 2, 3]))
+        assert ['0.1', '', '1.5'] == self._call_fut(
+            numpy.array([0.1, numpy.nan, 1.5], dtype='float32'))
+        assert ["'a'", "'b'"] == self._call_fut(numpy.array(['a', 'b']))
+
+    def test_datetime64(self):
+        numpy = pytest.importorskip('numpy')
+        assert ["'2020-01-01T00:00:00Z'", '', "'2020-01-02T00:00:00Z'"] == \
+            self._call_fut(numpy.array(['2020-01-01', 'NaT', '2020-01-02'],
+                                       dtype='datetime64[D]'))
+        assert ["'2020-01-01T00:00:00.000Z'", "'2020-01-01T00:00:00.250Z'"] \
+            == self._call_fut(numpy.array(
+                ['2020-01-01T00:00:00', '2020-01-01T00:00:00.250'],
+                dtype='datetime64[us]'))
+
+
+class TestFormatRanges(object):
+
+    def _get_target(self):
+        from csquery.ranges import format_ranges
+        return format_ranges
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_closed(self):
+        lower, upper = [0, 10, None], [10, None, 5]
+        assert ['[0,10]', '[10,}', '{,5]'] == self._call_fut(lower, upper)
+        assert ['[0,10}', '[10,}', '{,5}'] == \
+            self._call_fut(lower, upper, closed='left')
+        assert ['{0,10]', '{10,}', '{,5]'] == \
+            self._call_fut(lower, upper, closed='right')
+        assert ['{0,10}', '{10,}', '{,5}'] == \
+            self._call_fut(lower, upper, closed='neither')
+        assert ['[0,10}', '[10,20}'] == \
+            self._call_fut([0, 10], [10, 20], closed='left')
+
+    def test_one_side(self):
+        assert ['[1,}', '[2,}'] == self._call_fut([1, 2])
+        assert ['{,1]', '{,2]'] == self._call_fut(None, [1, 2])
+
+    def test_same_as_format_range_values(self):
+        from csquery.structured import format_range_values
+        lower = [1900, None, 0, '', 1900]
+        upper = [2000, 2000, 2000, 2000, None]
+        assert [format_range_values(s, e) for s, e in zip(lower, upper)] == \
+            self._call_fut(lower, upper)
+
+    def test_text_bounds(self):
+        assert ["['a\\'b','m']", "['a\x00','z']"] == \
+            self._call_fut(["a'b", 'a\x00'], ['m', 'z'])
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            self._call_fut([1, 2], [3])
+        with pytest.raises(ValueError):
+            self._call_fut(None, None)
+        with pytest.raises(KeyError):
+            self._call_fut([1], [2], closed='open')
+
+    def test_numpy(self):
+        numpy = pytest.importorskip('numpy')
+        bands = numpy.array([0, 9.99, 49.99, numpy.nan])
+        assert ['[0.0,9.99}', '[9.99,49.99}', '[49.99,}'] == \
+            self._call_fut(bands[:-1], bands[1:], closed='left')
+
+
+class TestRanges(object):
+
+    def _get_target(self):
+        from csquery.ranges import ranges
+        return ranges
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import range_
+        actual = self._call_fut([1990, 2000], [2000, None], field='year',
+                                boost=2)
+        assert [range_((1990, 2000), field='year', boost=2),
+                range_((2000, None), field='year', boost=2)] == actual
+        assert '(range {1,2})' == \
+            self._call_fut([1], [2], closed='neither')[0]()
+
+    def test_unexpected_keyword(self):
+        with pytest.raises(TypeError):
+            self._call_fut([1990], [2000], feild='year')
+        with pytest.raises(TypeError):
+            self._call_fut([1990], [2000], field='year', distance=2)
+
+
+class TestRangeFields(object):
+
+    def _get_target(self):
+        from csquery.ranges import range_fields
+        return range_fields
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import or_
+        q = or_(*self._call_fut('price', [0, 10], [10, 50], closed='left'))
+        assert '(or price:[0,10} price:[10,50})' == q()
+        assert or_(price='[0,10}') == or_(self._call_fut('price', [0],
+                                                         [10], 'left')[0])
+
+
+class TestTimeBuckets(object):
+
+    def _get_target(self):
+        from csquery.ranges import time_buckets
+        return time_buckets
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        pytest.importorskip('numpy')
+        from csquery.ranges import format_ranges
+        lower, upper = self._call_fut(datetime(2020, 1, 1, tzinfo=_JST()),
+                                      datetime(2020, 1, 3), timedelta(days=1))
+        assert [
+            "['2019-12-31T15:00:00Z','2020-01-01T15:00:00Z'}",
+            "['2020-01-01T15:00:00Z','2020-01-02T15:00:00Z'}",
+            "['2020-01-02T15:00:00Z','2020-01-03T00:00:00Z'}",
+        ] == format_ranges(lower, upper, closed='left')
+
+    def test_numpy_step(self):
+        numpy = pytest.importorskip('numpy')
+        lower, upper = self._call_fut('2020-01-01T00:00', '2020-01-01T01:00',
+                                      numpy.timedelta64(15, 'm'))
+        assert 4 == len(lower)
+        assert (upper[:-1] == lower[1:]).all()
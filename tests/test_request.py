@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_request
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.request
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+from six.moves.urllib.parse import parse_qsl
+
+
+class TestSearchRequest(object):
+
+    def _get_target_class(self):
+        from csquery.request import SearchRequest
+        return SearchRequest
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_
+        request = self._make_one(
+            and_(title='star'), fq=and_(genres='sf'),
+            return_=['title', 'year'], sort=['_score desc', ('year', 'asc')],
+            size=20, start=40, options={'fields': ['title^2', 'plot']},
+            **{'facet.year': '{}'})
+        expected = {
+            'q': "(and title:'star')",
+            'fq': "(and genres:'sf')",
+            'q.parser': 'structured',
+            'q.options': '{"fields":["title^2","plot"]}',
+            'return': 'title,year',
+            'sort': '_score desc,year asc',
+            'size': '20',
+            'start': '40',
+            'facet.year': '{}',
+        }
+        assert expected == dict(parse_qsl(request.query_string()))
+        assert dict(expected, size=20, start=40) == request.to_params()
+        assert ['title', 'year'] == request.fields
+
+    def test_defaults(self):
+        request = self._make_one('matchall')
+        assert 'q=matchall&q.parser=structured' == request.query_string()
+        assert request.fields is None
+        assert 'q=star&q.parser=lucene' == \
+            self._make_one('star', **{'q.parser': 'lucene'}).query_string()
+
+    def test_strings(self):
+        request = self._make_one('matchall', return_='title,year',
+                                 sort='year desc', options='{"a":1}')
+        assert {
+            'q': 'matchall',
+            'q.parser': 'structured',
+            'q.options': '{"a":1}',
+            'return': 'title,year',
+            'sort': 'year desc',
+        } == request.to_params()
+
+    def test_page(self):
+        from csquery.structured import and_
+        request = self._make_one(and_(title='star'), size=10)
+        encoded = request._encoded
+
+        other = request.page(start=10)
+        assert encoded is other._encoded
+        assert '10' == dict(parse_qsl(other.query_string()))['start']
+        assert 10 == other.size
+        assert 'start' not in request.query_string()
+
+        other = request.page(cursor='abc', size=100)
+        params = dict(parse_qsl(other.query_string()))
+        assert ('abc', '100') == (params['cursor'], params['size'])
+        assert 'start' not in params
+
+    def test_str(self):
+        request = self._make_one('matchall')
+        assert request.query_string() == str(request)
+        assert '<SearchRequest: q=matchall&q.parser=structured>' == \
+            repr(request)
+
+    def test_projection_savings(self):
+        sample = {'title': 'Star Wars', 'year': 1977,
+                  'plot': 'a' * 100, 'actors': ['Mark Hamill']}
+        request = self._make_one('matchall', return_=['title', 'year'],
+                                 size=20)
+        # "plot":"aaa...", and "actors":["Mark Hamill"],
+        assert (110 + 25) * 20 == request.projection_savings(sample)
+
+        request = self._make_one('matchall', return_=['_no_fields'])
+        assert sum(len(k) + len(str(v)) for k, v in sample.items()) < \
+            request.projection_savings(sample) / 10
+
+    def test_projection_savings__all_fields(self):
+        sample = {'title': 'Star Wars'}
+        assert 0 == self._make_one('matchall').projection_savings(sample)
+        assert 0 == self._make_one(
+            'matchall', return_=['_all_fields']).projection_savings(sample)
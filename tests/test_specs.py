@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_specs
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.specs
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import json
+
+import pytest
+
+
+def _spec(i):
+    return {
+        'op': 'and',
+        'args': [{'op': 'term', 'args': ['star {}'.format(i)],
+                  'kwargs': {'field': 'title', 'boost': 2}},
+                 {'genres': 'sf'}],
+        'kwargs': {'year': [1990, 2000 + i]},
+    }
+
+
+class TestBuild(object):
+
+    def _get_target(self):
+        from csquery.specs import build
+        return build
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_, term, in_
+
+        assert and_(term('star 1', field='title', boost=2),
+                    {'genres': 'sf'}, year=(1990, 2001)) == \
+            self._call_fut(_spec(1))
+        assert in_('id', [1, 2]) == self._call_fut(
+            {'op': 'in', 'args': ['id', [1, 2]]})
+
+    def test_unknown_op(self):
+        with pytest.raises(ValueError):
+            self._call_fut({'op': 'xor', 'args': [{'a': 1}]})
+        with pytest.raises(ValueError):
+            self._call_fut({'args': [{'a': 1}]})
+
+
+class TestReadExpressions(object):
+
+    def _get_target(self):
+        from csquery.specs import read_expressions
+        return read_expressions
+
+    def _call_fut(self, *args, **kwargs):
+        return list(self._get_target()(*args, **kwargs))
+
+    def test_it(self):
+        from csquery.specs import build
+        from csquery.structured import parse
+
+        lines = ["(and title:'star')\n", '\n', "(or a:1 b:2)\n"]
+        assert [parse(lines[0]), parse(lines[2])] == self._call_fut(lines)
+        lines = [json.dumps(_spec(1)), '  ', json.dumps(_spec(2))]
+        assert [build(_spec(1)), build(_spec(2))] == self._call_fut(
+            lines, specs=True)
+
+    def test_error(self):
+        with pytest.raises(ValueError) as e:
+            self._call_fut(["(and title:'star')", '', '(and'])
+        assert 'line 3: ' in str(e.value)
+        with pytest.raises(ValueError) as e:
+            self._call_fut(['{"op": "xor"}'], specs=True)
+        assert 'line 1: ' in str(e.value)
+
+
+class TestOpenStream(object):
+
+    def _get_target(self):
+        from csquery.specs import open_stream
+        return open_stream
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self, tmpdir):
+        path = str(tmpdir.join('queries.txt'))
+        with self._call_fut(path, 'w') as f:
+            f.write('é\n')
+        with self._call_fut(path, 'r') as f:
+            assert 'é\n' == f.read()
+
+    def test_stdout(self, capfd):
+        import sys
+
+        with self._call_fut('-', 'w') as f:
+            f.write('é\n')
+        assert not sys.stdout.closed
+        assert 'é\n' == capfd.readouterr().out
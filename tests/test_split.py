@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_split
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.split
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+
+def _ids(query):
+    from csquery.structured import parse
+
+    ids = []
+    stack = [parse(query)]
+    while stack:
+        node = stack.pop()
+        for f in node.fields:
+            if f.expression is not None:
+                stack.append(f.expression)
+            elif f.name == 'id':
+                ids.append(f.value.strip("'"))
+    return sorted(ids)
+
+
+class TestSplit(object):
+
+    def _get_target(self):
+        from csquery.split import split
+        return split
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_small(self):
+        from csquery.structured import or_
+
+        q = or_(id='a')
+        assert [q] == self._call_fut(q, max_bytes=100)
+
+    def test_or(self):
+        from csquery.structured import or_
+        from csquery.split import byte_size
+
+        ids = ['id{:04d}'.format(i) for i in range(1000)]
+        q = or_(*[{'id': i} for i in ids], boost=2)
+        actual = self._call_fut(q, max_bytes=1000)
+
+        assert all(byte_size(p) <= 1000 for p in actual)
+        assert all(p._options == q._options for p in actual)
+        assert ids == [f.value.strip("'") for p in actual for f in p.fields]
+        # every piece but the last is full.
+        item_size = len(" id:'id0000'")
+        assert all(byte_size(p) + item_size > 1000 for p in actual[:-1])
+
+    def test_in(self):
+        from csquery.structured import in_, or_, InExpression
+        from csquery.split import byte_size
+
+        ids = ['id{:04d}'.format(i) for i in range(1000)]
+        actual = self._call_fut(in_('id', ids), max_bytes=1000)
+        expected = self._call_fut(or_(*[{'id': i} for i in ids]), 1000)
+
+        assert all(isinstance(p, InExpression) for p in actual)
+        assert all(byte_size(p) <= 1000 for p in actual)
+        assert [p() for p in expected] == [p() for p in actual]
+
+    def test_and(self):
+        from csquery.structured import and_, or_, in_, not_
+        from csquery.split import byte_size
+
+        ids = ['id{:04d}'.format(i) for i in range(1000)]
+        q = and_(not_('drama', field='genres'), or_(a=1, b=2),
+                 in_('id', ids), year=2000)
+        actual = self._call_fut(q, max_bytes=1000)
+
+        assert 1 < len(actual)
+        assert all(byte_size(p) <= 1000 for p in actual)
+        for piece in actual:
+            assert piece.fields[:2] == q.fields[:2]
+            assert piece.fields[3:] == q.fields[3:]
+        assert ids == [f.value.strip("'") for p in actual
+                       for f in p.fields[2].expression.fields]
+
+    def test_error(self):
+        from csquery.structured import and_, or_, term
+
+        with pytest.raises(ValueError):
+            self._call_fut(and_(term('x' * 100), b=2), max_bytes=50)
+        with pytest.raises(ValueError):
+            self._call_fut(or_(term('x' * 100), b=2), max_bytes=50)
+
+
+class TestMergeHits(object):
+
+    def _get_target(self):
+        from csquery.split import merge_hits
+        return merge_hits
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.testing import hits
+
+        actual = self._call_fut([hits(['a', 'b']), hits(['b', 'c']),
+                                 hits([])])
+        assert ['a', 'b', 'c'] == [h['id'] for h in actual]
+
+
+class TestFanOut(object):
+
+    def _get_target(self):
+        from csquery.split import fan_out
+        return fan_out
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_, in_
+        from csquery.testing import StubSearchServer, hits
+
+        indexed = set('id{:04d}'.format(i) for i in range(0, 1000, 3))
+
+        def handler(params):
+            assert 'structured' == params['q.parser']
+            # overlapping results are merged by id.
+            return hits(sorted(indexed.intersection(_ids(params['q'])))
+                        + ['id0000'])
+
+        ids = ['id{:04d}'.format(i) for i in range(1000)]
+        q = and_(in_('id', ids), year=2000)
+        with StubSearchServer(handler) as stub:
+            actual = self._call_fut(q, stub.search, max_bytes=1000,
+                                    max_workers=4)
+            assert 1 < len(stub.requests)
+
+        assert sorted(indexed) == sorted(h['id'] for h in actual)
+        assert len(indexed) == len(actual)
+
+    def test_single(self):
+        from csquery.structured import or_
+        from csquery.testing import hits
+
+        calls = []
+
+        def search(q):
+            calls.append(q)
+            return hits(['a'])
+
+        assert [{'id': 'a', 'fields': {}}] == self._call_fut(
+            or_(id='a'), search)
+        assert ["(or id:'a')"] == calls
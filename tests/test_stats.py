@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_stats
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.stats
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import json
+import threading
+
+
+class TestShape(object):
+
+    def _get_target(self):
+        from csquery.stats import shape
+        return shape
+
+    def _call_fut(self, expression):
+        return self._get_target()(expression)
+
+    def test_it(self):
+        from csquery.structured import and_, or_, not_, term, near
+        q = and_(
+            not_(genres='horror'),
+            or_(term('star', field='title', boost=2),
+                near('star wars', field='plot', distance=2)),
+            year=(1977, None), rating=('', 9.5), title='star',
+        )
+        assert (
+            "(and (not genres:?) "
+            "(or (near field=plot distance=2 ?) (term field=title boost=2 ?)) "
+            "rating:{,?] title:? year:[?,})"
+        ) == self._call_fut(q)
+
+    def test_same_shape(self):
+        from csquery.structured import and_, range_
+        assert self._call_fut(and_(title='star', year=(1990, 2000))) == \
+            self._call_fut(and_({'year': (1, 2)}, {'title': 'wars'}))
+        assert self._call_fut(range_('{1,2]')) == \
+            self._call_fut(range_('{10,20]'))
+        assert self._call_fut(range_('{1,2]')) != \
+            self._call_fut(range_('[1,2]'))
+
+    def test_in(self):
+        from csquery.structured import in_, or_, parse
+        expected = '(or id:?...)'
+        assert expected == self._call_fut(in_('id', ['a', 'b']))
+        assert expected == self._call_fut(in_('id', list(range(100))))
+        assert expected == self._call_fut(parse(in_('id', ['a', 'b'])()))
+        assert expected == self._call_fut(or_({'id': 1}, {'id': 2}))
+        assert '(or id:?)' == self._call_fut(in_('id', ['a']))
+
+    def test_deep(self):
+        from csquery.structured import and_
+        q = and_(title='star')
+        for _ in range(5000):
+            q = and_(q)
+        assert self._call_fut(q).startswith('(and (and (and ')
+
+    def test_deep_mixed(self):
+        from csquery.structured import and_, or_, term
+        q = term('star', field='title')
+        for i in range(20000):
+            q = and_(q, year=i, boost=2) if i % 2 else or_(q, q)
+        heads = ['(and boost=2 ' if i % 2 else '(or ' for i in range(20000)]
+        tails = [' year:?)' if i % 2 else '...)' for i in range(20000)]
+        assert (''.join(reversed(heads)) + '(term field=title ?)' +
+                ''.join(tails)) == self._call_fut(q)
+
+    def test_deep_same_head(self):
+        from csquery.structured import and_
+        q = and_(title='star')
+        for i in range(20000):
+            q = and_(q, and_(y=i))
+        assert ('(and ' * 20000 + '(and title:?)' + ' (and y:?))' * 20000 ==
+                self._call_fut(q))
+
+    def test_sort_same_head(self):
+        from csquery.structured import and_, or_
+        # a head that is a prefix of another does not decide the order.
+        q = or_(and_(title='star'), and_(a=1, boost=2), and_(c=1, d=1))
+        assert ("(or (and boost=2 a:?) (and c:? d:?) (and title:?))" ==
+                self._call_fut(q))
+
+
+class TestWorkloadStats(object):
+
+    def _get_target_class(self):
+        from csquery.stats import WorkloadStats
+        return WorkloadStats
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_record(self):
+        from csquery.stats import shape_fingerprint
+        from csquery.structured import and_
+        stats = self._make_one()
+        stats.record(and_(title='star'), 0.25)
+        stats.record(and_(title='star wars'), 0.5)
+        stats.record("(and title:'x')", 0.25, size=100)
+        stats.record(and_(year=(1, 2)), 2.0)
+
+        snapshot = stats.snapshot()
+        assert 2 == len(stats)
+        assert 0 == snapshot['evictions']
+        first, second = snapshot['shapes']
+        assert '(and year:[?,?])' == first['shape']
+        assert '(and title:?)' == second['shape']
+        assert shape_fingerprint('(and title:?)') == second['fingerprint']
+        assert 3 == second['count']
+        assert 1.0 == second['total_seconds']
+        assert 0.5 == second['seconds']['max']
+        assert 0.5 == second['seconds']['p99']
+        assert [18, 100] == [second['bytes']['min'], second['bytes']['max']]
+
+    def test_snapshot_sort(self):
+        stats = self._make_one()
+        for _ in range(3):
+            stats.record("(and title:'star')", 0.1)
+        stats.record("(and year:1)", 1.0)
+        snapshot = stats.snapshot(sort='count', limit=1)
+        assert ['(and title:?)'] == [e['shape'] for e in snapshot['shapes']]
+
+    def test_bounded(self):
+        stats = self._make_one(maxsize=40)
+        for i in range(40):
+            for _ in range(i + 1):
+                stats.record('(term field=f{} 1)'.format(i), 0.1)
+        stats.record('(term field=new 1)', 0.1)
+
+        assert 39 == len(stats)
+        assert 2 == stats.evictions
+        shapes = [e['shape'] for e in stats.snapshot(sort='count')['shapes']]
+        assert '(term field=f0 ?)' not in shapes
+        assert '(term field=f1 ?)' not in shapes
+        assert '(term field=new ?)' in shapes
+
+    def test_timed(self):
+        stats = self._make_one()
+        with stats.timed("(term 'a')"):
+            pass
+        try:
+            with stats.timed("(term 'a')"):
+                raise ValueError
+        except ValueError:
+            pass
+        assert 2 == stats.snapshot()['shapes'][0]['count']
+
+    def test_threads(self):
+        stats = self._make_one()
+
+        def work(n):
+            for i in range(500):
+                stats.record('(term field=f{} {})'.format(i % 20, n), 0.01)
+
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        snapshot = stats.snapshot()
+        assert 20 == len(snapshot['shapes'])
+        assert [100] * 20 == [e['count'] for e in snapshot['shapes']]
+
+    def test_to_json(self):
+        stats = self._make_one()
+        stats.record("(term 'a')", 0.5)
+        data = json.loads(stats.to_json())
+        assert stats.snapshot() == data
+        stats.reset()
+        assert 0 == len(stats)
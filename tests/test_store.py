@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_store
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.store
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+
+def _expressions():
+    from csquery.structured import and_, or_, not_, term, in_
+    return [
+        and_(title='star', year=(1977, 1983)),
+        or_(term('star', field='title', boost=2), not_(genres='horror')),
+        in_('id', ['tt0076759', 'tt0080684']),
+    ] + [and_(id=i, rating=(7.5, '')) for i in range(100)]
+
+
+class TestQueryStore(object):
+
+    def _get_target_class(self):
+        from csquery.store import QueryStore
+        return QueryStore
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def _write(self, tmpdir, expressions):
+        from csquery.store import write_store
+        path = str(tmpdir.join('saved.csqs'))
+        return path, write_store(path, expressions)
+
+    def test_it(self, tmpdir):
+        from csquery.cache import fingerprint
+        expressions = _expressions()
+        path, count = self._write(tmpdir, expressions)
+        assert len(expressions) == count
+
+        with self._make_one(path) as store:
+            assert count == len(store)
+            for expression in expressions:
+                key = fingerprint(expression)
+                assert expression == store[key]
+                assert expression() == store[expression]()
+                assert key in store
+
+    def test_equivalent(self, tmpdir):
+        from csquery.structured import and_
+        q = and_(title='star', year=2000)
+        path, count = self._write(tmpdir, [q, and_(year=2000, title='star')])
+        assert 1 == count
+        with self._make_one(path) as store:
+            assert q == store[and_({'year': 2000}, {'title': 'star'})]
+
+    def test_other_types(self, tmpdir):
+        from decimal import Decimal
+        from csquery.structured import and_, field
+        q = and_(price=Decimal('1.5'), title=field('x'))
+        path, _ = self._write(tmpdir, [q])
+        with self._make_one(path) as store:
+            assert q() == store[q]()
+
+    def test_cache(self, tmpdir):
+        from csquery.structured import and_
+        q = and_(title='star')
+        path, _ = self._write(tmpdir, [q])
+        with self._make_one(path) as store:
+            assert store[q] is store[q]
+        with self._make_one(path, cache_size=0) as store:
+            assert store[q] is not store[q]
+            assert store[q] == store[q]
+
+    def test_missing(self, tmpdir):
+        from csquery.structured import and_
+        path, _ = self._write(tmpdir, _expressions())
+        with self._make_one(path) as store:
+            assert store.get(and_(title='missing')) is None
+            assert 'default' == store.get('00' * 20, 'default')
+            assert 'not hex' not in store
+            with pytest.raises(KeyError):
+                store['ff' * 20]
+
+    def test_empty(self, tmpdir):
+        from csquery.structured import and_
+        path, count = self._write(tmpdir, [])
+        assert 0 == count
+        with self._make_one(path) as store:
+            assert 0 == len(store)
+            assert and_(title='star') not in store
+            assert [] == list(store)
+
+    def test_iterate(self, tmpdir):
+        from csquery.cache import fingerprint
+        expressions = _expressions()
+        path, _ = self._write(tmpdir, expressions)
+        with self._make_one(path) as store:
+            keys = list(store)
+            assert sorted(keys) == keys
+            assert sorted(fingerprint(e) for e in expressions) == keys
+            items = dict(store.items())
+        assert set(expressions) == set(items.values())
+
+    def test_not_a_store(self, tmpdir):
+        path = tmpdir.join('other')
+        path.write_binary(b'CSQ\x01' + b'\x00' * 40)
+        with pytest.raises(ValueError):
+            self._make_one(str(path))
+
+    def test_replace(self, tmpdir):
+        from csquery.structured import and_
+        path, _ = self._write(tmpdir, [and_(title='old')])
+        with self._make_one(path) as old:
+            self._write(tmpdir, [and_(title='new')])
+            assert and_(title='old') in old
+            with self._make_one(path) as new:
+                assert and_(title='new') in new
+                assert and_(title='old') not in new
+        assert ['saved.csqs'] == [p.basename for p in tmpdir.listdir()]
+
+
+class TestMain(object):
+
+    def _get_target(self):
+        from csquery.store import main
+        return main
+
+    def _call_fut(self, argv):
+        return self._get_target()(argv)
+
+    def test_it(self, tmpdir, capsys):
+        from csquery.store import QueryStore
+        from csquery.structured import and_
+        src = tmpdir.join('saved.txt')
+        src.write("(and title:'star')\n\n(or year:2000 year:2001)\n",
+                  mode='w')
+        dst = str(tmpdir.join('saved.csqs'))
+        assert 0 == self._call_fut([str(src), dst])
+        assert capsys.readouterr().err.startswith('2 expressions')
+        with QueryStore(dst) as store:
+            assert and_(title='star') in store
+
+    def test_specs(self, tmpdir):
+        from csquery.store import QueryStore
+        from csquery.structured import term
+        src = tmpdir.join('specs.jsonl')
+        src.write('{"op": "term", "args": ["star"], '
+                  '"kwargs": {"field": "title"}}\n', mode='w')
+        dst = str(tmpdir.join('saved.csqs'))
+        assert 0 == self._call_fut([str(src), dst, '--specs', '-q'])
+        with QueryStore(dst) as store:
+            assert term('star', field='title') in store
+
+    def test_error(self, tmpdir, capsys):
+        src = tmpdir.join('saved.txt')
+        src.write("(and title:'star')\n(and title:\n", mode='w')
+        dst = tmpdir.join('saved.csqs')
+        assert 1 == self._call_fut([str(src), str(dst)])
+        assert 'line 2' in capsys.readouterr().err
+        assert not dst.exists()
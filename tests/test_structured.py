@@ -10,6 +10,8 @@
 """
 from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
 
+import pytest
+
 
 class TestEscape(object):
 
@@ -24,6 +26,8 @@ class TestEscape(object):
         assert r"test\'test" == self._call_fut("test'test")
         assert r"\'test\'test\'" == self._call_fut("'test'test'")
         assert r"test\\test" == self._call_fut(r"test\test")
+        assert r"\\\'" == self._call_fut("\\'")
+        assert "test" == self._call_fut("test")
 
 
 class TestFormatOptions(object):
@@ -59,6 +63,47 @@ class TestFormatRangeValues(object):
         assert '[1900,}' == self._call_fut(start=1900, end=None)
         assert '[1900,}' == self._call_fut(start=1900, end='')
 
+    def test_dates(self):
+        from datetime import date, datetime
+        assert "['2000-01-01T00:00:00Z','2010-01-01T12:30:00Z']" == \
+            self._call_fut(date(2000, 1, 1), datetime(2010, 1, 1, 12, 30))
+        assert "{,'2010-01-01T00:00:00Z']" == \
+            self._call_fut(None, date(2010, 1, 1))
+
+
+class TestFormatDate(object):
+
+    def _get_target(self):
+        from csquery.structured import format_date
+        return format_date
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from datetime import date, datetime, timedelta, tzinfo
+
+        class EST(tzinfo):
+            def utcoffset(self, dt):
+                return timedelta(hours=-5)
+
+        assert "'2000-01-02T03:04:05Z'" == \
+            self._call_fut(datetime(2000, 1, 2, 3, 4, 5))
+        assert "'2000-01-02T00:00:00Z'" == self._call_fut(date(2000, 1, 2))
+        assert "'2000-01-02T08:04:05Z'" == \
+            self._call_fut(datetime(2000, 1, 2, 3, 4, 5, tzinfo=EST()))
+        assert "'2000-01-02T03:04:05.120Z'" == \
+            self._call_fut(datetime(2000, 1, 2, 3, 4, 5, 120999))
+        assert "'2000-01-02T03:04:05Z'" == \
+            self._call_fut(datetime(2000, 1, 2, 3, 4, 5, 999))
+
+    def test_format_value(self):
+        from datetime import date
+        from csquery.structured import and_, format_value
+        assert "'2000-01-02T00:00:00Z'" == format_value(date(2000, 1, 2))
+        assert "(and release_date:'2000-01-02T00:00:00Z')" == \
+            and_(release_date=date(2000, 1, 2))()
+
 
 class TestFormatValue(object):
 
@@ -128,6 +173,48 @@ class TestFormatValue(object):
             and_(_id="['tt\'1000000','tt\'1005000']")
         )
 
+    def test_it__types(self):
+        assert '1' == self._call_fut(1)
+        assert '1.0' == self._call_fut(1.0)
+        assert 'True' == self._call_fut(True)
+        assert 'None' == self._call_fut(None)
+        assert "'1'" == self._call_fut('1')
+        assert "'1'" == self._call_fut(b'1')
+        assert "'{1,2}'" == self._call_fut('{1,2}')
+        assert "'('" == self._call_fut('(')
+        assert '()' == self._call_fut('()')
+        assert "''" == self._call_fut('')
+
+    def test_it__cache(self):
+        from csquery.structured import (
+            literal_cache_info, clear_literal_cache, set_literal_cache_size,
+            LITERAL_CACHE_SIZE
+        )
+
+        clear_literal_cache()
+        try:
+            for _ in range(3):
+                self._call_fut('cached')
+            self._call_fut([1990, 2000])
+            info = literal_cache_info()
+            assert (2, 1) == (info.hits, info.misses)
+
+            set_literal_cache_size(2)
+            for value in ['a', 'b', 'c', 'a']:
+                self._call_fut(value)
+            info = literal_cache_info()
+            assert (0, 4, 2, 2) == (info.hits, info.misses, info.maxsize,
+                                    info.currsize)
+        finally:
+            set_literal_cache_size(LITERAL_CACHE_SIZE)
+
+    def test_it__signed_zero(self):
+        for _ in range(2):
+            assert '0.0' == self._call_fut(0.0)
+            assert '-0.0' == self._call_fut(-0.0)
+        assert '0' == self._call_fut(0)
+        assert 'False' == self._call_fut(False)
+
     def test_it__with_multi_encoding(self):
         from csquery.structured import Expression
         import six
@@ -142,6 +229,50 @@ class TestFormatValue(object):
         )
 
 
+class TestRender(object):
+
+    def _get_target(self):
+        from csquery.structured import render
+        return render
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_, or_, not_, term, field
+
+        q = and_(
+            not_('テスト', field='genres'),
+            or_(
+                term('star', field='title', boost=2),
+                term('star', field='plot'),
+            ),
+            field(and_(title='star'), 'nested'),
+            boost='plot'
+        )
+        expected = "(and boost=plot (not field=genres 'テスト') "
+        expected += "(or (term field=title boost=2 'star') "
+        expected += "(term field=plot 'star')) nested:(and title:'star'))"
+        assert expected == self._call_fut(q)
+        assert expected == q()
+        assert expected == str(q)
+
+    def test_empty(self):
+        from csquery.structured import and_
+        assert '(and )' == self._call_fut(and_())
+
+    def test_deep(self):
+        from csquery.structured import and_
+        depth = 50000
+        q = and_(title='star')
+        for i in range(depth):
+            q = and_(q)
+
+        actual = self._call_fut(q)
+        expected = '(and ' * depth + "(and title:'star')" + ')' * depth
+        assert expected == actual
+
+
 class TestFieldValue(object):
 
     def _get_target_class(self):
@@ -165,6 +296,19 @@ class TestFieldValue(object):
         assert 'name' is field.name
         assert "'test'" == field.value
 
+    def test_raw(self):
+        import pickle
+        from csquery.structured import and_
+
+        assert (1990, 2000) == self._make_one((1990, 2000), 'year').raw
+        assert 'test' == self._make_one({'name': 'test'}).raw
+        expression = and_(title='star')
+        assert expression is self._make_one(expression).raw
+
+        field = pickle.loads(pickle.dumps(self._make_one(2000, 'year')))
+        assert 2000 == field.raw
+        assert '2000' == field.value
+
     def test_to_value(self):
 
         field = self._make_one('test')
@@ -188,6 +332,27 @@ class TestFieldValue(object):
         field = self._make_one({'name': 'test'})
         assert "<FieldValue: name:'test'>" == repr(field)
 
+    def test_immutable(self):
+        field = self._make_one('test', 'name')
+        with pytest.raises(AttributeError):
+            field.name = 'other'
+        with pytest.raises(AttributeError):
+            del field.name
+
+    def test_eq_and_hash(self):
+        from csquery.structured import and_
+
+        assert self._make_one('test', 'name') == self._make_one(
+            {'name': 'test'})
+        assert hash(self._make_one('test', 'name')) == hash(
+            self._make_one({'name': 'test'}))
+        assert self._make_one('test', 'name') != self._make_one('test')
+        assert self._make_one('test') != 'test'
+        assert self._make_one(and_(title='star')) == self._make_one(
+            and_(title='star'))
+        assert self._make_one(and_(title='star')) != self._make_one(
+            and_(title='star2'))
+
 
 class TestExpression(object):
 
@@ -220,6 +385,106 @@ class TestExpression(object):
         expected = "<Expression: (and boost=3 actor:'test' title:'test')>"
         assert expected == repr(target)
 
+    def test_immutable(self):
+        target = self._make_one('and', {'boost': 3}, title='test')
+        with pytest.raises(AttributeError):
+            target.operator = 'or'
+        with pytest.raises(AttributeError):
+            del target.fields
+        target.options['boost'] = 4
+        assert "(and boost=3 title:'test')" == target()
+
+    def test_eq_and_hash(self):
+        from csquery.structured import and_, or_, term
+
+        def build(title):
+            return and_(or_(term(title, field='title'), actor='test'),
+                        boost=2)
+
+        assert build('star') == build('star')
+        assert hash(build('star')) == hash(build('star'))
+        assert build('star') != build('star2')
+        assert and_(title='star') != or_(title='star')
+        assert and_(title='star') != and_(title='star', boost=2)
+        assert and_(title='star') != "(and title:'star')"
+        assert {build('star'): 1}[build('star')] == 1
+
+    def test_from_fields(self):
+        from csquery.structured import and_, field
+
+        fields = [field('star', 'title'), field(2000, 'year')]
+        target = self._get_target_class().from_fields(
+            'and', {'boost': 2}, fields)
+        assert and_(title='star', year=2000, boost=2) == target
+        assert "(and boost=2 title:'star' year:2000)" == target()
+
+        target = self._get_target_class().from_fields(
+            'and', [('boost', 2)], fields, query='(and cached)')
+        assert '(and cached)' == target()
+
+    def test_eq__options_as_rendered(self):
+        from csquery.structured import and_, in_
+
+        # equal values that render differently are different queries.
+        assert and_('a', boost=2) != and_('a', boost=2.0)
+        assert {and_('a', boost=2): 1}.get(and_('a', boost=2.0)) is None
+        assert in_('id', [1], boost=2) != in_('id', [1], boost=2.0)
+        assert and_('a', boost=2) == and_('a', boost=2)
+        assert hash(and_('a', boost=2)) == hash(and_('a', boost=2))
+
+    def test_eq__deep(self):
+        from csquery.structured import and_
+
+        def build(depth):
+            q = and_(title='star')
+            for i in range(depth):
+                q = and_(q)
+            return q
+
+        assert build(20000) == build(20000)
+        assert build(20000) != build(19999)
+
+    def test_slots(self):
+        import json
+        import sys
+        from csquery.structured import and_, EMPTY_OPTIONS
+
+        target = and_(**json.loads('{"title": "star"}'))
+        assert not hasattr(target, '__dict__')
+        assert not hasattr(target.fields[0], '__dict__')
+        assert EMPTY_OPTIONS is target._options
+        # names from a parser are interned, shared by all the nodes.
+        assert 'title' == target.fields[0].name
+        assert sys.intern('title') is target.fields[0].name
+        operator = self._make_one(json.loads('"and"')).operator
+        assert 'and' == operator
+        assert sys.intern('and') is operator
+
+    def test_pickle(self):
+        import pickle
+        from csquery.structured import and_, or_, term
+
+        target = and_(or_(term('star', field='title', boost=2),
+                          actor='test'), year=('', 2000), boost=2)
+        target()
+        actual = pickle.loads(pickle.dumps(target))
+        assert target == actual
+        assert hash(target) == hash(actual)
+        assert target() == actual()
+
+    def test_cached_query(self):
+        from csquery.structured import and_, or_
+
+        shared = or_(title='star', actor='test')
+        parent1 = and_(shared, year=2000)
+        parent2 = and_(shared, year=2010)
+
+        assert shared._query is None
+        assert "(and (or actor:'test' title:'star') year:2000)" == parent1()
+        assert "(or actor:'test' title:'star')" == shared._query
+        assert parent1() is parent1()
+        assert "(and (or actor:'test' title:'star') year:2010)" == parent2()
+
 
 class TestField(object):
 
@@ -447,3 +712,162 @@ class TestTerm(object):
         actual = self._call_fut(2000, field='year', boost=2)
         expected = '(term field=year boost=2 2000)'
         assert expected == actual()
+
+
+class TestParse(object):
+
+    def _get_target(self):
+        from csquery.structured import parse
+        return parse
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_round_trip(self):
+        queries = [
+            "(and actors:'Harrison Ford' title:'star' year:{,2000])",
+            "(and boost=plot (not field=genres 'テスト') "
+            "(or (term field=title boost=2 'star') (term field=plot 'star')))",
+            "(near field=plot distance=2 boost=2 'teenage vampire')",
+            "(phrase field=plot boost=2 'teenage girl')",
+            "(prefix field=title boost=2 'star')",
+            "(range field=date boost=2.5 [1990,2000])",
+            "(range {,2000])",
+            "(range [1967-01-31T23:20:50.650Z,1967-01-31T23:59:59.999Z])",
+            "(term field=year boost=2 2000)",
+            "(and release_date:"
+            "['2000-01-01T00:00:00Z', '2010-01-01T00:00:00Z'})",
+            "(and _id:['tt'1000000','tt'1005000'])",
+            r"(and title:'st\'a\\r' nested:(or a:1 b:-2.5))",
+            "(and )",
+        ]
+        for query in queries:
+            assert query == self._call_fut(query).query()
+
+    def test_same_nodes_as_builders(self):
+        from csquery.structured import (
+            Expression, FieldValue, and_, or_, not_, term, near, range_
+        )
+
+        expected = and_(
+            not_('テスト', field='genres'),
+            or_(
+                term('star', field='title', boost=2),
+                term("it's", field='plot'),
+                near(r'back\\slash', field='plot', distance=2),
+            ),
+            range_((1990, 2000), field='year'),
+            year=('', 2000),
+            boost=2,
+        )
+        actual = self._call_fut(expected())
+        assert isinstance(actual, Expression)
+        assert isinstance(actual.fields[0], FieldValue)
+        assert expected == actual
+        assert hash(expected) == hash(actual)
+        assert 2 == actual.options['boost']
+
+    def test_whitespace_and_bytes(self):
+        actual = self._call_fut(
+            "  ( and\n title:'star'   ( or a:1 ) ) ".encode('utf-8'))
+        assert "(and title:'star' (or a:1))" == actual()
+
+    def test_deep(self):
+        depth = 50000
+        query = '(and ' * depth + "(and title:'star')" + ')' * depth
+        assert query == self._call_fut(query).query()
+
+    def test_error(self):
+        for query in ['', 'title', '(and', '(and))', "(and 'star)",
+                      '(and title:)', '()']:
+            with pytest.raises(ValueError):
+                self._call_fut(query)
+
+
+class TestFormatValues(object):
+
+    def _get_target(self):
+        from csquery.structured import format_values
+        return format_values
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import format_value
+
+        for values in [
+            [],
+            ['star', "it's", r'back\slash', '', 'ジャン=ピエール'],
+            [b'star', 'あ'.encode('utf-8')],
+            [1, 2.5, -3],
+            ['star', 1, None, (1990, 2000)],
+            ['star', '[1990,2000]', '(and a:1)', '{,2000]', '[x'],
+            ['[1990,2000]', 'star'],
+            ['star', 'nul\x00'],
+        ]:
+            expected = [format_value(v) for v in values]
+            assert expected == self._call_fut(values)
+            assert expected == self._call_fut(iter(values))
+
+    def test_array(self):
+        import array
+        assert ['1', '2', '3'] == self._call_fut(array.array('i', [1, 2, 3]))
+
+    def test_numpy(self):
+        np = pytest.importorskip('numpy')
+        assert ['1', '2', '3'] == self._call_fut(np.array([1, 2, 3]))
+        assert ['1.5', '2.0'] == self._call_fut(np.array([1.5, 2.0]))
+        assert ["'a'", "'b\\'c'"] == self._call_fut(np.array(['a', "b'c"]))
+
+
+class TestIn_(object):
+
+    def _get_target(self):
+        from csquery.structured import in_
+        return in_
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import or_
+
+        for values in [['a', "b'c", 'd'], [1, 2, 3], []]:
+            expected = or_(*[{'id': v} for v in values])
+            actual = self._call_fut('id', values)
+            assert expected() == actual()
+            assert expected == actual
+            assert actual == expected
+            assert hash(expected) == hash(actual)
+            assert expected.fields == actual.fields
+
+        actual = self._call_fut('id', (v for v in [1, 2]), boost=2)
+        assert '(or boost=2 id:1 id:2)' == actual()
+
+    def test_unexpected_keyword(self):
+        with pytest.raises(TypeError):
+            self._call_fut('id', ['a', 'b'], bost=2)
+        with pytest.raises(TypeError):
+            self._call_fut('id', ['a'], boost=2, field='title')
+
+    def test_nested(self):
+        from csquery.structured import and_
+
+        actual = and_(self._call_fut('id', ['a', 'b']), title='star')
+        assert "(and (or id:'a' id:'b') title:'star')" == actual()
+
+    def test_pickle(self):
+        import pickle
+
+        target = self._call_fut('id', ['a', 'b'], boost=2)
+        actual = pickle.loads(pickle.dumps(target))
+        assert target == actual
+        assert target() == actual()
+
+    def test_does_not_mutate_dicts(self):
+        from csquery.structured import or_
+
+        values = [{'id': v} for v in ['a', 'b']]
+        or_(*values)
+        assert [{'id': 'a'}, {'id': 'b'}] == values
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_template
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.template
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+
+class TestTemplate(object):
+
+    def _get_target_class(self):
+        from csquery.template import Template
+        return Template
+
+    def _make_one(self, *args, **kwargs):
+        return self._get_target_class()(*args, **kwargs)
+
+    def test_render(self):
+        from csquery.structured import and_, or_, term, not_
+        from csquery.template import param
+
+        target = self._make_one(and_(
+            not_(param('genre'), field='genres'),
+            or_(
+                term(param('title'), field='title', boost=param('boost')),
+                term(param('title'), field='plot'),
+            ),
+            year=param('year'),
+        ))
+
+        for genre, title, boost, year in [
+            ('テスト', 'star', 2, ('', 2000)),
+            ("it's", r'st\ar', 'plot', (1990, 2000)),
+            (b'drama', 2000, 1, '[1990,}'),
+        ]:
+            expected = and_(
+                not_(genre, field='genres'),
+                or_(
+                    term(title, field='title', boost=boost),
+                    term(title, field='plot'),
+                ),
+                year=year,
+            )()
+            assert expected == target.render(
+                genre=genre, title=title, boost=boost, year=year)
+            assert expected == target(
+                genre=genre, title=title, boost=boost, year=year)
+
+    def test_render__with_expression_value(self):
+        from csquery.structured import and_, term
+        from csquery.template import param
+
+        target = self._make_one(and_(param('clause'), title=param('title')))
+        actual = target.render(clause=term('star', field='plot'),
+                               title='star')
+        assert "(and (term field=plot 'star') title:'star')" == actual
+
+    def test_params(self):
+        from csquery.structured import and_
+        from csquery.template import param
+
+        target = self._make_one(and_(title=param('title'),
+                                     actors=param('title'),
+                                     year=param('year')))
+        assert frozenset(['title', 'year']) == target.params
+
+    def test_render__missing_or_unknown(self):
+        from csquery.structured import and_
+        from csquery.template import param
+
+        target = self._make_one(and_(title=param('title')))
+        with pytest.raises(TypeError):
+            target.render()
+        with pytest.raises(TypeError):
+            target.render(title='star', year=2000)
+
+    def test_range_bound(self):
+        from csquery.structured import range_
+        from csquery.template import param
+
+        with pytest.raises(ValueError):
+            self._make_one(range_((param('start'), 2000)))
+
+    def test_str_and_repr(self):
+        from csquery.structured import and_
+        from csquery.template import param
+
+        target = self._make_one(and_(title=param('title'), boost=2))
+        assert '(and boost=2 title:{title})' == str(target)
+        assert '<Template: (and boost=2 title:{title})>' == repr(target)
+
+
+class TestCompile_(object):
+
+    def _get_target(self):
+        from csquery.template import compile_
+        return compile_
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        from csquery.structured import and_
+        from csquery.template import Template, param
+
+        actual = self._call_fut(and_(title=param('title')))
+        assert isinstance(actual, Template)
+        assert "(and title:'star')" == actual.render(title='star')
+
+
+class TestParam(object):
+
+    def _get_target(self):
+        from csquery.template import param
+        return param
+
+    def _call_fut(self, *args, **kwargs):
+        return self._get_target()(*args, **kwargs)
+
+    def test_it(self):
+        actual = self._call_fut('title')
+        assert 'title' == actual.name
+        assert '<Placeholder: title>' == repr(actual)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.test_wire
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    unittest for csquery.wire
+
+    :author: tell-k <ffk2005 at gmail.com>
+    :copyright: tell-k. All Rights Reserved.
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals  # NOQA
+
+import pytest
+
+
+class TestDumpsLoads(object):
+
+    def _round_trip(self, expression):
+        from csquery.wire import dumps, loads
+
+        data = dumps(expression)
+        assert isinstance(data, bytes)
+        return loads(data)
+
+    def test_it(self):
+        from csquery.structured import and_, or_, not_, term, near, in_
+
+        target = and_(
+            or_(term('star', field='title', boost=2),
+                near("it's a trap", field='plot', distance=3)),
+            not_(genres='horror'),
+            in_('id', ['tt1', 'tt2']),
+            year=(1977, 2000), rating=(7.5, ''), boost=1.5,
+        )
+        actual = self._round_trip(target)
+        assert target == actual
+        assert target() == actual()
+        assert target.options == actual.options
+        assert [1.5] == [type(v)(v) for v in actual.options.values()]
+
+    def test_raw_values(self):
+        import datetime
+        from csquery.structured import and_, field, parse
+
+        tz = datetime.timezone(datetime.timedelta(hours=-5, minutes=-30))
+        values = ['star', "it's", 2000, -3, 10 ** 30, 7.5, True, False,
+                  None, b'bytes', (1990, ''), [1, 2], '(term a)', '',
+                  'é', datetime.datetime(2001, 2, 3, 4, 5, 6, 7),
+                  datetime.datetime(999, 1, 2, tzinfo=tz),
+                  datetime.date(1977, 5, 25),
+                  (datetime.date(1990, 1, 1), None)]
+        target = and_(*[field(v, 'f{}'.format(i))
+                        for i, v in enumerate(values)])
+        actual = self._round_trip(target)
+        assert target == actual
+        assert values == [f.raw for f in actual.fields]
+        assert [type(v) for v in values] == \
+            [type(f.raw) for f in actual.fields]
+        assert tz == actual.fields[16].raw.tzinfo
+
+        # without the original values, raw is the literal.
+        target = parse("(and title:'star' year:2000)")
+        assert ["'star'", '2000'] == [
+            f.raw for f in self._round_trip(target).fields]
+
+    def test_in_values(self):
+        from csquery.structured import in_
+
+        for values in (['a', 'b'], [1, 2, 3], ["it's", 'b'], [1, 'a', 2.5],
+                       [True, 1], []):
+            target = in_('id', values, boost=2)
+            actual = self._round_trip(target)
+            assert target == actual
+            assert target() == actual()
+            assert tuple(values) == actual.values
+            assert [type(v) for v in values] == [
+                type(v) for v in actual.values]
+            assert 'id' == actual.name
+
+    def test_shared_subtree(self):
+        from csquery.wire import dumps
+        from csquery.structured import and_, or_
+
+        shared = or_(*[{'title': 'word{}'.format(i)} for i in range(50)])
+        target = and_(shared, and_(shared, year=2000))
+        actual = self._round_trip(target)
+        assert target == actual
+        assert actual.fields[0].expression is \
+            actual.fields[1].expression.fields[0].expression
+        assert len(dumps(target)) < len(dumps(shared)) + 100
+
+    def test_deep(self):
+        from csquery.structured import and_
+
+        target = and_(title='star')
+        for i in range(20000):
+            target = and_(target, year=i)
+        assert target == self._round_trip(target)
+
+    def test_compact(self):
+        import pickle
+        from csquery.wire import dumps
+        from csquery.structured import and_, or_
+
+        target = or_(*[and_(brand='brand {}'.format(i % 20),
+                            price=(i, i + 10)) for i in range(200)])
+        assert len(dumps(target)) < len(pickle.dumps(target, 2)) * 0.75
+
+    def test_other_types(self):
+        from decimal import Decimal
+        from csquery.structured import and_, field, in_, term
+        from csquery.template import compile_, param
+
+        numpy = pytest.importorskip('numpy')
+        # values without a code of their own are loaded as their literal.
+        for target in [and_(id=numpy.int64(5)),
+                       and_(price=Decimal('1.5')),
+                       and_(title=field('x')),
+                       and_(price=(Decimal('1.5'), 2)),
+                       and_(frozenset([1]), title=param('title'))]:
+            actual = self._round_trip(target)
+            assert target() == actual()
+            assert [f._value for f in target.fields] == [
+                f.raw for f in actual.fields]
+
+        target = in_('id', [numpy.int64(1), 'a'])
+        actual = self._round_trip(target)
+        assert target() == actual()
+        assert ('1', 'a') == actual.values
+
+        target = term('star', boost=Decimal('1.5'))
+        actual = self._round_trip(target)
+        assert target() == actual()
+        assert {'boost': '1.5'} == actual.options
+
+        target = and_(term('star', boost=param('boost')), year=param('year'))
+        actual = self._round_trip(target)
+        assert compile_(target)(boost=2, year=2000) == \
+            compile_(actual)(boost=2, year=2000)
+
+    def test_invalid(self):
+        from csquery.wire import dumps, loads
+        from csquery.structured import and_
+
+        with pytest.raises(ValueError):
+            loads(b'')
+        with pytest.raises(ValueError):
+            loads(b'XYZ' + dumps(and_(a=1))[3:])